@@ -1,4 +1,5 @@
 import logging
+import threading
 from flask_cors import CORS
 from flask import Flask
 from app.extentions import bcrypt, jwt, mongo
@@ -27,6 +28,9 @@ def create_app():
     
     # Register error handlers
     register_error_handlers(app)
+
+    # Start background workers
+    start_background_tasks(app)
     
     logger.info("Application initialized successfully")
 
@@ -49,7 +53,25 @@ def register_error_handlers(app):
     @app.errorhandler(400)
     def bad_request(error):
         return {"error": "Bad request", "message": str(error)}, 400
+
+    @app.errorhandler(413)
+    def payload_too_large(error):
+        return {"error": "Payload too large", "message": str(error)}, 413
     
+def start_background_tasks(app):
+    """Start the background workers that must run even before the first request.
+    
+    Args:
+        app: Flask application instance
+    """
+    from app.social_video.poller import PublishStatusPoller
+    from app.upload_youtube.service import warm_up
+
+    # Closes publishes left behind by workers that stopped before they finished
+    PublishStatusPoller().ensure_running()
+    # Build the YouTube credentials and first client off the startup path
+    threading.Thread(target=warm_up, name="youtube-warm-up", daemon=True).start()
+
 def register_blueprints(app):
     """Register blueprints for the application.
     
@@ -61,7 +83,7 @@ def register_blueprints(app):
     from app.script.route import script_bp
     from app.auth.route import user_bp
     from app.image.route import image_bp
-    #from app.video.route import video_bp
+    from app.video.route import video_bp
     from app.voice.route import voice_bp
     from app.file.route import file_bp
     from app.caption.route import caption_bp
@@ -70,13 +92,14 @@ def register_blueprints(app):
     from app.social_video.route import social_video_bp    
     from app.my_video.route import videos_bp
     from app.workspace.route import workspace_bp
+    from app.storage.route import storage_bp
 
     blue_prints = [
         (trending_bp, '/api/trending'),
         (script_bp, '/api/script'),
         (user_bp, '/api/auth'),
         (image_bp, '/api/image'),
-        #(video_bp, '/api/video'),
+        (video_bp, '/api/video'),
         (voice_bp, '/api/voice'),
         (file_bp, '/api/file'),
         (caption_bp, '/api/caption'),
@@ -85,6 +108,7 @@ def register_blueprints(app):
         (social_video_bp, '/api/social'),
         (videos_bp, '/api/videos'),
         (workspace_bp, '/api/workspace'),
+        (storage_bp, '/api/storage'),
     ]
 
     for blueprint, url_prefix in blue_prints:
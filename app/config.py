@@ -10,4 +10,6 @@ load_dotenv(dotenv_path=env_file)
 class Config:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM = "HS256"
-    MONGO_URI = os.getenv("MONGO_URI")
\ No newline at end of file
+    MONGO_URI = os.getenv("MONGO_URI")
+    # Largest accepted request body (bytes); bigger uploads are rejected with 413
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(1024 ** 3)))
\ No newline at end of file
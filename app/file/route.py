@@ -31,22 +31,33 @@ class FileController:
             return jsonify({"error": str(e)}), 400
     @jwt_required()
     def upload_video(self):
-        """Upload video file and return its Cloudinary URL."""
-        # Expect multipart/form-data with 'video' file
-        if 'video' not in request.files:
-            return jsonify({"error": "Missing video file"}), 400
-        
-        file = request.files['video']
-        video_bytes = file.read()
-        
-        # Get optional title and thumbnail from form data
-        title = request.form.get('title', None)
-        thumbnail = request.form.get('thumbnail', None)
+        """
+        Upload video file and return its storage URL.
+
+        Accepts multipart/form-data with a 'video' file, or the raw video as the
+        request body (Content-Type: video/*) with title and thumbnail as query
+        parameters. Either way the video is streamed to storage in fixed-size
+        parts and never read into memory as a whole.
+        """
+        if request.mimetype.startswith('video/'):
+            video_stream = request.stream
+            title = request.args.get('title', None)
+            thumbnail = request.args.get('thumbnail', None)
+        else:
+            # Expect multipart/form-data with 'video' file
+            if 'video' not in request.files:
+                return jsonify({"error": "Missing video file"}), 400
+            
+            video_stream = request.files['video'].stream
+            
+            # Get optional title and thumbnail from form data
+            title = request.form.get('title', None)
+            thumbnail = request.form.get('thumbnail', None)
         
         # Generate unique ID for video
         video_id = uuid.uuid4().hex
         try:
-            url = self.service.uploadVideo(video_bytes, video_id)
+            url = self.service.uploadVideo(video_stream, video_id)
             # Insert video metadata into MongoDB with title and thumbnail
             insert_video(video_id or '', url, get_jwt_identity(), datetime.utcnow(), 'completed', title, thumbnail)
             return jsonify({"video_url": url, "video_id": video_id, "title": title, "thumbnail": thumbnail}), 200
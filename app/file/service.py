@@ -1,11 +1,14 @@
-import cloudinary
-from cloudinary import CloudinaryImage
-import cloudinary.uploader
-import cloudinary.api
 import json
-import requests
+import logging
 
 from app.file.dto import UploadImageDTO, UploadVideoDTO
+from app.storage.service import get_storage
+from app.storage.executor import UploadExecutor
+from app.storage.dedup import put_deduplicated
+from app.storage.media_cache import MediaCache
+
+logger = logging.getLogger(__name__)
+
 class FileService:
     _instance = None
 
@@ -15,49 +18,63 @@ class FileService:
         return cls._instance
     
     def __init__(self):
-        config = cloudinary.config(secure=True)
+        self.storage = get_storage()
+        self.uploads = UploadExecutor()
+
+    def _put(self, data, key: str, resource_type: str) -> dict:
+        """Store raw bytes or a file-like object through the shared upload executor."""
+        return self._put_async(data, key, resource_type).result()
 
+    def _put_async(self, data, key: str, resource_type: str):
+        if hasattr(data, "read"):
+            return self.uploads.put_stream(data, key, resource_type, dedupe=True)
+        return self.uploads.put_bytes(data, key, resource_type, dedupe=True)
+
+    def upload_image_async(self, image_bytes, image_id):
+        """Queue an image upload; the future resolves to the storage result dict."""
+        return self._put_async(image_bytes, f"video_creator/images/{image_id}", "image")
     
     def uploadImages(self, image_bytes, image_id ) -> str:
         try:
-            upload_result = cloudinary.uploader.upload(
-                        image_bytes,
-                        public_id=f"images/{image_id}",
-                        resource_type="image",
-                        folder="video_creator"
-                    )
-            image_url = upload_result['secure_url']
-            print(f"Uploaded image {image_id} to Cloudinary: {image_url}")
+            upload_result = self._put(image_bytes, f"video_creator/images/{image_id}", "image")
+            image_url = upload_result['url']
+            logger.info(f"Uploaded image {image_id} to storage: {image_url}")
             return image_url
         except Exception as e:
             raise ValueError(f"Failed to upload image {image_id}: {str(e)}")
     
     def uploadVideo(self, video_bytes, video_id) -> str:
         try:
-            upload_result = cloudinary.uploader.upload(
-                video_bytes,
-                public_id=f"videos/{video_id}",
-                resource_type="video",
-                folder="video_creator"
-            )
-            video_url = upload_result['secure_url']
-            print(f"Uploaded video {video_id} to Cloudinary: {video_url}")
+            upload_result = self._put(video_bytes, f"video_creator/videos/{video_id}", "video")
+            video_url = upload_result['url']
+            logger.info(f"Uploaded video {video_id} to storage: {video_url}")
             return video_url
         except Exception as e:
             raise ValueError(f"Failed to upload video {video_id}: {str(e)}")
     def upload_image_from_url(self, image_url: str, image_id: str = None) -> str:
         """
-        Tải ảnh từ image_url và upload lên Cloudinary.
+        Tải ảnh từ image_url và upload lên storage.
         """
-        response = requests.get(image_url)
-        response.raise_for_status()
-        image_bytes = response.content
+        return self.upload_image_from_url_async(image_url, image_id).result()
 
+    def upload_image_from_url_async(self, image_url: str, image_id: str = None):
+        """
+        Download and upload on the upload executor, so the caller can move on
+        to the next provider call. The future resolves to the image URL.
+        """
         image_id = image_id or "from_url"
-        upload_result = cloudinary.uploader.upload(
-            image_bytes,
-            public_id=f"images/{image_id}",
-            resource_type="image",
-            folder="video_creator"
-        )
-        return upload_result["secure_url"]
\ No newline at end of file
+
+        def transfer():
+            media_cache = MediaCache()
+            with media_cache.open(image_url) as f:
+                image_bytes = f.read()
+            upload_result = put_deduplicated(
+                self.storage,
+                image_bytes,
+                f"video_creator/images/{image_id}",
+                "image",
+                media_cache.content_type(image_url)
+            )
+            return upload_result["url"]
+
+        return self.uploads.submit(transfer)
\ No newline at end of file
@@ -89,6 +89,8 @@ class ImageService:
         logger.info(f"Split script into {len(scenes)} scenes with voices")
         
         image_data = []
+        pending_uploads = []
+        file_service = FileService()
         headers = {
             "Authorization": f"Bearer {TOGETHER_API_KEY}",
             "Content-Type": "application/json"
@@ -121,32 +123,10 @@ class ImageService:
                     if "data" in result and len(result["data"]) > 0:
                         together_url = result["data"][0]["url"]
                         image_id = str(uuid.uuid4())
-                        file_service = FileService()
-                        image_url = file_service.upload_image_from_url(together_url, image_id=image_id)
-                        print(f"Generated image {i+1} with ID {image_id} and URL {image_url} and {together_url[:80]}")
-                        print(f"Generated image {i+1} with ID {image_id} and URL ")
-                        try:
-                            insert_image(
-                                file_id=image_id,
-                                url=image_url,
-                                scene=scene,
-                                voice=voice,
-                                owner_id=user_id,
-                                session_id=session_id,
-                                status="pending",
-                                metadata={"themes": themes}
-                            )
-                        except Exception as e:
-                            logger.error(f"MongoDB insertion failed for scene {i+1}: {str(e)}")
-                            break
-                            
-                        image_data.append({
-                            "image_id": image_id,
-                            "image_url": image_url,
-                            "scene": scene,
-                            "voice": voice
-                        })
-                        logger.info(f"Stored image {image_id} with URL")
+                        # Upload in the background while the next scene is generated
+                        future = file_service.upload_image_from_url_async(together_url, image_id=image_id)
+                        pending_uploads.append((i, image_id, scene, voice, future))
+                        logger.info(f"Generated image {i+1} with ID {image_id} and {together_url[:80]}")
                         break
                         
                     else:
@@ -173,6 +153,35 @@ class ImageService:
                 continue
             
             time.sleep(6.0)  # Throttle for 10 images/min
+
+        for i, image_id, scene, voice, future in pending_uploads:
+            try:
+                image_url = future.result()
+            except Exception as e:
+                logger.error(f"Upload failed for scene {i+1}: {str(e)}")
+                continue
+            try:
+                insert_image(
+                    file_id=image_id,
+                    url=image_url,
+                    scene=scene,
+                    voice=voice,
+                    owner_id=user_id,
+                    session_id=session_id,
+                    status="pending",
+                    metadata={"themes": themes}
+                )
+            except Exception as e:
+                logger.error(f"MongoDB insertion failed for scene {i+1}: {str(e)}")
+                continue
+
+            image_data.append({
+                "image_id": image_id,
+                "image_url": image_url,
+                "scene": scene,
+                "voice": voice
+            })
+            logger.info(f"Stored image {image_id} with URL")
         
         logger.info(f"Generated {len(image_data)} images successfully.")
         return {"session_id": session_id, "data": image_data}
@@ -1,7 +1,20 @@
 from datetime import datetime
+from pymongo import ReturnDocument
 from app.extentions import mongo
 from bson import ObjectId
 
+_indexes_ready = False
+
+def _videos():
+    global _indexes_ready
+    if not _indexes_ready:
+        # Older documents may lack video_id, so only enforce uniqueness where it is set
+        mongo.db.videos.create_index(
+            "video_id", unique=True, partialFilterExpression={"video_id": {"$type": "string"}}
+        )
+        _indexes_ready = True
+    return mongo.db.videos
+
 def get_videos_by_owner(owner_id: str):
     """
     Retrieve all videos created by a specific owner.
@@ -45,18 +58,82 @@ def insert_video(video_id: str, video_path: str, owner_id: str, created_at: date
     except Exception as e:
         raise Exception(f"Failed to insert video into MongoDB: {str(e)}")
 
+def insert_video_once(video_id: str, video_path: str, owner_id: str, created_at: datetime, status: str, title: str = None, thumbnail: str = None):
+    """
+    Insert a video document unless one with the same video_id exists.
+    
+    Args:
+        Same as insert_video.
+    
+    Returns:
+        The existing document if the video was already recorded, else None.
+    """
+    try:
+        return _videos().find_one_and_update(
+            {"video_id": video_id},
+            {"$setOnInsert": {
+                "video_id": video_id,
+                "video_path": video_path,
+                "owner_id": owner_id,
+                "created_at": created_at,
+                "status": status,
+                "title": title,
+                "thumbnail": thumbnail
+            }},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except Exception as e:
+        raise Exception(f"Failed to insert video into MongoDB: {str(e)}")
+
+def get_video_by_id(id: str):
+    """
+    Retrieve a video document by its MongoDB _id.
+    
+    Args:
+        id: Unique identifier for the video.
+    
+    Returns:
+        The video document, or None.
+    """
+    try:
+        return mongo.db.videos.find_one({"_id": ObjectId(id)})
+    except Exception as e:
+        raise Exception(f"Failed to retrieve video from MongoDB: {str(e)}")
+
+def find_video(id: str):
+    """
+    Retrieve a video document by its video_id, or by its MongoDB _id.
+    
+    Args:
+        id: video_id (UUID) or _id of the video.
+    
+    Returns:
+        The video document, or None.
+    """
+    try:
+        video = mongo.db.videos.find_one({"video_id": id})
+        if video is None and ObjectId.is_valid(id):
+            video = mongo.db.videos.find_one({"_id": ObjectId(id)})
+        return video
+    except Exception as e:
+        raise Exception(f"Failed to retrieve video from MongoDB: {str(e)}")
+
 def delete_video(id: str):
     """
     Delete a video document from the MongoDB videos collection.
     
     Args:
         video_id: Unique identifier for the video to be deleted.
+    
+    Returns:
+        The deleted video document.
     """
     try:
-        result = mongo.db.videos.delete_one({"_id": ObjectId(id)})
-        if result.deleted_count == 0:
+        video = mongo.db.videos.find_one_and_delete({"_id": ObjectId(id)})
+        if video is None:
             raise Exception(f"No video found with ID: {id}")
-        return True
+        return video
     except Exception as e:
         raise Exception(f"Failed to delete video from MongoDB: {str(e)}")
 
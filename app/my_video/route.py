@@ -15,6 +15,8 @@ class VideoController:
         """
         self.video_bp.add_url_rule('/', view_func=self.get_videos, methods=['GET'])
         self.video_bp.add_url_rule('/upload', view_func=self.upload_video, methods=['POST'])
+        self.video_bp.add_url_rule('/upload/sign', view_func=self.sign_upload, methods=['POST'])
+        self.video_bp.add_url_rule('/upload/complete', view_func=self.complete_upload, methods=['POST'])
         self.video_bp.add_url_rule('/<string:id>', view_func=self.delete_video, methods=['DELETE'])
         self.video_bp.add_url_rule('/<string:id>', view_func=self.update_video, methods=['PUT'])
 
@@ -55,6 +57,53 @@ class VideoController:
         except Exception as e:
             return jsonify({"error": str(e)}), 500
         
+    @jwt_required()
+    def sign_upload(self):
+        """
+        Issue signed parameters for uploading a video straight to storage.
+
+        Returns:
+            JSON response with the upload parameters and an upload token.
+        """
+        owner_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        try:
+            upload = self.service.sign_upload(
+                owner_id,
+                with_thumbnail=bool(data.get('with_thumbnail')),
+                content_type=data.get('content_type'),
+                thumbnail_content_type=data.get('thumbnail_content_type')
+            )
+            return jsonify(upload), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @jwt_required()
+    def complete_upload(self):
+        """
+        Record a video uploaded with /upload/sign parameters.
+
+        Returns:
+            JSON response with the stored video information.
+        """
+        owner_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        upload_token = data.get('upload_token')
+        title = data.get('title')
+        if not upload_token:
+            return jsonify({"error": "No upload_token provided"}), 400
+        if not title:
+            return jsonify({"error": "No title provided"}), 400
+        try:
+            video_info = self.service.complete_upload(owner_id, upload_token, title)
+            return jsonify(video_info), 201
+        except PermissionError as e:
+            return jsonify({"error": str(e)}), 403
+        except LookupError as e:
+            return jsonify({"error": str(e)}), 409
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     @jwt_required()
     def delete_video(self, id: str):
         """
@@ -1,7 +1,15 @@
 from datetime import datetime
+import os
 import uuid
-from app.my_video.repo import get_videos_by_owner, insert_video, delete_video, update_video
+from app.my_video.repo import get_videos_by_owner, get_video_by_id, insert_video, insert_video_once, delete_video, update_video
 from app.file.service import FileService
+from app.storage.service import get_storage
+from app.storage import signing
+from app.storage.dedup import release, register_unhashed
+
+DIRECT_UPLOAD_TOKEN_SALT = "direct-upload"
+# Time allowed between the end of the signed window and the completion callback
+DIRECT_UPLOAD_COMPLETE_GRACE = int(os.getenv("DIRECT_UPLOAD_COMPLETE_GRACE", "3600"))
 
 class VideosService:
     _instance = None
@@ -36,20 +44,28 @@ class VideosService:
         Returns:
             Boolean indicating success or failure of the deletion.
         """
-        # Implement deletion logic here
-        # For example, remove the video from the database and delete the file from storage
-        return delete_video(id)
+        video = delete_video(id)
+        # Stored files are shared between identical uploads; only drop our references
+        storage = get_storage()
+        # Uploaded videos store video_path, rendered ones (video/repo.py) video_url
+        release(storage, video.get("video_path") or video.get("video_url"))
+        release(storage, video.get("thumbnail"))
+        return True
 
     def upload_video(self, file, owner_id: str, title: str, thumbnail=None):
         """
         Upload video file to Cloudinary and save info to DB.
         """
         video_uuid = uuid.uuid4()
-        video_url = self.file_service.uploadVideo(file.stream, str(video_uuid))
-
+        thumbnail_future = None
         if thumbnail:
             thumbnail_uuid = uuid.uuid4()
-            thumbnail_url = self.file_service.uploadImages(thumbnail.stream, str(thumbnail_uuid))
+            thumbnail_future = self.file_service.upload_image_async(thumbnail.stream, str(thumbnail_uuid))
+
+        video_url = self.file_service.uploadVideo(file.stream, str(video_uuid))
+
+        if thumbnail_future:
+            thumbnail_url = thumbnail_future.result()['url']
 
         insert_video(
             video_id=str(video_uuid),
@@ -71,6 +87,107 @@ class VideosService:
             "status": "completed"
         }
 
+    def sign_upload(self, owner_id: str, with_thumbnail: bool = False, content_type: str = None,
+                    thumbnail_content_type: str = None) -> dict:
+        """
+        Issue short-lived signed parameters so the client uploads the video
+        (and optionally its thumbnail) straight to storage.
+
+        Args:
+            owner_id: ID of the user who will own the video.
+            with_thumbnail: Also sign an upload for a thumbnail image.
+            content_type: MIME type of the video (optional).
+            thumbnail_content_type: MIME type of the thumbnail (optional).
+
+        Returns:
+            Video ID, upload parameters and the token to pass to complete_upload.
+        """
+        storage = get_storage()
+        ttl = signing.STORAGE_SIGNED_UPLOAD_TTL
+        video_id = str(uuid.uuid4())
+        video_key = f"video_creator/videos/{video_id}"
+        thumbnail_key = f"video_creator/images/{uuid.uuid4()}" if with_thumbnail else None
+
+        upload_token = signing.sign({
+            "video_id": video_id,
+            "owner_id": owner_id,
+            "video_key": video_key,
+            "thumbnail_key": thumbnail_key,
+        }, DIRECT_UPLOAD_TOKEN_SALT)
+
+        return {
+            "video_id": video_id,
+            "upload_token": upload_token,
+            "video": storage.sign_upload(video_key, "video", content_type, ttl),
+            "thumbnail": storage.sign_upload(thumbnail_key, "image", thumbnail_content_type, ttl) if thumbnail_key else None,
+        }
+
+    def complete_upload(self, owner_id: str, upload_token: str, title: str):
+        """
+        Record a directly uploaded video once the client reports it is done.
+
+        Replaying the same token returns the recorded video instead of
+        inserting it again.
+
+        Args:
+            owner_id: ID of the authenticated user.
+            upload_token: Token returned by sign_upload.
+            title: Title of the video.
+
+        Returns:
+            Video information, same shape as upload_video.
+        """
+        payload = signing.unsign(upload_token, DIRECT_UPLOAD_TOKEN_SALT,
+                                 max_age=signing.STORAGE_SIGNED_UPLOAD_TTL + DIRECT_UPLOAD_COMPLETE_GRACE)
+        if not payload or payload["owner_id"] != owner_id:
+            raise PermissionError("Invalid or expired upload token")
+
+        storage = get_storage()
+        video = storage.describe(payload["video_key"], "video")
+        if not video:
+            raise LookupError("Video has not been uploaded yet")
+
+        thumbnail = None
+        if payload.get("thumbnail_key"):
+            thumbnail = storage.describe(payload["thumbnail_key"], "image")
+        thumbnail_url = thumbnail["url"] if thumbnail else None
+
+        created_at = datetime.utcnow()
+        existing = insert_video_once(
+            video_id=payload["video_id"],
+            owner_id=owner_id,
+            video_path=video["url"],
+            created_at=created_at,
+            status="completed",
+            title=title,
+            thumbnail=thumbnail_url
+        )
+        if existing:
+            return {
+                "video_id": existing["video_id"],
+                "owner_id": existing["owner_id"],
+                "video_path": existing["video_path"],
+                "title": existing["title"],
+                "thumbnail": existing["thumbnail"],
+                "created_at": existing["created_at"].isoformat(),
+                "status": existing["status"]
+            }
+
+        # Register the objects so delete_video/update_video can release them
+        register_unhashed(video, "video")
+        if thumbnail:
+            register_unhashed(thumbnail, "image")
+
+        return {
+            "video_id": payload["video_id"],
+            "owner_id": owner_id,
+            "video_path": video["url"],
+            "title": title,
+            "thumbnail": thumbnail_url,
+            "created_at": created_at.isoformat(),
+            "status": "completed"
+        }
+
     def update_video(self, id: str, title: str = None, thumbnail_file=None):
         """
         Update video title and/or thumbnail.
@@ -84,14 +201,19 @@ class VideosService:
             Updated video information.
         """
         thumbnail_url = None
+        previous_thumbnail = None
         
-        # Upload new thumbnail if provided
+        # Upload new thumbnail if provided (identical content reuses the stored copy)
         if thumbnail_file:
+            previous = get_video_by_id(id)
+            previous_thumbnail = previous.get("thumbnail") if previous else None
             thumbnail_uuid = uuid.uuid4()
             thumbnail_url = self.file_service.uploadImages(thumbnail_file.stream, str(thumbnail_uuid))
         
         # Update video in database
         updated_video = update_video(id, title, thumbnail_url)
+        if previous_thumbnail:
+            release(get_storage(), previous_thumbnail)
         
         return {
             "video_id": str(updated_video["_id"]),
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable
+from app.singleflight import SingleFlight
+from app.script import repo
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_CACHE_ENABLED = os.getenv("SCRIPT_CACHE_ENABLED", "true").lower() == "true"
+SCRIPT_CACHE_MEMORY_SIZE = int(os.getenv("SCRIPT_CACHE_MEMORY_SIZE", "512"))
+PROVIDER_CALL_WINDOW = 3600
+
+
+def normalize(value):
+    """Trim, collapse whitespace and lower-case strings so cosmetic differences share a key."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().lower()
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+class ScriptCache:
+    """
+    Two-tier cache of Gemini responses.
+
+    Entries live in an in-process LRU (``SCRIPT_CACHE_MEMORY_SIZE`` entries)
+    backed by the ``script_cache`` collection, whose TTL index expires them
+    after ``SCRIPT_CACHE_TTL`` seconds; the LRU applies the same TTL, counted
+    from when the response was produced. Identical requests running at the same
+    time share one provider call. Also counts provider calls over the last hour.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, enabled: bool = SCRIPT_CACHE_ENABLED, memory_size: int = SCRIPT_CACHE_MEMORY_SIZE):
+        if self._initialized:
+            return
+        self.enabled = enabled
+        self.memory_size = memory_size
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._flight = SingleFlight()
+        self._provider_calls = deque()
+        self._hits = 0
+        self._misses = 0
+        self._initialized = True
+
+    @staticmethod
+    def make_key(kind: str, model: str, payload) -> str:
+        """Hash the payload together with the request kind and model name."""
+        body = json.dumps({"kind": kind, "model": model, "payload": payload}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                text, stored_at = entry
+                if time.time() - stored_at < repo.SCRIPT_CACHE_TTL:
+                    self._memory.move_to_end(key)
+                    return text
+                del self._memory[key]
+        try:
+            doc = repo.get_cached_script(key)
+        except Exception as e:
+            logger.warning(f"Script cache lookup failed: {e}")
+            return None
+        if doc is None:
+            return None
+        # Keep the Mongo entry's age so the LRU copy expires with it
+        age = (datetime.utcnow() - doc["created_at"]).total_seconds()
+        self._remember(key, doc["text"], time.time() - age)
+        return doc["text"]
+
+    def put(self, key: str, kind: str, model: str, text: str):
+        if not self.enabled:
+            return
+        self._remember(key, text)
+        try:
+            repo.save_cached_script(key, kind, model, text)
+        except Exception as e:
+            logger.warning(f"Script cache write failed: {e}")
+
+    def _remember(self, key: str, text: str, stored_at: float = None):
+        with self._lock:
+            self._memory[key] = (text, time.time() if stored_at is None else stored_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def fetch(self, kind: str, model: str, payload, call: Callable[[], str], fresh: bool = False) -> tuple[str, bool]:
+        """
+        Return the cached response for ``payload`` or produce it with ``call``.
+
+        Args:
+            kind: Request kind ("generate" or "format")
+            model: Gemini model name
+            payload: Request fields that determine the response, already normalized
+            call: Provider call returning the response text
+            fresh: Skip the lookup and overwrite the cached entry
+
+        Returns:
+            tuple: (text, whether it came from the cache)
+        """
+        if not self.enabled:
+            return self.call_provider(call), False
+
+        key, text = self.lookup(kind, model, payload, fresh=fresh)
+        if text is not None:
+            return text, True
+
+        def produce():
+            text = self.call_provider(call)
+            self.put(key, kind, model, text)
+            return text
+
+        return self._flight.do((key, fresh), produce), False
+
+    def lookup(self, kind: str, model: str, payload, fresh: bool = False) -> tuple[str, str]:
+        """
+        Look a response up without producing it, counting the hit or miss.
+
+        Returns:
+            tuple: (cache key, cached text or None)
+        """
+        key = self.make_key(kind, model, payload)
+        if not self.enabled:
+            return key, None
+        text = None if fresh else self.get(key)
+        with self._lock:
+            if text is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return key, text
+
+    def call_provider(self, call: Callable[[], str]) -> str:
+        """Run a provider call and count it towards the hourly metric."""
+        self.record_provider_call()
+        return call()
+
+    def record_provider_call(self):
+        with self._lock:
+            self._provider_calls.append(time.time())
+
+    def provider_calls_last_hour(self) -> int:
+        cutoff = time.time() - PROVIDER_CALL_WINDOW
+        with self._lock:
+            while self._provider_calls and self._provider_calls[0] < cutoff:
+                self._provider_calls.popleft()
+            return len(self._provider_calls)
+
+    def stats(self) -> dict:
+        calls = self.provider_calls_last_hour()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "provider_calls_last_hour": calls,
+            }
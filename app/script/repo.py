@@ -0,0 +1,54 @@
+import os
+from datetime import datetime, timedelta
+from app.extentions import mongo
+
+SCRIPT_CACHE_TTL = int(os.getenv("SCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+
+_indexes_ready = False
+
+def _script_cache():
+    global _indexes_ready
+    if not _indexes_ready:
+        mongo.db.script_cache.create_index("key", unique=True)
+        mongo.db.script_cache.create_index("created_at", expireAfterSeconds=SCRIPT_CACHE_TTL)
+        _indexes_ready = True
+    return mongo.db.script_cache
+
+def get_cached_script(key: str):
+    """
+    Retrieve a cached Gemini response.
+
+    Args:
+        key: Cache key (hash of the normalized request and model name)
+
+    Returns:
+        dict: ``text`` and ``created_at`` (UTC) of the entry, or None if missing
+        or expired (the TTL monitor only runs once a minute, so age is checked too).
+    """
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=SCRIPT_CACHE_TTL)
+        return _script_cache().find_one(
+            {"key": key, "created_at": {"$gt": cutoff}},
+            {"_id": 0, "text": 1, "created_at": 1}
+        )
+    except Exception as e:
+        raise Exception(f"Failed to retrieve cached script from MongoDB: {str(e)}")
+
+def save_cached_script(key: str, kind: str, model: str, text: str):
+    """
+    Store a Gemini response; the TTL index drops it after SCRIPT_CACHE_TTL seconds.
+
+    Args:
+        key: Cache key
+        kind: Request kind ("generate" or "format")
+        model: Gemini model name
+        text: Response text
+    """
+    try:
+        _script_cache().update_one(
+            {"key": key},
+            {"$set": {"kind": kind, "model": model, "text": text, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        raise Exception(f"Failed to save cached script to MongoDB: {str(e)}")
@@ -1,8 +1,15 @@
-from flask import Blueprint, jsonify, request
-from app.script.service import ScriptService
+import json
+import time
+import logging
+from flask import Blueprint, Response, jsonify, request
+from pydantic import ValidationError
+from app.script.service import ScriptService, SCRIPT_BATCH_MAX_ITEMS
 from app.script.dto import ScriptGenerateDTO, ScriptFormatDTO
+from app.script.topics import TOPIC_SOURCES
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
+logger = logging.getLogger(__name__)
+
 class ScriptController:
     def __init__(self):
         self.service = ScriptService()
@@ -12,7 +19,11 @@ class ScriptController:
 
     def _register_routes(self):
         self.script_bp.add_url_rule('/', view_func=self.script, methods=['POST'])
+        self.script_bp.add_url_rule('/batch', view_func=self.batch_script, methods=['POST'])
+        self.script_bp.add_url_rule('/stream', view_func=self.stream_script, methods=['POST'])
         self.script_bp.add_url_rule('/format', view_func=self.format_script, methods=['POST'])
+        self.script_bp.add_url_rule('/metrics', view_func=self.metrics, methods=['GET'])
+        self.script_bp.add_url_rule('/topics', view_func=self.get_topics, methods=['GET'])
         self.script_bp.add_url_rule('/topics/wiki', view_func=self.get_wiki_trends, methods=['GET'])
         self.script_bp.add_url_rule('/topics/google', view_func=self.get_google_trends, methods=['GET'])
         self.script_bp.add_url_rule('/topics/youtube', view_func=self.get_youtube_trends, methods=['GET'])
@@ -24,11 +35,89 @@ class ScriptController:
             data = request.json
             dto = ScriptGenerateDTO(**data)
 
-            script = self.service.generate_script(dto)
-            return jsonify({"data": script}), 200
+            script, cached = self.service.generate_script(dto, fresh=self._is_fresh())
+            return jsonify({"data": script, "cached": cached}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
+    @jwt_required()
+    def batch_script(self):
+        """Generate scripts for a list of requests (``?stream=true`` for SSE)."""
+        data = request.json
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "items must be a non-empty list"}), 400
+        if len(items) > SCRIPT_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"A batch can hold at most {SCRIPT_BATCH_MAX_ITEMS} items"}), 400
+
+        dtos = []
+        for item in items:
+            try:
+                dtos.append(ScriptGenerateDTO(**item))
+            except (ValidationError, TypeError) as e:
+                dtos.append(str(e))
+
+        started = time.monotonic()
+        results = self.service.generate_batch(dtos, fresh=self._is_fresh())
+
+        if request.args.get('stream', 'false').lower() == 'true':
+            def generate():
+                succeeded = 0
+                for result in results:
+                    succeeded += result["status"] == "ok"
+                    yield self._sse("item", result)
+                yield self._sse("done", {
+                    "total": len(dtos),
+                    "succeeded": succeeded,
+                    "failed": len(dtos) - succeeded,
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1)
+                })
+
+            return Response(
+                generate(),
+                mimetype='text/event-stream',
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        ordered = sorted(results, key=lambda r: r["index"])
+        succeeded = sum(r["status"] == "ok" for r in ordered)
+        return jsonify({
+            "results": ordered,
+            "total": len(ordered),
+            "succeeded": succeeded,
+            "failed": len(ordered) - succeeded,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1)
+        }), 200
+
+    @jwt_required()
+    def stream_script(self):
+        """Stream script generation as Server-Sent Events."""
+        try:
+            data = request.json
+            dto = ScriptGenerateDTO(**data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+
+        events = self.service.stream_script(dto, fresh=self._is_fresh())
+
+        def generate():
+            try:
+                for event, payload in events:
+                    yield self._sse(event, payload)
+            except Exception as e:
+                logger.error(f"Script stream failed: {e}")
+                yield self._sse("error", {"error": str(e)})
+
+        return Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @staticmethod
+    def _sse(event: str, payload: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
     @jwt_required()
     def format_script(self):
         """Format script route handler."""
@@ -36,8 +125,40 @@ class ScriptController:
             data = request.json
             dto = ScriptFormatDTO(**data)
 
-            formatted_script = self.service.format_script(dto)
-            return jsonify({"data": formatted_script}), 200
+            result = self.service.format_script(dto, fresh=self._is_fresh())
+            return jsonify({
+                "data": result["script"],
+                "path": result["path"],
+                "repairs": result["repairs"],
+                "cached": result["cached"]
+            }), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+
+    @staticmethod
+    def _is_fresh() -> bool:
+        """``?fresh=true`` skips the script cache."""
+        return request.args.get('fresh', 'false').lower() == 'true'
+
+    @jwt_required()
+    def metrics(self):
+        """Script cache counters and Gemini calls over the last hour."""
+        return jsonify(self.service.cache.stats()), 200
+
+    @jwt_required()
+    def get_topics(self):
+        """Get topics from several sources at once (?sources=wiki,google,youtube)."""
+        try:
+            keyword = request.args.get('keyword')
+            if not keyword:
+                return jsonify({"error": "keyword is required"}), 400
+            limit = int(request.args.get('limit', 10))
+            sources = [s.strip() for s in request.args.get('sources', ','.join(TOPIC_SOURCES)).split(',') if s.strip()]
+            unknown = [s for s in sources if s not in TOPIC_SOURCES]
+            if unknown or not sources:
+                return jsonify({"error": f"Unsupported sources: {', '.join(unknown)}"}), 400
+            topics = self.service.topics.get_topics(keyword, list(dict.fromkeys(sources)), limit)
+            return jsonify(topics), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
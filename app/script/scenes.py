@@ -0,0 +1,44 @@
+import re
+
+SCENE_REGEX = re.compile(r"\[Scene\s*(\d+)\s*:\s*(.*?)\]\s*Narration:\s*(.*?)(?=\[Scene|\Z)", re.DOTALL)
+SCENE_START = re.compile(r"\[Scene\s*\d+\s*:")
+
+
+def parse_scenes(script: str) -> list[dict]:
+    """Split a complete script into ``{"index", "description", "narration"}`` scenes."""
+    return [
+        {"index": int(index), "description": description.strip(), "narration": narration.strip()}
+        for index, description, narration in SCENE_REGEX.findall(script)
+        if narration.strip()
+    ]
+
+
+class SceneStreamParser:
+    """
+    Incrementally extract scenes from a script arriving in chunks.
+
+    A scene is complete once the header of the next scene has arrived (or the
+    stream ends), so each scene is returned exactly once, as early as possible.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._offset = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Append ``chunk`` and return the scenes it completed."""
+        self.text += chunk
+        starts = [m.start() for m in SCENE_START.finditer(self.text, self._offset)]
+        if len(starts) < 2:
+            return []
+        # Everything before the last header is made of finished scenes
+        end = starts[-1]
+        scenes = parse_scenes(self.text[self._offset:end])
+        self._offset = end
+        return scenes
+
+    def close(self) -> list[dict]:
+        """Return the scenes left in the buffer once the stream has ended."""
+        scenes = parse_scenes(self.text[self._offset:])
+        self._offset = len(self.text)
+        return scenes
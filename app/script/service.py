@@ -1,12 +1,28 @@
 import os
 import ast
+import time
+import queue
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai
 from app.script.dto import ScriptFormatDTO, ScriptGenerateDTO
+from app.script.cache import ScriptCache, normalize
+from app.script.scenes import SceneStreamParser, parse_scenes
+from app.script.validator import check_and_repair
+from app.script.topics import TopicFanout, TOPIC_SOURCE_TIMEOUT
 from pytrends.request import TrendReq
 
 RAPID_API_KEY = os.getenv("RAPID_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+SYSTEM_PROMPT = "You are a creative expert in short-form video content."
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+SCRIPT_BATCH_MAX_ITEMS = int(os.getenv("SCRIPT_BATCH_MAX_ITEMS", "50"))
+
+# Caps in-flight Gemini calls across single, streamed and batch requests
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+_batch_pool = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix="script-batch")
 
 class ScriptService:
     _instance = None
@@ -18,19 +34,143 @@ class ScriptService:
     
     def __init__(self):
         genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cache = ScriptCache()
+        self.topics = TopicFanout({
+            "wiki": self.get_topics_from_wiki,
+            "google": self.get_topics_from_google,
+            "youtube": self.get_topics_from_youtube,
+        })
     
-    def generate_script(self, dto: ScriptGenerateDTO) -> str:
+    def generate_script(self, dto: ScriptGenerateDTO, fresh: bool = False) -> tuple[str, bool]:
         """
         Generate a script based on the provided keyword and topic.
+
+        Identical requests (after normalization) are answered from the script
+        cache unless ``fresh`` is set.
         
         Args:
             dto (ScriptGenerateDTO): Data Transfer Object containing the keyword and topics.
+            fresh (bool): Bypass the cache and store the new response.
         
         Returns:
-            str: The generated script.
+            tuple: The generated script and whether it came from the cache.
+        """
+        prompt = self._build_script_prompt(dto)
+        return self.cache.fetch(
+            "generate", GEMINI_MODEL, normalize(dto.model_dump()),
+            lambda: self._generate(prompt),
+            fresh=fresh
+        )
+
+    def stream_script(self, dto: ScriptGenerateDTO, fresh: bool = False):
+        """
+        Generate a script with Gemini's streamed generation.
+
+        Yields ``(event, data)`` pairs: ``delta`` with each text chunk, ``scene``
+        as soon as a ``[Scene X: ...] Narration:`` block is complete, and a final
+        ``done`` with the whole script. A cached script is replayed as a single
+        delta followed by its scenes. Only completed streams are cached.
+
+        Gemini is read by a separate thread into a queue, so the concurrency
+        slot is released as soon as Gemini has finished, however slowly the
+        client consumes the events.
+        """
+        key, script = self.cache.lookup("generate", GEMINI_MODEL, normalize(dto.model_dump()), fresh=fresh)
+        if script is not None:
+            yield "delta", {"text": script}
+            scenes = parse_scenes(script)
+            for scene in scenes:
+                yield "scene", scene
+            yield "done", {"script": script, "total_scenes": len(scenes), "cached": True}
+            return
+
+        prompt = self._build_script_prompt(dto)
+        chunks = queue.Queue()
+
+        def pump():
+            parts = []
+            try:
+                with _gemini_slots:
+                    self.cache.record_provider_call()
+                    response = self.model.generate_content([SYSTEM_PROMPT, prompt], stream=True)
+                    for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # Chunks without text parts (e.g. safety metadata)
+                            continue
+                        parts.append(text)
+                        chunks.put(text)
+                self.cache.put(key, "generate", GEMINI_MODEL, "".join(parts))
+                chunks.put(None)
+            except Exception as e:
+                chunks.put(e)
+
+        threading.Thread(target=pump, name="script-stream", daemon=True).start()
+
+        parser = SceneStreamParser()
+        total_scenes = 0
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield "delta", {"text": item}
+            for scene in parser.feed(item):
+                total_scenes += 1
+                yield "scene", scene
+        for scene in parser.close():
+            total_scenes += 1
+            yield "scene", scene
+
+        yield "done", {"script": parser.text, "total_scenes": total_scenes, "cached": False}
+
+    def generate_batch(self, items: list, fresh: bool = False):
+        """
+        Generate scripts for several requests concurrently.
+
+        Items run on a pool of GEMINI_MAX_CONCURRENCY workers and share the
+        script cache, so repeated keywords cost one Gemini call.
+
+        Args:
+            items (list): ScriptGenerateDTO instances, or an error message for
+                items that failed validation.
+            fresh (bool): Bypass the cache for every item.
+
+        Yields:
+            dict: One result per item as it finishes: ``index``, ``keyword``,
+            ``status`` ("ok" or "error"), ``script``, ``cached``, ``latency_ms``
+            and ``error``.
         """
+        def run(index, dto):
+            started = time.monotonic()
+            result = {"index": index, "keyword": dto.keyword, "status": "ok", "script": None, "cached": False, "error": None}
+            try:
+                result["script"], result["cached"] = self.generate_script(dto, fresh=fresh)
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e)
+            result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+            return result
 
+        futures = []
+        for index, item in enumerate(items):
+            if isinstance(item, ScriptGenerateDTO):
+                futures.append(_batch_pool.submit(run, index, item))
+            else:
+                yield {"index": index, "keyword": None, "status": "error", "script": None,
+                       "cached": False, "error": item, "latency_ms": 0.0}
+        for future in as_completed(futures):
+            yield future.result()
+
+    def _generate(self, prompt: str) -> str:
+        with _gemini_slots:
+            response = self.model.generate_content([SYSTEM_PROMPT, prompt])
+        return response.text
+
+    def _build_script_prompt(self, dto: ScriptGenerateDTO) -> str:
         data = dto.model_dump()
         keyword = data.get("keyword")
         style = data.get("style")
@@ -64,25 +204,41 @@ class ScriptService:
             f"Quotes: {quotes}. "
             "Make it emotionally appealing, concise, and resonate with a young audience."
         )
+        return prompt
 
-        system_prompt = "You are a creative expert in short-form video content."
-        
-        response = self.model.generate_content([system_prompt, prompt])
-        
-        script = response.text
-        return script
-
-    def format_script(self, dto: ScriptFormatDTO) -> str:
+    def format_script(self, dto: ScriptFormatDTO, fresh: bool = False) -> dict:
         """
-        Format the script to ensure it follows the required structure using Gemini.
+        Format the script to ensure it follows the required structure.
+
+        Scripts that already match the format, or that the local rule-based
+        repairs can fix, are returned without calling Gemini. Gemini results
+        are cached by a hash of the input script.
         
         Args:
-            script (str): The script to format.
+            dto (ScriptFormatDTO): The script to format.
+            fresh (bool): Bypass the cache and store the new response.
         
         Returns:
-            str: The formatted script.
+            dict: ``script``, ``path`` ("valid", "repaired" or "gemini"),
+            the local ``repairs`` applied and whether the Gemini result was ``cached``.
         """
-        data = dto.model_dump()
+        script, path, repairs = check_and_repair(dto.script)
+        if path != "invalid":
+            return {"script": script, "path": path, "repairs": repairs, "cached": False}
+
+        prompt = self._build_format_prompt(dto.script)
+        formatted, cached = self.cache.fetch(
+            "format", GEMINI_MODEL, {"script": dto.script},
+            lambda: self._generate(prompt),
+            fresh=fresh
+        )
+        # Gemini's output often needs the same small fixes (e.g. bold labels)
+        repaired, local_path, repairs = check_and_repair(formatted)
+        if local_path != "invalid":
+            formatted = repaired
+        return {"script": formatted, "path": "gemini", "repairs": repairs, "cached": cached}
+
+    def _build_format_prompt(self, script: str) -> str:
         prompt = (
             "Format the following script so that it strictly follows these rules:\n"
             "1. Each scene MUST be structured as: [Scene X: <visual description>] Narration: <the spoken text>. "
@@ -96,20 +252,19 @@ class ScriptService:
             "[Scene 1: A bustling city street with stylishly dressed people walking by.]\n"
             "Narration: Fashion is more than just clothes; it's a form of expression. It's how we tell the world who we are, without saying a word."
             "Format this script accordingly:\n"
-            f"{data.get('script')}\n"
+            f"{script}\n"
             "Ensure the script is concise, engaging, and resonates with a young audience."
         )
-        system_prompt = "You are a creative expert in short-form video content."
-        response = self.model.generate_content([system_prompt, prompt])
-        return response.text
+        return prompt
     
-    def get_topics_from_wiki(self, keyword: str, limit: int = 5):
+    def get_topics_from_wiki(self, keyword: str, limit: int = 5, timeout: float = TOPIC_SOURCE_TIMEOUT):
         """
         Get trending topics related to a keyword from Wikipedia.
         
         Args:
             keyword (str): Search keyword.
             limit (int): Number of results to return.
+            timeout (float): Request timeout in seconds.
 
         Returns:
             list: List of trending topics.
@@ -122,27 +277,27 @@ class ScriptService:
             "namespace": 0,
             "format": "json"
         }
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=timeout)
         if response.status_code == 200:
             data = response.json()
             return data[1]
         else:
             return []
     
-    def get_topics_from_google(self, keyword: str, limit: int) -> list:
+    def get_topics_from_google(self, keyword: str, limit: int, timeout: float = TOPIC_SOURCE_TIMEOUT) -> list:
         url = "https://google-api31.p.rapidapi.com/suggestion"
         headers = {
             "X-RapidAPI-Key": RAPID_API_KEY,
             "X-RapidAPI-Host": "google-api31.p.rapidapi.com"
         }
-        response = requests.post(url, headers=headers, json={"text": keyword})
+        response = requests.post(url, headers=headers, json={"text": keyword}, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         phrases = [item["phrase"] for item in data]
         phrases = phrases[:limit]
         return [phrase.capitalize() for phrase in phrases]
 
-    def get_topics_from_youtube(self, keyword: str, limit: int) -> list:
+    def get_topics_from_youtube(self, keyword: str, limit: int, timeout: float = TOPIC_SOURCE_TIMEOUT) -> list:
         GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
         url = "https://www.googleapis.com/youtube/v3/search"
         params = {
@@ -152,7 +307,7 @@ class ScriptService:
             "maxResults": limit,
             "key": GOOGLE_API_KEY
         }
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         topics = [item["snippet"]["title"] for item in data.get("items", [])]
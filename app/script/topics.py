@@ -0,0 +1,110 @@
+import os
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable
+from app.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TOPIC_SOURCES = ("wiki", "google", "youtube")
+TOPIC_FETCH_WORKERS = int(os.getenv("TOPIC_FETCH_WORKERS", "8"))
+TOPIC_SOURCE_TIMEOUT = float(os.getenv("TOPIC_SOURCE_TIMEOUT", "3"))
+TOPIC_SOURCE_TIMEOUTS = {
+    source: float(os.getenv(f"TOPIC_{source.upper()}_TIMEOUT", str(TOPIC_SOURCE_TIMEOUT)))
+    for source in TOPIC_SOURCES
+}
+TOPIC_CACHE_TTL = float(os.getenv("TOPIC_CACHE_TTL", "600"))
+TOPIC_FETCH_LIMIT = int(os.getenv("TOPIC_FETCH_LIMIT", "10"))
+
+
+def _topic_key(topic: str) -> str:
+    return re.sub(r"\s+", " ", topic).strip().casefold()
+
+
+class TopicFanout:
+    """
+    Query several topic sources for one keyword at the same time.
+
+    Each source gets its own deadline; sources that miss it are reported as
+    ``timeout`` and the response is built from the others. Fetches keep
+    running after the deadline and their results are cached per
+    (source, keyword) for ``TOPIC_CACHE_TTL`` seconds, so a slow source
+    usually answers from the cache on the next request.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, fetchers: dict[str, Callable[[str, int, float], list]] = None):
+        if self._initialized:
+            return
+        self.fetchers = fetchers or {}
+        self._pool = ThreadPoolExecutor(max_workers=TOPIC_FETCH_WORKERS, thread_name_prefix="topic-fetch")
+        self._flight = SingleFlight(result_ttl=TOPIC_CACHE_TTL)
+        self._initialized = True
+
+    def _fetch(self, source: str, keyword: str, limit: int) -> list:
+        fetch_limit = max(limit, TOPIC_FETCH_LIMIT)
+        timeout = TOPIC_SOURCE_TIMEOUTS.get(source, TOPIC_SOURCE_TIMEOUT)
+        return self._flight.do(
+            (source, _topic_key(keyword), fetch_limit),
+            lambda: self.fetchers[source](keyword, fetch_limit, timeout)
+        )
+
+    def get_topics(self, keyword: str, sources: list[str], limit: int = 10) -> dict:
+        """
+        Fetch, merge and dedupe topic suggestions from ``sources``.
+
+        Args:
+            keyword: Search keyword
+            sources: Subset of TOPIC_SOURCES
+            limit: Maximum number of merged topics
+
+        Returns:
+            dict: ``topics`` (title and the sources suggesting it), per-source
+            ``status``/``count``/``latency_ms``/``error``, and ``partial`` when a
+            source failed or timed out.
+        """
+        started = time.monotonic()
+        futures = {source: self._pool.submit(self._fetch, source, keyword, limit) for source in sources}
+
+        results = {}
+        report = {}
+        for source, future in futures.items():
+            deadline = started + TOPIC_SOURCE_TIMEOUTS.get(source, TOPIC_SOURCE_TIMEOUT)
+            try:
+                results[source] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                report[source] = {"status": "ok", "count": len(results[source])}
+            except TimeoutError:
+                report[source] = {"status": "timeout", "count": 0}
+            except Exception as e:
+                logger.warning(f"Topic source {source} failed for '{keyword}': {e}")
+                report[source] = {"status": "error", "count": 0, "error": str(e)}
+            report[source]["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        return {
+            "keyword": keyword,
+            "topics": self._merge(results, limit),
+            "sources": report,
+            "partial": any(r["status"] != "ok" for r in report.values()),
+        }
+
+    @staticmethod
+    def _merge(results: dict[str, list], limit: int) -> list[dict]:
+        """Interleave the source lists round-robin, merging case/whitespace duplicates."""
+        merged = {}
+        for rank in range(max((len(topics) for topics in results.values()), default=0)):
+            for name, topics in results.items():
+                if rank >= len(topics) or not topics[rank].strip():
+                    continue
+                title = topics[rank].strip()
+                entry = merged.setdefault(_topic_key(title), {"title": title, "sources": []})
+                if name not in entry["sources"]:
+                    entry["sources"].append(name)
+        return list(merged.values())[:limit]
@@ -0,0 +1,125 @@
+import re
+
+# Scene words Gemini (or a user) may use instead of the English "Scene"
+SCENE_WORDS = r"(?:Scene|Cảnh|Phân cảnh|Escena|Scène|Scena|Szene|Cena|Adegan|Sahne|Сцена|场景|場景|シーン|장면)"
+NARRATION_LABELS = (
+    r"(?:Narration|Narrator|Narrating|Voice[\s-]?over|VO|Dialogue|Speaker|Lời thoại|Lời dẫn|Lời kể|"
+    r"Thuyết minh|Người dẫn chuyện|Narración|Narrador|Narrateur|Erzähler|Narrazione)"
+)
+VISUAL_LABELS = r"(?:Visual|Visuals|Description|Hình ảnh|Mô tả)"
+
+VALID_SCENE = re.compile(r"\[Scene (\d+): ([^\]\n]+)\]\nNarration: (.+?)\s*(?=\n\[Scene \d+:|\Z)", re.DOTALL)
+MARKDOWN = re.compile(r"\*\*|__|^#+\s|^\s*[-*]\s+(?=\[|Narration:)", re.MULTILINE)
+
+_EMPHASIS = re.compile(r"(\*\*|__)(.+?)\1", re.DOTALL)
+_SINGLE_EMPHASIS = re.compile(r"(?<![\w*])\*(?!\s)([^*\n]+?)(?<!\s)\*(?![\w*])")
+_LINE_PREFIX = re.compile(r"^[ \t]*(?:#+|[-*•]|>)[ \t]+", re.MULTILINE)
+_LABEL = re.compile(rf"(?<!\w){NARRATION_LABELS}\s*(?:\([^)\n]*\))?\s*:", re.IGNORECASE)
+_BRACKET_HEADER = re.compile(rf"\[\s*{SCENE_WORDS}\s*(\d+)\s*(?:[:.\-–—]\s*)?", re.IGNORECASE)
+_BARE_HEADER = re.compile(
+    rf"^[ \t]*{SCENE_WORDS}\s*(\d+)\s*[:.\-–—]?[ \t]*(.*?)[ \t]*(?=Narration:|$)",
+    re.IGNORECASE | re.MULTILINE
+)
+_VISUAL_LINE = re.compile(rf"\[Scene (\d+): \]\s*{VISUAL_LABELS}\s*:\s*([^\n]+?)\s*(?=Narration:|\n|$)", re.IGNORECASE)
+_SCENE_NUMBER = re.compile(r"\[Scene \d+: ")
+
+
+def validate(script: str) -> list[str]:
+    """
+    Check a script against the ``[Scene X: ...]\\nNarration: ...`` format in one pass.
+
+    Anything ``repair`` would rewrite (markdown, stray labels, unbracketed
+    headers) is reported, so a script is only ``valid`` when it needs no repair.
+
+    Returns:
+        list: Human readable problems; empty when the script is valid.
+    """
+    text = script.strip()
+    issues = []
+    position = 0
+    expected = 1
+    for match in VALID_SCENE.finditer(text):
+        if text[position:match.start()].strip():
+            issues.append(f"unexpected text before scene {expected}")
+        index, description, narration = match.groups()
+        if int(index) != expected:
+            issues.append(f"scene {index} should be numbered {expected}")
+        if not description.strip():
+            issues.append(f"scene {expected} has no visual description")
+        if not narration.strip():
+            issues.append(f"scene {expected} has no narration")
+        # Any narration label ("Narration:", "Speaker:", ...) past the leading one would be rewritten by repair
+        if _LABEL.search(description) or _LABEL.search(narration) or "[" in narration:
+            issues.append(f"scene {expected} contains a stray label or bracket")
+        position = match.end()
+        expected += 1
+
+    if expected == 1:
+        return ["no [Scene X: ...] Narration: blocks found"]
+    if text[position:].strip():
+        issues.append("unexpected text after the last scene")
+    if _BARE_HEADER.search(text):
+        issues.append("scene header without brackets")
+    if any(pattern.search(text) for pattern in (MARKDOWN, _SINGLE_EMPHASIS, _LINE_PREFIX)):
+        issues.append("markdown formatting")
+    return issues
+
+
+def repair(script: str) -> tuple[str, list[str]]:
+    """
+    Apply rule-based rewrites for the usual deviations from the format.
+
+    Returns:
+        tuple: The rewritten script and the names of the rules that changed it.
+    """
+    applied = []
+
+    def rewrite(name, pattern, replacement, text):
+        new_text = pattern.sub(replacement, text)
+        if new_text != text:
+            applied.append(name)
+        return new_text
+
+    text = script.replace("\r\n", "\n").strip()
+    text = rewrite("markdown", _EMPHASIS, r"\2", text)
+    text = rewrite("markdown", _SINGLE_EMPHASIS, r"\1", text)
+    text = rewrite("markdown", _LINE_PREFIX, "", text)
+    text = rewrite("narration_label", _LABEL, "Narration:", text)
+    text = rewrite("scene_header", _BRACKET_HEADER, lambda m: f"[Scene {m.group(1)}: ", text)
+    text = rewrite("scene_header", _BARE_HEADER, lambda m: f"[Scene {m.group(1)}: {m.group(2)}]\n", text)
+    # "[Scene 1]" becomes "[Scene 1: ]"; take the description from a "Visual:" label
+    text = rewrite("visual_label", _VISUAL_LINE, lambda m: f"[Scene {m.group(1)}: {m.group(2)}]\n", text)
+
+    # A one-line lead-in such as "Here is your script:"
+    first = _SCENE_NUMBER.search(text)
+    if first and text[:first.start()].strip() and "\n" not in text[:first.start()].strip():
+        text = text[first.start():]
+        applied.append("preamble")
+
+    numbers = iter(range(1, len(_SCENE_NUMBER.findall(text)) + 1))
+    text = rewrite("numbering", _SCENE_NUMBER, lambda m: f"[Scene {next(numbers)}: ", text)
+
+    layout = re.sub(r"\]\s*Narration:\s*", "]\nNarration: ", text)
+    layout = re.sub(r"\s*(\[Scene \d+: )", r"\n\n\1", layout).strip()
+    layout = re.sub(r"[ \t]+\n", "\n", layout)
+    if layout != text:
+        applied.append("layout")
+
+    return layout, list(dict.fromkeys(applied))
+
+
+def check_and_repair(script: str) -> tuple[str, str, list[str]]:
+    """
+    Validate ``script`` and repair it locally when possible.
+
+    Returns:
+        tuple: (script, path, repairs) where path is ``valid`` (unchanged),
+        ``repaired`` (rule-based fixes applied) or ``invalid`` (the original
+        script, which still needs a model to reformat it).
+    """
+    if not validate(script):
+        return script.strip(), "valid", []
+    repaired, repairs = repair(script)
+    if not validate(repaired):
+        return repaired, "repaired", repairs
+    return script, "invalid", []
@@ -0,0 +1,211 @@
+import os
+import uuid
+import logging
+import threading
+import requests
+from datetime import datetime, timedelta
+from googleapiclient.errors import HttpError
+from app.tiktok.service import TIKTOK_API_BASE
+from app.upload_youtube.service import youtube_client
+from app.social_video.service import (
+    save_or_update_social_video,
+    track_publish,
+    touch_publish_tracker,
+    claim_due_publishes,
+    update_publish,
+    next_publish_check
+)
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_POLL_MIN_INTERVAL = float(os.getenv("PUBLISH_POLL_MIN_INTERVAL", "5"))  # Seconds
+PUBLISH_POLL_MAX_INTERVAL = float(os.getenv("PUBLISH_POLL_MAX_INTERVAL", "120"))
+PUBLISH_POLL_BACKOFF = 1.5  # Interval growth while the provider status does not change
+PUBLISH_POLL_MAX_AGE = int(os.getenv("PUBLISH_POLL_MAX_AGE", str(6 * 3600)))  # Give up after this many seconds
+CLAIM_LEASE_SECONDS = 60
+# A worker whose heartbeat is older than this is gone; its TikTok publishes can be claimed by others
+PUBLISH_TRACKER_STALE_SECONDS = float(os.getenv("PUBLISH_TRACKER_STALE_SECONDS", str(3 * PUBLISH_POLL_MAX_INTERVAL)))
+YOUTUBE_BATCH_SIZE = 50  # videos.list accepts up to 50 ids
+
+TIKTOK_FINAL = {"PUBLISH_COMPLETE": "published", "SEND_TO_USER_INBOX": "published", "FAILED": "failed"}
+
+
+class PublishStatusPoller:
+    """
+    Background thread tracking TikTok publish_ids and YouTube video ids until
+    the provider finishes processing them.
+
+    Each publish is re-checked on its own adaptive interval: it starts at
+    PUBLISH_POLL_MIN_INTERVAL, grows while the provider status stays the same
+    and resets when it changes. YouTube ids due at the same time are checked
+    with one videos.list call. Final states are written to social_videos via
+    save_or_update_social_video; clients read the social_publishes collection.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.tracker_id = uuid.uuid4().hex
+        self._tiktok_tokens = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def track_tiktok(self, publish_id: str, access_token: str, video_id: str = None):
+        with self._lock:
+            self._tiktok_tokens[publish_id] = access_token
+        touch_publish_tracker(self.tracker_id)
+        track_publish("tiktok", publish_id, video_id, self.tracker_id, PUBLISH_POLL_MIN_INTERVAL)
+        self.ensure_running()
+        self._wake.set()
+
+    def track_youtube(self, youtube_video_id: str, video_id: str = None):
+        track_publish("youtube", youtube_video_id, video_id, self.tracker_id, PUBLISH_POLL_MIN_INTERVAL)
+        self.ensure_running()
+        self._wake.set()
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="publish-status-poller", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            # Cleared before claiming, so a publish tracked during this pass wakes the next wait
+            self._wake.clear()
+            try:
+                touch_publish_tracker(self.tracker_id)
+                self.poll_once()
+                next_check = next_publish_check(self.tracker_id, PUBLISH_TRACKER_STALE_SECONDS)
+            except Exception as e:
+                logger.error(f"Publish status poll failed: {e}")
+                next_check = None
+            if next_check is None:
+                timeout = PUBLISH_POLL_MAX_INTERVAL
+            else:
+                timeout = min(max((next_check - datetime.utcnow()).total_seconds(), 1.0), PUBLISH_POLL_MAX_INTERVAL)
+            self._wake.wait(timeout)
+
+    def poll_once(self):
+        due = claim_due_publishes(self.tracker_id, CLAIM_LEASE_SECONDS, PUBLISH_TRACKER_STALE_SECONDS)
+        youtube = [doc for doc in due if doc["platform"] == "youtube"]
+        for doc in due:
+            if doc["platform"] == "tiktok":
+                self._poll_tiktok(doc)
+        for i in range(0, len(youtube), YOUTUBE_BATCH_SIZE):
+            self._poll_youtube(youtube[i:i + YOUTUBE_BATCH_SIZE])
+
+    def _poll_tiktok(self, doc: dict):
+        publish_id = doc["external_id"]
+        with self._lock:
+            access_token = self._tiktok_tokens.get(publish_id)
+        if not access_token:
+            # Either the worker that uploaded it restarted or it belongs to a dead worker
+            self._finish(doc, "untracked", doc.get("provider_status"), None, "Access token no longer available")
+            return
+        try:
+            res = requests.post(
+                f"{TIKTOK_API_BASE}/v2/post/publish/status/fetch/",
+                headers={"Authorization": f"Bearer {access_token}", "Content-Type": "application/json; charset=UTF-8"},
+                json={"publish_id": publish_id},
+                timeout=15
+            )
+            res.raise_for_status()
+            data = res.json().get("data", {})
+        except Exception as e:
+            logger.warning(f"TikTok status fetch failed for {publish_id}: {e}")
+            self._reschedule(doc, doc.get("provider_status"))
+            return
+
+        provider_status = data.get("status")
+        status = TIKTOK_FINAL.get(provider_status)
+        if not status:
+            self._reschedule(doc, provider_status)
+            return
+
+        post_ids = data.get("publicaly_available_post_id") or []
+        link = f"https://www.tiktok.com/video/{post_ids[0]}" if post_ids else None
+        self._finish(doc, status, provider_status, link, data.get("fail_reason"))
+        with self._lock:
+            self._tiktok_tokens.pop(publish_id, None)
+
+    def _poll_youtube(self, docs: list):
+        ids = [doc["external_id"] for doc in docs]
+        try:
+            with youtube_client() as youtube:
+                response = youtube.videos().list(
+                    part="status,processingDetails",
+                    id=",".join(ids),
+                    maxResults=len(ids)
+                ).execute()
+        except HttpError as e:
+            if e.resp.status == 403:
+                # Credentials authorized before youtube.readonly was added cannot read the status
+                logger.warning(f"YouTube status fetch not permitted, re-authorize with youtube.readonly: {e}")
+                for doc in docs:
+                    self._finish(doc, "uploaded", "insufficientPermissions",
+                                 f"https://www.youtube.com/watch?v={doc['external_id']}",
+                                 "Credentials cannot read video status; re-authorize with the youtube.readonly scope")
+                return
+            logger.warning(f"YouTube status fetch failed for {len(ids)} videos: {e}")
+            for doc in docs:
+                self._reschedule(doc, doc.get("provider_status"))
+            return
+        except Exception as e:
+            logger.warning(f"YouTube status fetch failed for {len(ids)} videos: {e}")
+            for doc in docs:
+                self._reschedule(doc, doc.get("provider_status"))
+            return
+
+        items = {item["id"]: item for item in response.get("items", [])}
+        for doc in docs:
+            item = items.get(doc["external_id"])
+            if not item:
+                self._finish(doc, "failed", "notFound", None, "Video not found on YouTube")
+                continue
+            upload_status = item.get("status", {}).get("uploadStatus")
+            processing_status = item.get("processingDetails", {}).get("processingStatus")
+            provider_status = f"{upload_status}/{processing_status}"
+            if upload_status in ("failed", "rejected", "deleted") or processing_status in ("failed", "terminated"):
+                reason = item.get("status", {}).get("failureReason") or item.get("status", {}).get("rejectionReason")
+                self._finish(doc, "failed", provider_status, None, reason)
+            elif upload_status == "processed" or processing_status == "succeeded":
+                self._finish(doc, "published", provider_status, f"https://www.youtube.com/watch?v={doc['external_id']}")
+            else:
+                self._reschedule(doc, provider_status)
+
+    def _reschedule(self, doc: dict, provider_status):
+        now = datetime.utcnow()
+        if now - doc["created_at"] > timedelta(seconds=PUBLISH_POLL_MAX_AGE):
+            self._finish(doc, "timeout", provider_status, None, "Provider did not finish processing in time")
+            return
+        if provider_status and provider_status != doc.get("provider_status"):
+            interval = PUBLISH_POLL_MIN_INTERVAL
+        else:
+            interval = min(doc.get("interval", PUBLISH_POLL_MIN_INTERVAL) * PUBLISH_POLL_BACKOFF, PUBLISH_POLL_MAX_INTERVAL)
+        update_publish(
+            doc["platform"], doc["external_id"],
+            status="processing",
+            provider_status=provider_status,
+            interval=interval,
+            next_check_at=now + timedelta(seconds=interval)
+        )
+
+    def _finish(self, doc: dict, status: str, provider_status, link, error=None):
+        update_publish(
+            doc["platform"], doc["external_id"],
+            status=status,
+            provider_status=provider_status,
+            link=link,
+            error=error,
+            finished_at=datetime.utcnow()
+        )
+        if status in ("published", "uploaded") and doc.get("video_id"):
+            save_or_update_social_video(doc["video_id"], doc["platform"], link)
+        logger.info(f"{doc['platform']} publish {doc['external_id']} finished: {status} ({provider_status})")
@@ -0,0 +1,148 @@
+import os
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from app.my_video.repo import find_video
+from app.tiktok.uploader import VideoSource, plan_chunks, init_upload, upload_chunks
+from app.upload_youtube.service import download_file, youtube_client, upload_video_file, set_thumbnail
+from app.social_video.poller import PublishStatusPoller
+from app.social_video.service import (
+    save_or_update_social_video,
+    insert_publish_job,
+    update_publish_job,
+    set_publish_job_result,
+    get_publish_job
+)
+
+logger = logging.getLogger(__name__)
+
+SOCIAL_PUBLISH_WORKERS = int(os.getenv("SOCIAL_PUBLISH_WORKERS", "2"))
+SUPPORTED_PLATFORMS = ("youtube", "tiktok")
+
+
+class PublishFanout:
+    """
+    Publish one video to several platforms.
+
+    The source is downloaded once to a local file and every platform uploads
+    from that file in parallel. Each platform's outcome is stored in the
+    social_publish_jobs document; links are saved with
+    save_or_update_social_video (TikTok's once the status poller sees the
+    post published).
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.jobs = ThreadPoolExecutor(max_workers=SOCIAL_PUBLISH_WORKERS, thread_name_prefix="social-publish")
+        self.uploads = ThreadPoolExecutor(max_workers=SOCIAL_PUBLISH_WORKERS * len(SUPPORTED_PLATFORMS),
+                                          thread_name_prefix="social-upload")
+
+    def submit(self, video_id: str, owner_id: str, platforms: list, options: dict) -> Optional[str]:
+        """
+        Queue a publish of a video from the videos collection.
+
+        Args:
+            video_id: video_id (or _id) of the video
+            owner_id: User publishing the video; must own it
+            platforms: Subset of SUPPORTED_PLATFORMS
+            options: title, description, thumbnail_url, tiktok_access_token
+
+        Returns:
+            The job_id, or None if the video does not exist or belongs to someone else.
+
+        Raises:
+            ValueError: on unknown platforms, a video without a stored file or a missing TikTok token.
+        """
+        platforms = list(dict.fromkeys(platforms))
+        unknown = [platform for platform in platforms if platform not in SUPPORTED_PLATFORMS]
+        if not platforms or unknown:
+            raise ValueError(f"platforms must be a non-empty subset of {list(SUPPORTED_PLATFORMS)}")
+        if "tiktok" in platforms and not options.get("tiktok_access_token"):
+            raise ValueError("tiktok_access_token is required to publish to TikTok")
+        video = find_video(video_id)
+        if not video or video.get("owner_id") != owner_id:
+            return None
+        # Uploaded videos store video_path, rendered ones (video/repo.py) video_url
+        video_url = video.get("video_path") or video.get("video_url")
+        if not video_url:
+            raise ValueError("Video has no stored file to publish")
+
+        options = {
+            **options,
+            "title": options.get("title") or video.get("title") or "Untitled",
+            "description": options.get("description") or "",
+            "thumbnail_url": options.get("thumbnail_url") or video.get("thumbnail"),
+        }
+        job_id = str(uuid.uuid4())
+        insert_publish_job(job_id, video_id, owner_id, platforms)
+        self.jobs.submit(self._run, job_id, video_id, video_url, platforms, options)
+        logger.info(f"Queued publish job {job_id} for {video_id} to {platforms}")
+        return job_id
+
+    def get_job(self, job_id: str, owner_id: str):
+        return get_publish_job(job_id, owner_id)
+
+    def _run(self, job_id: str, video_id: str, video_url: str, platforms: list, options: dict):
+        video_path = None
+        try:
+            update_publish_job(job_id, status="downloading")
+            video_path = download_file(video_url, suffix=".mp4")
+            update_publish_job(job_id, status="uploading")
+
+            targets = {"youtube": self._publish_youtube, "tiktok": self._publish_tiktok}
+            futures = {
+                platform: self.uploads.submit(targets[platform], video_id, video_path, options)
+                for platform in platforms
+            }
+            succeeded = 0
+            for platform, future in futures.items():
+                try:
+                    result = {"status": "uploaded", **future.result()}
+                    succeeded += 1
+                except Exception as e:
+                    logger.error(f"Publish job {job_id} failed on {platform}: {str(e)}")
+                    result = {"status": "failed", "error": str(e)}
+                set_publish_job_result(job_id, platform, result)
+
+            status = "completed" if succeeded == len(platforms) else "partial" if succeeded else "failed"
+            update_publish_job(job_id, status=status)
+            logger.info(f"Publish job {job_id} {status}")
+        except Exception as e:
+            logger.error(f"Publish job {job_id} failed: {str(e)}")
+            update_publish_job(job_id, status="failed", error=str(e))
+        finally:
+            if video_path and os.path.exists(video_path):
+                os.unlink(video_path)
+
+    def _publish_youtube(self, video_id: str, video_path: str, options: dict) -> dict:
+        thumbnail_path = None
+        try:
+            with youtube_client() as youtube:
+                youtube_id = upload_video_file(youtube, video_path, options["title"], options["description"])
+                if options.get("thumbnail_url"):
+                    thumbnail_path = download_file(options["thumbnail_url"], suffix=".jpg")
+                    set_thumbnail(youtube, youtube_id, thumbnail_path)
+        finally:
+            if thumbnail_path and os.path.exists(thumbnail_path):
+                os.unlink(thumbnail_path)
+
+        link = f"https://www.youtube.com/watch?v={youtube_id}"
+        save_or_update_social_video(video_id, "youtube", link)
+        PublishStatusPoller().track_youtube(youtube_id, video_id)
+        return {"external_id": youtube_id, "link": link}
+
+    def _publish_tiktok(self, video_id: str, video_path: str, options: dict) -> dict:
+        access_token = options["tiktok_access_token"]
+        source = VideoSource.from_file(video_path)
+        chunk_size, total_chunks = plan_chunks(source.size)
+        publish_id, upload_url = init_upload(access_token, options["title"], source.size, chunk_size, total_chunks)
+        upload_chunks(upload_url, source, chunk_size, total_chunks)
+        PublishStatusPoller().track_tiktok(publish_id, access_token, video_id)
+        return {"external_id": publish_id, "link": None}
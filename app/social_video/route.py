@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
-from .service import save_or_update_social_video, get_all_social_videos
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from .service import save_or_update_social_video, get_all_social_videos, get_publish, get_publishes_by_video
+from .poller import PublishStatusPoller
+from .publish import PublishFanout
 
 social_video_bp = Blueprint("social_video", __name__)
 
@@ -17,4 +20,51 @@ def share_video():
 @social_video_bp.route("/all", methods=["GET"])
 def get_all():
     videos = get_all_social_videos()
-    return jsonify([v.dict() for v in videos])
\ No newline at end of file
+    return jsonify([v.dict() for v in videos])
+
+@social_video_bp.route("/status/<string:platform>/<string:external_id>", methods=["GET"])
+def get_publish_status(platform, external_id):
+    # Đọc trạng thái từ Mongo, không gọi TikTok/YouTube
+    PublishStatusPoller().ensure_running()
+    publish = get_publish(platform, external_id)
+    if not publish:
+        return jsonify({"error": "Publish not found"}), 404
+    return jsonify(publish)
+
+@social_video_bp.route("/status", methods=["GET"])
+def get_video_publish_status():
+    video_id = request.args.get("video_id")
+    if not video_id:
+        return jsonify({"error": "Missing video_id"}), 400
+    PublishStatusPoller().ensure_running()
+    return jsonify(get_publishes_by_video(video_id))
+
+@social_video_bp.route("/publish", methods=["POST"])
+@jwt_required()
+def publish_video():
+    # Tải video một lần rồi upload song song lên các nền tảng (chạy ở nền)
+    data = request.json or {}
+    video_id = data.get("video_id")
+    platforms = data.get("platforms") or []
+    if not video_id or not isinstance(platforms, list):
+        return jsonify({"error": "Missing params"}), 400
+    try:
+        job_id = PublishFanout().submit(video_id, get_jwt_identity(), platforms, {
+            "title": data.get("title"),
+            "description": data.get("description"),
+            "thumbnail_url": data.get("thumbnail_url"),
+            "tiktok_access_token": data.get("tiktok_access_token"),
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not job_id:
+        return jsonify({"error": "Video not found"}), 404
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+@social_video_bp.route("/publish/<string:job_id>", methods=["GET"])
+@jwt_required()
+def get_publish_job_status(job_id):
+    job = PublishFanout().get_job(job_id, get_jwt_identity())
+    if not job:
+        return jsonify({"error": "Publish job not found"}), 404
+    return jsonify(job)
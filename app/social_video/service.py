@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
 from app.extentions import mongo
 from .dto import SocialVideoDTO
 
@@ -19,4 +21,111 @@ def save_or_update_social_video(video_id: str, platform: str, link: str):
 
 def get_all_social_videos():
     docs = list(mongo.db.social_videos.find())
-    return [SocialVideoDTO(**doc) for doc in docs]
\ No newline at end of file
+    return [SocialVideoDTO(**doc) for doc in docs]
+
+# Trạng thái publish đang chờ xử lý trên TikTok/YouTube (collection social_publishes)
+def track_publish(platform: str, external_id: str, video_id: str = None, tracker: str = None, interval: float = 5.0):
+    now = datetime.utcnow()
+    mongo.db.social_publishes.update_one(
+        {"platform": platform, "external_id": external_id},
+        {
+            "$set": {
+                "video_id": video_id,
+                "tracker": tracker,
+                "status": "pending",
+                "provider_status": None,
+                "error": None,
+                "link": None,
+                "interval": interval,
+                "next_check_at": now,
+                "updated_at": now
+            },
+            "$setOnInsert": {"created_at": now}
+        },
+        upsert=True
+    )
+
+def touch_publish_tracker(tracker: str):
+    """Ghi nhận worker (tracker) vẫn còn sống."""
+    mongo.db.social_publish_trackers.update_one(
+        {"tracker": tracker},
+        {"$set": {"seen_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+def _claimable_by(tracker: str, stale_seconds: float) -> dict:
+    # Token TikTok chỉ nằm trong bộ nhớ của worker đã nhận upload; publish của
+    # worker đã chết (không còn heartbeat) thì worker nào cũng nhận để đóng lại
+    alive = mongo.db.social_publish_trackers.distinct(
+        "tracker",
+        {"seen_at": {"$gte": datetime.utcnow() - timedelta(seconds=stale_seconds)}}
+    )
+    return {"$or": [{"platform": "youtube"}, {"tracker": tracker}, {"tracker": {"$nin": alive}}]}
+
+def claim_due_publishes(tracker: str, lease_seconds: float, stale_seconds: float, limit: int = 50) -> list:
+    """Lấy các publish đến hạn kiểm tra, giữ chỗ bằng cách đẩy next_check_at (an toàn khi nhiều worker)."""
+    now = datetime.utcnow()
+    claimed = []
+    query = {
+        "status": {"$in": ["pending", "processing"]},
+        "next_check_at": {"$lte": now},
+        **_claimable_by(tracker, stale_seconds)
+    }
+    while len(claimed) < limit:
+        doc = mongo.db.social_publishes.find_one_and_update(
+            query,
+            {"$set": {"next_check_at": now + timedelta(seconds=lease_seconds)}},
+            sort=[("next_check_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            break
+        claimed.append(doc)
+    return claimed
+
+def update_publish(platform: str, external_id: str, **fields):
+    fields["updated_at"] = datetime.utcnow()
+    mongo.db.social_publishes.update_one({"platform": platform, "external_id": external_id}, {"$set": fields})
+
+def next_publish_check(tracker: str, stale_seconds: float):
+    """Thời điểm kiểm tra gần nhất tiếp theo mà worker này nhận được, hoặc None nếu không còn publish nào."""
+    doc = mongo.db.social_publishes.find_one(
+        {"status": {"$in": ["pending", "processing"]}, **_claimable_by(tracker, stale_seconds)},
+        {"next_check_at": 1},
+        sort=[("next_check_at", 1)]
+    )
+    return doc["next_check_at"] if doc else None
+
+def get_publish(platform: str, external_id: str):
+    return mongo.db.social_publishes.find_one({"platform": platform, "external_id": external_id}, {"_id": 0, "tracker": 0})
+
+def get_publishes_by_video(video_id: str) -> list:
+    return list(mongo.db.social_publishes.find({"video_id": video_id}, {"_id": 0, "tracker": 0}))
+
+# Job đăng một video lên nhiều nền tảng (collection social_publish_jobs)
+def insert_publish_job(job_id: str, video_id: str, owner_id: str, platforms: list):
+    now = datetime.utcnow()
+    mongo.db.social_publish_jobs.insert_one({
+        "job_id": job_id,
+        "video_id": video_id,
+        "owner_id": owner_id,
+        "platforms": platforms,
+        "status": "queued",
+        "results": {platform: {"status": "queued"} for platform in platforms},
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    })
+
+def update_publish_job(job_id: str, **fields):
+    fields["updated_at"] = datetime.utcnow()
+    mongo.db.social_publish_jobs.update_one({"job_id": job_id}, {"$set": fields})
+
+def set_publish_job_result(job_id: str, platform: str, result: dict):
+    mongo.db.social_publish_jobs.update_one(
+        {"job_id": job_id},
+        {"$set": {f"results.{platform}": result, "updated_at": datetime.utcnow()}}
+    )
+
+def get_publish_job(job_id: str, owner_id: str):
+    return mongo.db.social_publish_jobs.find_one({"job_id": job_id, "owner_id": owner_id}, {"_id": 0})
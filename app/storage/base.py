@@ -0,0 +1,50 @@
+from typing import BinaryIO, Optional
+
+
+class StorageBackend:
+    """
+    Interface every storage driver implements.
+
+    Objects are addressed by a ``key`` (e.g. ``video_creator/images/<id>``) and a
+    ``resource_type`` ("image", "video" or "raw"); audio is stored as "video",
+    like Cloudinary does. The put methods return a dict with at least ``url``,
+    ``key`` and ``bytes``, plus ``duration`` (seconds) for audio and video when
+    the driver can tell.
+
+    ``put_stream`` must read the stream in bounded parts so memory use does not
+    depend on the size of the object.
+
+    ``sign_upload`` lets a client send an object straight to the backend; the
+    returned dict has ``method``, ``url``, ``fields`` (form fields for POST),
+    ``headers`` and ``expires_at`` (unix time). ``describe`` then confirms the
+    upload and returns the same dict as the put methods.
+    """
+
+    def put_stream(self, stream: BinaryIO, key: str, resource_type: str = "image",
+                   content_type: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+    def put_bytes(self, data: bytes, key: str, resource_type: str = "image",
+                  content_type: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+    def url_for(self, key: str, resource_type: str = "image") -> str:
+        raise NotImplementedError
+
+    def delete(self, key: str, resource_type: str = "image") -> bool:
+        raise NotImplementedError
+
+    def exists(self, key: str, resource_type: str = "image") -> bool:
+        raise NotImplementedError
+
+    def sign_upload(self, key: str, resource_type: str = "image", content_type: Optional[str] = None,
+                    expires_in: int = 900) -> dict:
+        raise NotImplementedError
+
+    def retries_parts(self, resource_type: str = "image") -> bool:
+        """Whether ``put_stream`` already retries each part on its own (callers should not retry it again)."""
+        return False
+
+    def describe(self, key: str, resource_type: str = "image") -> Optional[dict]:
+        """Return url/key/bytes/duration of a stored object, or None if it does not exist."""
+        raise NotImplementedError
@@ -0,0 +1,135 @@
+import os
+import time
+import random
+import logging
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+import cloudinary.utils
+from cloudinary.exceptions import NotFound
+from typing import BinaryIO, Optional
+from app.storage.base import StorageBackend
+from app.storage.errors import is_transient
+
+logger = logging.getLogger(__name__)
+
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(20 * 1024 * 1024)))  # Cloudinary minimum is 5 MB
+STORAGE_PART_RETRIES = int(os.getenv("STORAGE_PART_RETRIES", "3"))
+STORAGE_RETRY_DELAY = 1  # Seconds, doubled on every retry
+CLOUDINARY_SIGNATURE_MAX_AGE = 3600  # Cloudinary rejects signatures with an older timestamp
+
+
+class CloudinaryStorage(StorageBackend):
+    """Storage driver backed by Cloudinary. The key is used as the public_id."""
+
+    def __init__(self):
+        if os.getenv("CLOUDINARY_CLOUD_NAME"):
+            cloudinary.config(
+                cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+                api_key=os.getenv("CLOUDINARY_API_KEY"),
+                api_secret=os.getenv("CLOUDINARY_API_SECRET")
+            )
+        cloudinary.config(secure=True)
+
+    def _upload(self, file, key: str, resource_type: str) -> dict:
+        result = cloudinary.uploader.upload(file, public_id=key, resource_type=resource_type)
+        return self._result(result, key)
+
+    def _result(self, result: dict, key: str) -> dict:
+        return {
+            "url": result["secure_url"],
+            "key": result.get("public_id", key),
+            "bytes": result.get("bytes", 0),
+            "duration": result.get("duration"),
+        }
+
+    def _upload_chunked(self, stream: BinaryIO, key: str, resource_type: str) -> dict:
+        """
+        Upload a stream in fixed-size parts using Cloudinary's chunked upload API.
+
+        Only the part being sent and the one read ahead (to know which part is
+        the last) are held in memory, so memory use does not depend on the file
+        size. Each part is retried on its own.
+        """
+        upload_id = cloudinary.utils.random_public_id()
+        options = {"public_id": key, "resource_type": resource_type}
+        offset = 0
+        result = None
+        chunk = stream.read(STORAGE_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("Cannot upload an empty stream")
+
+        while chunk:
+            next_chunk = stream.read(STORAGE_CHUNK_SIZE)
+            end = offset + len(chunk) - 1
+            total = end + 1 if not next_chunk else -1
+            headers = {"Content-Range": f"bytes {offset}-{end}/{total}", "X-Unique-Upload-Id": upload_id}
+
+            retries = 0
+            while True:
+                try:
+                    result = cloudinary.uploader.upload_large_part((key, chunk), http_headers=headers, **options)
+                    break
+                except Exception as e:
+                    retries += 1
+                    if retries > STORAGE_PART_RETRIES or not is_transient(e):
+                        raise
+                    delay = STORAGE_RETRY_DELAY * (2 ** (retries - 1)) + random.uniform(0, 0.1)
+                    logger.warning(f"Part {offset}-{end} of {key} failed ({e}), retry {retries}/{STORAGE_PART_RETRIES} after {delay:.2f}s")
+                    time.sleep(delay)
+
+            offset = end + 1
+            chunk = next_chunk
+
+        return self._result(result, key)
+
+    def put_stream(self, stream: BinaryIO, key: str, resource_type: str = "image",
+                   content_type: Optional[str] = None) -> dict:
+        if resource_type == "video":
+            return self._upload_chunked(stream, key, resource_type)
+        return self._upload(stream, key, resource_type)
+
+    def put_bytes(self, data: bytes, key: str, resource_type: str = "image",
+                  content_type: Optional[str] = None) -> dict:
+        return self._upload(data, key, resource_type)
+
+    def retries_parts(self, resource_type: str = "image") -> bool:
+        return resource_type == "video"
+
+    def url_for(self, key: str, resource_type: str = "image") -> str:
+        url, _ = cloudinary.utils.cloudinary_url(key, resource_type=resource_type, secure=True)
+        return url
+
+    def delete(self, key: str, resource_type: str = "image") -> bool:
+        result = cloudinary.uploader.destroy(key, resource_type=resource_type)
+        return result.get("result") == "ok"
+
+    def exists(self, key: str, resource_type: str = "image") -> bool:
+        return self.describe(key, resource_type) is not None
+
+    def sign_upload(self, key: str, resource_type: str = "image", content_type: Optional[str] = None,
+                    expires_in: int = 900) -> dict:
+        """
+        Signed parameters for a direct (browser to Cloudinary) upload of ``key``.
+
+        The signature only covers this public_id, so the client cannot write
+        anywhere else. Cloudinary itself caps the signature age at one hour.
+        """
+        config = cloudinary.config()
+        timestamp = int(time.time())
+        params = {"public_id": key, "timestamp": timestamp}
+        signature = cloudinary.utils.api_sign_request(params, config.api_secret)
+        return {
+            "method": "POST",
+            "url": cloudinary.utils.cloudinary_api_url("upload", resource_type=resource_type),
+            "fields": {**params, "api_key": config.api_key, "signature": signature},
+            "headers": {},
+            "expires_at": timestamp + min(expires_in, CLOUDINARY_SIGNATURE_MAX_AGE),
+        }
+
+    def describe(self, key: str, resource_type: str = "image") -> Optional[dict]:
+        try:
+            result = cloudinary.api.resource(key, resource_type=resource_type)
+        except NotFound:
+            return None
+        return self._result(result, key)
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+from typing import BinaryIO, Optional, Union
+from app.storage.base import StorageBackend
+from app.storage.repo import acquire_media_hash, claim_media_hash, release_media_url
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingReader:
+    """File-like wrapper that feeds everything read through it into a SHA-256."""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._sha256.update(data)
+        return data
+
+    def seekable(self) -> bool:
+        return False
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def _stored(media: dict) -> dict:
+    return {
+        "url": media["url"],
+        "key": media["key"],
+        "bytes": media.get("bytes", 0),
+        "duration": media.get("duration"),
+        "sha256": media["sha256"],
+        "deduplicated": True,
+    }
+
+
+def put_deduplicated(storage: StorageBackend, data: Union[bytes, BinaryIO], key: str,
+                     resource_type: str = "image", content_type: Optional[str] = None) -> dict:
+    """
+    Store ``data`` unless identical content is already stored.
+
+    Bytes and seekable streams are hashed before the transfer, so duplicates
+    are never uploaded. Other streams are hashed while they upload; if the
+    content turns out to exist already, the new copy is deleted. Either way
+    the returned dict (same as the put methods, plus ``sha256`` and
+    ``deduplicated``) points at the single stored copy, whose reference count
+    is incremented. Give each reference back with ``release``.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        digest = hashlib.sha256(data).hexdigest()
+    elif data.seekable():
+        data.seek(0)
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+        data.seek(0)
+        digest = sha256.hexdigest()
+    else:
+        digest = None
+
+    if digest:
+        existing = acquire_media_hash(digest, resource_type)
+        if existing:
+            logger.info(f"Skipped upload of {key}: same content as {existing['key']}")
+            return _stored(existing)
+        if isinstance(data, (bytes, bytearray)):
+            result = storage.put_bytes(data, key, resource_type, content_type)
+        else:
+            result = storage.put_stream(data, key, resource_type, content_type)
+    else:
+        reader = HashingReader(data)
+        result = storage.put_stream(reader, key, resource_type, content_type)
+        digest = reader.hexdigest()
+
+    existing = claim_media_hash(digest, resource_type, result["key"], result["url"],
+                                result.get("bytes", 0), result.get("duration"))
+    if existing:
+        # Identical content was registered while this copy was uploading
+        logger.info(f"Discarding duplicate upload {key}: same content as {existing['key']}")
+        storage.delete(result["key"], resource_type)
+        return _stored(existing)
+
+    return {**result, "sha256": digest, "deduplicated": False}
+
+
+def register_unhashed(result: dict, resource_type: str) -> dict:
+    """
+    Take the first reference on an object stored without passing through us
+    (e.g. a direct upload), so ``release`` deletes it like any other upload.
+
+    Its content was never read, so it is registered under a per-key
+    placeholder instead of a SHA-256 and never matches other uploads.
+    """
+    digest = f"unhashed:{result['key']}"
+    existing = claim_media_hash(digest, resource_type, result["key"], result["url"],
+                                result.get("bytes", 0), result.get("duration"))
+    return _stored(existing) if existing else {**result, "sha256": digest, "deduplicated": False}
+
+
+def release(storage: StorageBackend, url: Optional[str]) -> bool:
+    """
+    Give back one reference to stored content; the object is deleted from
+    storage when nothing refers to it any more.
+
+    Returns:
+        bool: True if the object was deleted.
+    """
+    if not url:
+        return False
+    media = release_media_url(url)
+    if not media:
+        return False
+    storage.delete(media["key"], media["resource_type"])
+    logger.info(f"Deleted unreferenced media {media['key']}")
+    return True
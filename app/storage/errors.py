@@ -0,0 +1,24 @@
+import re
+import requests
+import urllib3
+from cloudinary.exceptions import Error as CloudinaryError, RateLimited
+
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    urllib3.exceptions.HTTPError,
+    RateLimited,
+)
+
+# cloudinary.uploader.call_api wraps network failures, and 5xx gateway pages it
+# cannot parse as JSON, in the base Error class; only the message tells them apart
+_CLOUDINARY_TRANSIENT = re.compile(r"^(Unexpected error - |Socket error: |Error parsing server response \(5\d\d\))")
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether retrying the same request may succeed (network failure, timeout, rate limit, gateway error)."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    return type(error) is CloudinaryError and bool(_CLOUDINARY_TRANSIENT.match(str(error)))
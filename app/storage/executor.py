@@ -0,0 +1,138 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Optional
+from app.storage.service import get_storage
+from app.storage.dedup import put_deduplicated
+from app.storage.errors import is_transient
+
+logger = logging.getLogger(__name__)
+
+STORAGE_UPLOAD_WORKERS = int(os.getenv("STORAGE_UPLOAD_WORKERS", "4"))
+STORAGE_UPLOAD_RETRIES = int(os.getenv("STORAGE_UPLOAD_RETRIES", "3"))
+STORAGE_UPLOAD_BASE_DELAY = float(os.getenv("STORAGE_UPLOAD_BASE_DELAY", "1.0"))  # Seconds, doubled on every retry
+LATENCY_WINDOW = 500  # Number of recent uploads kept for latency stats
+
+
+class UploadExecutor:
+    """
+    Shared, bounded pool for storage writes.
+
+    Uploads are retried with jittered exponential backoff on transient errors
+    and return futures, so callers can keep working (e.g. call the next TTS or
+    image provider) while earlier results are being uploaded.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self._pool = ThreadPoolExecutor(max_workers=STORAGE_UPLOAD_WORKERS, thread_name_prefix="storage-upload")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run ``fn(*args, **kwargs)`` on the upload pool with retry on transient errors."""
+        return self._submit(fn, args, kwargs, STORAGE_UPLOAD_RETRIES)
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: dict, max_retries: int) -> Future:
+        with self._lock:
+            self._queued += 1
+        return self._pool.submit(self._run, fn, args, kwargs, max_retries)
+
+    def put_bytes(self, data: bytes, key: str, resource_type: str = "image",
+                  content_type: Optional[str] = None, dedupe: bool = False) -> Future:
+        """Upload bytes; with ``dedupe`` identical content already stored is reused."""
+        if dedupe:
+            return self.submit(put_deduplicated, get_storage(), data, key, resource_type, content_type)
+        return self.submit(get_storage().put_bytes, data, key, resource_type, content_type)
+
+    def put_stream(self, stream: BinaryIO, key: str, resource_type: str = "image",
+                   content_type: Optional[str] = None, dedupe: bool = False) -> Future:
+        """
+        Upload a stream.
+
+        Only seekable streams are retried as a whole (rewound first): retrying
+        a half-consumed request body would store its tail as the complete file.
+        Streams the backend already uploads in individually retried parts are
+        not retried again here.
+        """
+        storage = get_storage()
+        retryable = stream.seekable() and not storage.retries_parts(resource_type)
+
+        def upload():
+            if stream.seekable():
+                stream.seek(0)
+            if dedupe:
+                return put_deduplicated(storage, stream, key, resource_type, content_type)
+            return storage.put_stream(stream, key, resource_type, content_type)
+        return self._submit(upload, (), {}, STORAGE_UPLOAD_RETRIES if retryable else 0)
+
+    def _run(self, fn: Callable, args: tuple, kwargs: dict, max_retries: int):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        started = time.monotonic()
+        retries = 0
+        try:
+            while True:
+                try:
+                    result = fn(*args, **kwargs)
+                    break
+                except Exception as e:
+                    retries += 1
+                    if retries > max_retries or not is_transient(e):
+                        raise
+                    delay = STORAGE_UPLOAD_BASE_DELAY * (2 ** (retries - 1)) * random.uniform(0.5, 1.5)
+                    logger.warning(f"Upload failed ({e}), retry {retries}/{max_retries} after {delay:.2f}s")
+                    with self._lock:
+                        self._retries += 1
+                    time.sleep(delay)
+        except Exception:
+            with self._lock:
+                self._active -= 1
+                self._failed += 1
+            raise
+
+        with self._lock:
+            self._active -= 1
+            self._completed += 1
+            self._latencies.append(time.monotonic() - started)
+        return result
+
+    def stats(self) -> dict:
+        """Queue depth, counters and latency of recent uploads (milliseconds)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "workers": STORAGE_UPLOAD_WORKERS,
+            }
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        stats["latency_ms"] = {
+            "avg": round(sum(latencies) / len(latencies) * 1000, 1),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": round(latencies[-1] * 1000, 1),
+        } if latencies else None
+        return stats
@@ -0,0 +1,140 @@
+import os
+import json
+import uuid
+import time
+import shutil
+import logging
+import subprocess
+from io import BytesIO
+from typing import BinaryIO, Optional
+from app.storage.base import StorageBackend
+from app.storage import signing
+
+logger = logging.getLogger(__name__)
+
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+COPY_CHUNK_SIZE = 1024 * 1024
+UPLOAD_TOKEN_SALT = "local-upload"
+
+
+class LocalStorage(StorageBackend):
+    """
+    Storage driver that keeps objects on the local disk.
+
+    Files are served by the storage blueprint (``/api/storage/...``), which
+    supports HTTP Range requests. Useful for development, tests and offline
+    benchmarks of the upload paths.
+    """
+
+    def __init__(self, root: str, public_url: str):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, key: str, resource_type: str = "image") -> str:
+        path = os.path.abspath(os.path.join(self.root, resource_type, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def content_type(self, key: str, resource_type: str = "image") -> Optional[str]:
+        try:
+            with open(f"{self.path_for(key, resource_type)}.meta.json", "r", encoding="utf-8") as f:
+                return json.load(f).get("content_type")
+        except FileNotFoundError:
+            return None
+
+    def put_stream(self, stream: BinaryIO, key: str, resource_type: str = "image",
+                   content_type: Optional[str] = None) -> dict:
+        path = self.path_for(key, resource_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with open(f"{path}.meta.json", "w", encoding="utf-8") as f:
+            json.dump({"content_type": content_type}, f)
+
+        return {
+            "url": self.url_for(key, resource_type),
+            "key": key,
+            "bytes": size,
+            "duration": self._probe_duration(path) if resource_type == "video" else None,
+        }
+
+    def put_bytes(self, data: bytes, key: str, resource_type: str = "image",
+                  content_type: Optional[str] = None) -> dict:
+        return self.put_stream(BytesIO(data), key, resource_type, content_type)
+
+    def url_for(self, key: str, resource_type: str = "image") -> str:
+        return f"{self.public_url}/api/storage/{resource_type}/{key}"
+
+    def delete(self, key: str, resource_type: str = "image") -> bool:
+        path = self.path_for(key, resource_type)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        if os.path.exists(f"{path}.meta.json"):
+            os.remove(f"{path}.meta.json")
+        return True
+
+    def exists(self, key: str, resource_type: str = "image") -> bool:
+        return os.path.exists(self.path_for(key, resource_type))
+
+    def sign_upload(self, key: str, resource_type: str = "image", content_type: Optional[str] = None,
+                    expires_in: int = 900) -> dict:
+        """Signed PUT URL on the storage blueprint, mirroring Cloudinary's direct uploads."""
+        self.path_for(key, resource_type)
+        token = signing.sign({"key": key, "resource_type": resource_type, "expires_in": expires_in}, UPLOAD_TOKEN_SALT)
+        return {
+            "method": "PUT",
+            "url": f"{self.public_url}/api/storage/upload/{resource_type}/{key}?token={token}",
+            "fields": {},
+            "headers": {"Content-Type": content_type} if content_type else {},
+            "expires_at": int(time.time()) + expires_in,
+        }
+
+    def verify_upload(self, token: str, key: str, resource_type: str) -> bool:
+        """Check a token issued by ``sign_upload`` for this key and resource type."""
+        payload = signing.unsign(token, UPLOAD_TOKEN_SALT, max_age=signing.STORAGE_SIGNED_UPLOAD_TTL)
+        if not payload or payload.get("key") != key or payload.get("resource_type") != resource_type:
+            return False
+        # Honour a shorter expiry requested at signing time
+        return signing.unsign(token, UPLOAD_TOKEN_SALT, max_age=payload.get("expires_in")) is not None
+
+    def describe(self, key: str, resource_type: str = "image") -> Optional[dict]:
+        path = self.path_for(key, resource_type)
+        if not os.path.exists(path):
+            return None
+        return {
+            "url": self.url_for(key, resource_type),
+            "key": key,
+            "bytes": os.path.getsize(path),
+            "duration": self._probe_duration(path) if resource_type == "video" else None,
+        }
+
+    def _probe_duration(self, path: str) -> Optional[float]:
+        """Best-effort media duration, like the one Cloudinary returns on upload."""
+        if not shutil.which(FFPROBE_BIN):
+            return None
+        result = subprocess.run(
+            [FFPROBE_BIN, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True
+        )
+        try:
+            return float(result.stdout.decode().strip())
+        except ValueError:
+            return None
@@ -0,0 +1,227 @@
+import os
+import json
+import uuid
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Optional
+from urllib.parse import urlparse
+import requests
+from app.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "media_cache"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))
+# URL prefixes the proxy route may fetch; by default only our own Cloudinary cloud
+MEDIA_CACHE_ALLOWED_PREFIXES = [
+    prefix.strip() for prefix in os.getenv(
+        "MEDIA_CACHE_ALLOWED_PREFIXES",
+        f"https://res.cloudinary.com/{os.getenv('CLOUDINARY_CLOUD_NAME')}/" if os.getenv("CLOUDINARY_CLOUD_NAME") else ""
+    ).split(",") if prefix.strip()
+]
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Temp files older than this belong to downloads that died without cleaning up
+MEDIA_CACHE_STALE_TMP_SECONDS = int(os.getenv("MEDIA_CACHE_STALE_TMP_SECONDS", "3600"))
+
+
+class MediaCache:
+    """
+    Shared on-disk cache of remote media, keyed by URL.
+
+    Files are written to a temp name and renamed into place, so readers never
+    see partial downloads. Concurrent misses for the same URL share one
+    download. When the cache grows past ``max_bytes`` the least recently used
+    files are evicted; ``checkout`` hard-links an entry so long-running users
+    keep their copy even if it is evicted meanwhile.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, root: str = MEDIA_CACHE_DIR, max_bytes: int = MEDIA_CACHE_MAX_BYTES):
+        if self._initialized:
+            return
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._downloads = SingleFlight()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._initialized = True
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def is_allowed(self, url: str) -> bool:
+        """Whether the proxy route may fetch ``url`` (only under MEDIA_CACHE_ALLOWED_PREFIXES)."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname or parsed.username or parsed.password:
+            return False
+        if ".." in parsed.path.split("/"):
+            return False
+        netloc = parsed.hostname + (f":{parsed.port}" if parsed.port else "")
+        normalized = f"{parsed.scheme}://{netloc}{parsed.path}"
+        return any(normalized.startswith(prefix) for prefix in MEDIA_CACHE_ALLOWED_PREFIXES)
+
+    def fetch(self, url: str) -> str:
+        """
+        Return the path of the cached copy of ``url``, downloading it on a miss.
+
+        The path is only guaranteed to exist until the next eviction; use
+        ``checkout`` when the file is read for a long time.
+        """
+        key = self.key_for(url)
+        path = self._path(key)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path, None)
+                self._hits += 1
+                return path
+            self._misses += 1
+
+        leader = []
+
+        def download():
+            leader.append(True)
+            return self._download(url, key)
+
+        result = self._downloads.do(key, download)
+        if not leader:
+            with self._lock:
+                self._coalesced += 1
+        return result
+
+    def checkout(self, url: str, dest: str) -> str:
+        """Link (or copy) the cached copy of ``url`` to ``dest``, which the caller owns."""
+        for _ in range(2):
+            path = self.fetch(url)
+            with self._lock:
+                # Eviction also takes the lock, so the entry cannot vanish while linking
+                if os.path.exists(path):
+                    try:
+                        os.link(path, dest)
+                    except OSError:
+                        shutil.copyfile(path, dest)
+                    return dest
+        raise FileNotFoundError(f"Cached copy of {url} was evicted before it could be used")
+
+    def open(self, url: str) -> BinaryIO:
+        """Open the cached copy of ``url`` for reading; the open file survives eviction."""
+        for _ in range(2):
+            path = self.fetch(url)
+            with self._lock:
+                if os.path.exists(path):
+                    return open(path, "rb")
+        raise FileNotFoundError(f"Cached copy of {url} was evicted before it could be used")
+
+    def content_type(self, url: str) -> Optional[str]:
+        try:
+            with open(f"{self._path(self.key_for(url))}.meta.json", "r", encoding="utf-8") as f:
+                return json.load(f).get("content_type")
+        except FileNotFoundError:
+            return None
+
+    def _download(self, url: str, key: str) -> str:
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with requests.get(url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                content_type = response.headers.get("Content-Type")
+            with open(f"{path}.meta.json", "w", encoding="utf-8") as f:
+                json.dump({"url": url, "content_type": content_type}, f)
+            with self._lock:
+                os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self.evict()
+        return path
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in ``max_bytes``.
+
+        Also removes temp files left by downloads that died and metadata whose
+        entry is gone, once they are older than MEDIA_CACHE_STALE_TMP_SECONDS.
+        """
+        stale_before = time.time() - MEDIA_CACHE_STALE_TMP_SECONDS
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.root):
+                if "." in name:
+                    self._remove_if_orphaned(name, stale_before)
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                for victim in (path, f"{path}.meta.json"):
+                    try:
+                        os.remove(victim)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                logger.info(f"Evicted {os.path.basename(path)} from media cache")
+                if total <= self.max_bytes:
+                    break
+
+    def _remove_if_orphaned(self, name: str, stale_before: float):
+        path = os.path.join(self.root, name)
+        if name.endswith(".meta.json"):
+            if os.path.exists(path[:-len(".meta.json")]):
+                return
+        elif not name.endswith(".tmp"):
+            return
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                logger.info(f"Removed orphaned {name} from media cache")
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            entries = [name for name in os.listdir(self.root) if "." not in name]
+            size = sum(os.path.getsize(os.path.join(self.root, name)) for name in entries
+                       if os.path.exists(os.path.join(self.root, name)))
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+                "entries": len(entries),
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,83 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+from app.extentions import mongo
+
+_indexes_ready = False
+
+def _media_hashes():
+    global _indexes_ready
+    if not _indexes_ready:
+        mongo.db.media_hashes.create_index([("sha256", 1), ("resource_type", 1)], unique=True)
+        mongo.db.media_hashes.create_index("url")
+        _indexes_ready = True
+    return mongo.db.media_hashes
+
+def acquire_media_hash(sha256: str, resource_type: str):
+    """
+    Take a reference on already stored content.
+
+    Args:
+        sha256: Hex digest of the content
+        resource_type: Storage resource type ("image", "video" or "raw")
+
+    Returns:
+        The media_hashes document, or None if the content is not stored yet.
+    """
+    try:
+        return _media_hashes().find_one_and_update(
+            {"sha256": sha256, "resource_type": resource_type},
+            {"$inc": {"refcount": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        raise Exception(f"Failed to acquire media hash in MongoDB: {str(e)}")
+
+def claim_media_hash(sha256: str, resource_type: str, key: str, url: str, size: int, duration: float = None):
+    """
+    Register freshly uploaded content, or take a reference on the copy another
+    upload registered first.
+
+    Returns:
+        The existing document if the content was already registered, else None.
+    """
+    try:
+        now = datetime.utcnow()
+        return _media_hashes().find_one_and_update(
+            {"sha256": sha256, "resource_type": resource_type},
+            {
+                "$setOnInsert": {
+                    "key": key,
+                    "url": url,
+                    "bytes": size,
+                    "duration": duration,
+                    "created_at": now
+                },
+                "$inc": {"refcount": 1},
+                "$set": {"updated_at": now}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except Exception as e:
+        raise Exception(f"Failed to register media hash in MongoDB: {str(e)}")
+
+def release_media_url(url: str):
+    """
+    Drop a reference on stored content by its URL.
+
+    Returns:
+        The document if this was the last reference (it is removed), else None.
+        URLs that were never registered are ignored.
+    """
+    try:
+        media = _media_hashes().find_one_and_update(
+            {"url": url, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not media or media["refcount"] > 0:
+            return None
+        result = _media_hashes().delete_one({"_id": media["_id"], "refcount": {"$lte": 0}})
+        return media if result.deleted_count else None
+    except Exception as e:
+        raise Exception(f"Failed to release media hash in MongoDB: {str(e)}")
@@ -0,0 +1,77 @@
+import os
+import uuid
+import tempfile
+from flask import Blueprint, jsonify, request, send_file
+from flask_jwt_extended import jwt_required
+from app.storage.service import get_storage
+from app.storage.local_driver import LocalStorage
+from app.storage.executor import UploadExecutor
+from app.storage.media_cache import MediaCache
+import requests
+
+storage_bp = Blueprint('storage_bp', __name__)
+
+@storage_bp.route('/<string:resource_type>/<path:key>', methods=['GET'])
+def serve_object(resource_type, key):
+    """Serve an object of the local storage driver, honouring Range requests."""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        return jsonify({"error": "Local storage is not enabled"}), 404
+    try:
+        path = storage.path_for(key, resource_type)
+    except ValueError:
+        return jsonify({"error": "Invalid key"}), 400
+    if not storage.exists(key, resource_type):
+        return jsonify({"error": "Not found"}), 404
+
+    return send_file(path, mimetype=storage.content_type(key, resource_type), conditional=True)
+
+@storage_bp.route('/upload/<string:resource_type>/<path:key>', methods=['PUT'])
+def receive_signed_upload(resource_type, key):
+    """Accept a direct upload signed by LocalStorage.sign_upload (request body is the file)."""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        return jsonify({"error": "Local storage is not enabled"}), 404
+    try:
+        if not storage.verify_upload(request.args.get('token', ''), key, resource_type):
+            return jsonify({"error": "Invalid or expired upload signature"}), 403
+        result = storage.put_stream(request.stream, key, resource_type, request.mimetype or None)
+    except ValueError:
+        return jsonify({"error": "Invalid key"}), 400
+    return jsonify(result), 201
+
+@storage_bp.route('/metrics', methods=['GET'])
+def upload_metrics():
+    """Queue depth and per-upload latency of the shared upload executor."""
+    return jsonify(UploadExecutor().stats()), 200
+
+@storage_bp.route('/cache', methods=['GET'])
+@jwt_required()
+def serve_cached_media():
+    """Serve a remote media file from the local media cache, honouring Range requests."""
+    url = request.args.get('url', '')
+    media_cache = MediaCache()
+    if not media_cache.is_allowed(url):
+        return jsonify({"error": "URL is not allowed"}), 400
+    # A private link keeps the file readable if the entry is evicted meanwhile
+    path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}.media")
+    try:
+        media_cache.checkout(url, path)
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": f"Failed to fetch media: {str(e)}"}), 502
+    try:
+        # send_file opens the path right away, so the link can be removed once it returns;
+        # the ETag is tied to the URL and size rather than to the private link's name
+        return send_file(
+            path,
+            mimetype=media_cache.content_type(url) or "application/octet-stream",
+            conditional=True,
+            etag=f"{media_cache.key_for(url)}-{os.path.getsize(path)}"
+        )
+    finally:
+        os.unlink(path)
+
+@storage_bp.route('/cache/stats', methods=['GET'])
+def media_cache_stats():
+    """Hit ratio and size of the local media cache."""
+    return jsonify(MediaCache().stats()), 200
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import threading
+from app.storage.base import StorageBackend
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", os.path.join(tempfile.gettempdir(), "local_storage"))
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:5000")
+
+_storage = None
+_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Return the process-wide storage driver selected by STORAGE_BACKEND
+    ("cloudinary" or "local").
+    """
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "local":
+                    from app.storage.local_driver import LocalStorage
+                    _storage = LocalStorage(LOCAL_STORAGE_ROOT, STORAGE_PUBLIC_URL)
+                elif STORAGE_BACKEND == "cloudinary":
+                    from app.storage.cloudinary_driver import CloudinaryStorage
+                    _storage = CloudinaryStorage()
+                else:
+                    raise ValueError(f"Unsupported STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return _storage
@@ -0,0 +1,26 @@
+import os
+from typing import Optional
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+STORAGE_SIGNING_SECRET = os.getenv("STORAGE_SIGNING_SECRET") or os.getenv("JWT_SECRET_KEY")
+STORAGE_SIGNED_UPLOAD_TTL = int(os.getenv("STORAGE_SIGNED_UPLOAD_TTL", "900"))  # Seconds a signed upload stays valid
+
+
+def _serializer(salt: str) -> URLSafeTimedSerializer:
+    if not STORAGE_SIGNING_SECRET:
+        # An empty key would make every token forgeable
+        raise RuntimeError("STORAGE_SIGNING_SECRET (or JWT_SECRET_KEY) must be set to sign uploads")
+    return URLSafeTimedSerializer(STORAGE_SIGNING_SECRET, salt=salt)
+
+
+def sign(payload: dict, salt: str) -> str:
+    """Return a URL-safe, timestamped token for ``payload``."""
+    return _serializer(salt).dumps(payload)
+
+
+def unsign(token: str, salt: str, max_age: int) -> Optional[dict]:
+    """Return the payload of a token, or None when it is forged or older than ``max_age`` seconds."""
+    try:
+        return _serializer(salt).loads(token, max_age=max_age)
+    except (BadSignature, SignatureExpired):
+        return None
@@ -0,0 +1,213 @@
+import uuid
+from datetime import datetime
+from pymongo import UpdateOne
+from app.extentions import mongo
+
+VIDEO_STAT_FIELDS = ("create_time", "cover_image_url", "title", "like_count", "comment_count", "share_count", "view_count")
+ROLLUP_GRANULARITIES = ("day", "month")
+ROLLUP_SUMS = {"views": "$view_count", "likes": "$like_count", "comments": "$comment_count", "shares": "$share_count"}
+
+_indexes_ready = False
+
+def _ensure_indexes():
+    global _indexes_ready
+    if not _indexes_ready:
+        mongo.db.tiktok_videos.create_index([("account", 1), ("video_id", 1)], unique=True)
+        mongo.db.tiktok_videos.create_index([("account", 1), ("created_at", 1)])
+        mongo.db.tiktok_rollups.create_index([("account", 1), ("granularity", 1), ("period", 1)], unique=True)
+        _indexes_ready = True
+
+def get_tiktok_account(account: str):
+    """
+    Retrieve the snapshot state of a TikTok account.
+
+    Args:
+        account: Account key (hash of the access token)
+
+    Returns:
+        The account document (refreshed_at, full_refreshed_at, video_count), or None.
+    """
+    try:
+        return mongo.db.tiktok_accounts.find_one({"account": account}, {"_id": 0})
+    except Exception as e:
+        raise Exception(f"Failed to retrieve TikTok account from MongoDB: {str(e)}")
+
+def mark_tiktok_account_refreshed(account: str, full: bool):
+    """
+    Record that the snapshot of an account was refreshed.
+
+    Args:
+        account: Account key
+        full: Whether every page of the video list was crawled
+    """
+    try:
+        now = datetime.utcnow()
+        fields = {"refreshed_at": now, "video_count": mongo.db.tiktok_videos.count_documents({"account": account})}
+        if full:
+            fields["full_refreshed_at"] = now
+        mongo.db.tiktok_accounts.update_one({"account": account}, {"$set": fields}, upsert=True)
+    except Exception as e:
+        raise Exception(f"Failed to update TikTok account in MongoDB: {str(e)}")
+
+def upsert_tiktok_videos(account: str, videos: list) -> list:
+    """
+    Store one page of the TikTok video list.
+
+    Args:
+        account: Account key
+        videos: Video objects as returned by /v2/video/list/
+
+    Returns:
+        list: Creation dates (UTC) of the videos that were new or whose stats changed.
+    """
+    if not videos:
+        return []
+    try:
+        _ensure_indexes()
+        now = datetime.utcnow()
+        existing = {
+            doc["video_id"]: doc for doc in mongo.db.tiktok_videos.find(
+                {"account": account, "video_id": {"$in": [video["id"] for video in videos]}}
+            )
+        }
+        operations = []
+        changed = []
+        for video in videos:
+            stats = {field: video.get(field) for field in VIDEO_STAT_FIELDS}
+            stats["created_at"] = datetime.utcfromtimestamp(int(video.get("create_time") or 0))
+            current = existing.get(video["id"])
+            if current and all(current.get(field) == value for field, value in stats.items()):
+                continue
+            operations.append(UpdateOne(
+                {"account": account, "video_id": video["id"]},
+                {"$set": {**stats, "updated_at": now}},
+                upsert=True
+            ))
+            changed.append(stats["created_at"])
+        if operations:
+            mongo.db.tiktok_videos.bulk_write(operations, ordered=False)
+        return changed
+    except Exception as e:
+        raise Exception(f"Failed to store TikTok videos in MongoDB: {str(e)}")
+
+def get_tiktok_videos(account: str) -> list:
+    """
+    Retrieve the snapshot of an account's videos, newest first.
+
+    Returns:
+        List of video objects shaped like /v2/video/list/ entries.
+    """
+    try:
+        videos = mongo.db.tiktok_videos.find({"account": account}, {"_id": 0, "account": 0, "created_at": 0, "updated_at": 0}).sort("create_time", -1)
+        return [{"id": video.pop("video_id"), **video} for video in videos]
+    except Exception as e:
+        raise Exception(f"Failed to retrieve TikTok videos from MongoDB: {str(e)}")
+
+def remove_unseen_tiktok_videos(account: str, seen_ids: list) -> int:
+    """
+    Delete the videos of an account that a full crawl did not return (deleted or made private).
+
+    Args:
+        account: Account key
+        seen_ids: IDs of every video returned by the crawl
+
+    Returns:
+        int: Number of videos removed.
+    """
+    try:
+        result = mongo.db.tiktok_videos.delete_many({"account": account, "video_id": {"$nin": list(seen_ids)}})
+        return result.deleted_count
+    except Exception as e:
+        raise Exception(f"Failed to remove TikTok videos from MongoDB: {str(e)}")
+
+def _period_start(date: datetime, granularity: str) -> datetime:
+    if granularity == "month":
+        return datetime(date.year, date.month, 1)
+    return datetime(date.year, date.month, date.day)
+
+def refresh_tiktok_rollups(account: str, since: datetime = None):
+    """
+    Recompute the daily and monthly rollups of an account with $dateTrunc/$group.
+
+    Periods are UTC days and months. Fresh totals are merged over the old ones
+    first and only then are periods without videos deleted, so readers never
+    see a range with its rollups missing.
+
+    Args:
+        account: Account key
+        since: Only periods from this date on are recomputed (all periods if None)
+    """
+    try:
+        _ensure_indexes()
+        run = uuid.uuid4().hex
+        for granularity in ROLLUP_GRANULARITIES:
+            match = {"account": account}
+            stale = {"account": account, "granularity": granularity, "run": {"$ne": run}}
+            if since:
+                match["created_at"] = {"$gte": _period_start(since, granularity)}
+                stale["period"] = {"$gte": _period_start(since, granularity)}
+            mongo.db.tiktok_videos.aggregate([
+                {"$match": match},
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$created_at", "unit": granularity}},
+                    **{name: {"$sum": {"$ifNull": [field, 0]}} for name, field in ROLLUP_SUMS.items()},
+                    "videos": {"$sum": 1}
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "account": {"$literal": account},
+                    "granularity": {"$literal": granularity},
+                    "period": "$_id",
+                    **{name: 1 for name in ROLLUP_SUMS},
+                    "videos": 1,
+                    "run": {"$literal": run},
+                    "updated_at": "$$NOW"
+                }},
+                {"$merge": {
+                    "into": "tiktok_rollups",
+                    "on": ["account", "granularity", "period"],
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert"
+                }}
+            ])
+            # Periods whose videos are gone would otherwise keep old totals
+            mongo.db.tiktok_rollups.delete_many(stale)
+    except Exception as e:
+        raise Exception(f"Failed to update TikTok rollups in MongoDB: {str(e)}")
+
+def aggregate_tiktok_stats(account: str, start: datetime, end: datetime, bucket: str) -> list:
+    """
+    Sum the rollups of an account into buckets.
+
+    Args:
+        account: Account key
+        start: First day of the range (inclusive)
+        end: Day after the range (exclusive)
+        bucket: "day", "week" (starting on Monday) or "month"
+
+    Returns:
+        List of {"period", "views", "likes", "comments", "shares", "videos"}
+        for buckets that have videos, oldest first.
+    """
+    try:
+        # Monthly rollups are exact only when the range covers whole months
+        whole_months = bucket == "month" and start.day == 1 and end.day == 1
+        trunc = {"date": "$period", "unit": bucket}
+        if bucket == "week":
+            trunc["startOfWeek"] = "monday"
+        return list(mongo.db.tiktok_rollups.aggregate([
+            {"$match": {
+                "account": account,
+                "granularity": "month" if whole_months else "day",
+                "period": {"$gte": start, "$lt": end}
+            }},
+            {"$group": {
+                "_id": {"$dateTrunc": trunc},
+                **{name: {"$sum": f"${name}"} for name in ROLLUP_SUMS},
+                "videos": {"$sum": "$videos"}
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "period": "$_id", **{name: 1 for name in ROLLUP_SUMS}, "videos": 1}}
+        ]))
+    except Exception as e:
+        raise Exception(f"Failed to aggregate TikTok stats in MongoDB: {str(e)}")
@@ -1,13 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_cors import CORS
 from .service import exchange_code_for_access_token, get_tiktok_user_info
-import tempfile
-import requests
+from .uploader import open_source, plan_chunks, init_upload, upload_chunks, ChunkUploadError, InitUploadError
+from .snapshot import get_snapshot_videos, account_key, TikTokAPIError
+from .repo import aggregate_tiktok_stats
+from app.social_video.poller import PublishStatusPoller
 import os
-import traceback
-import math, json
-from datetime import datetime
-from collections import defaultdict
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
 
 tiktok_bp = Blueprint("tiktok", __name__)
 
@@ -40,98 +42,55 @@ def upload_video_by_url():
     data = request.get_json()
     video_url = data.get("video_url")
     title = data.get("title")
-    description = data.get("description", "")
     access_token = data.get("access_token")
 
     if not video_url or not title or not access_token:
         return jsonify({"error": "Missing video_url, title, or access_token"}), 400
 
+    temp_path = None
     try:
-        # 1. Tải video về file tạm
-        video_res = requests.get(video_url, stream=True, timeout=20)
-        content_type = video_res.headers.get("Content-Type", "")
-        if video_res.status_code != 200 or "video" not in content_type:
-            return jsonify({"error": "Invalid video URL or unsupported content type"}), 400
-
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        for chunk in video_res.iter_content(chunk_size=8192):
-            if chunk:
-                temp_file.write(chunk)
-        temp_file.close()
-        file_path = temp_file.name
-        file_size = os.path.getsize(file_path)
+        # 1. Lấy video qua media cache dùng chung (không tải lại nếu đã có)
+        try:
+            source, temp_path = open_source(video_url)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        file_size = source.size
 
         # 2. Gửi yêu cầu init upload TikTok
-        init_url = "https://open.tiktokapis.com/v2/post/publish/video/init/"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json; charset=UTF-8"
-        }
-        
-        # Chỉ upload 1 chunk duy nhất (toàn bộ file)
-        chunk_size = file_size
-        total_chunks = 1
-
-        payload = {
-            "post_info": {
-                "title": title,
-                "privacy_level": "SELF_ONLY",  # Chỉ cho phép private khi app chưa duyệt
-                "disable_duet": False,
-                "disable_comment": False,
-                "disable_stitch": False,
-                "video_cover_timestamp_ms": 1000
-            },
-            "source_info": {
-                "source": "FILE_UPLOAD",
-                "video_size": file_size,
-                "chunk_size": chunk_size,
-                "total_chunk_count": total_chunks
-            }
-        }
-
-        init_res = requests.post(init_url, headers=headers, json=payload, timeout=30)
-        init_data = init_res.json()
-        
-        print("TikTok INIT response:", init_res.status_code)
-        print("TikTok INIT payload:", json.dumps(payload, indent=2))
-        print("TikTok INIT raw response:", init_res.text)
-
-        if init_res.status_code != 200 or "data" not in init_data:
-            os.unlink(file_path)
-            return jsonify({"error": "TikTok init failed", "detail": init_data}), 400
-
-        upload_url = init_data["data"]["upload_url"]
-        publish_id = init_data["data"]["publish_id"]
-
-        # 3. Upload video file bằng PUT
-        with open(file_path, "rb") as f:
-            video_data = f.read()
-
-        content_range = f"bytes 0-{file_size - 1}/{file_size}"
-        upload_headers = {
-            "Content-Type": "video/mp4",
-            "Content-Range": content_range
-        }
-        upload_res = requests.put(upload_url, headers=upload_headers, data=video_data, timeout=60)
-        os.unlink(file_path)
-
-        if upload_res.status_code not in (200, 201):
+        # Chia chunk theo quy tắc của TikTok (5–64 MB, chunk cuối nhận phần dư)
+        chunk_size, total_chunks = plan_chunks(file_size)
+        try:
+            publish_id, upload_url = init_upload(access_token, title, file_size, chunk_size, total_chunks)
+        except InitUploadError as e:
+            return jsonify({"error": "TikTok init failed", "detail": e.detail}), 400
+
+        # 3. Upload từng chunk bằng PUT với Content-Range riêng
+        try:
+            upload_chunks(upload_url, source, chunk_size, total_chunks)
+        except ChunkUploadError as e:
             return jsonify({
                 "error": "Failed to upload video",
-                "upload_response": upload_res.text
+                "upload_response": str(e)
             }), 400
 
+        # Theo dõi trạng thái xử lý ở nền; client đọc /api/social/status/tiktok/<publish_id>
+        PublishStatusPoller().track_tiktok(publish_id, access_token, data.get("video_id"))
+
         return jsonify({
             "status": "upload_success",
-            "publish_id": publish_id
+            "publish_id": publish_id,
+            "total_chunk_count": total_chunks
         })
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception(f"Unexpected error in upload_video_by_url: {str(e)}")
         return jsonify({
             "error": "Internal server error",
             "detail": str(e)
         }), 500
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
 
 @tiktok_bp.route("/total_views", methods=["GET"])
 def get_total_views():
@@ -141,55 +100,33 @@ def get_total_views():
     access_token = auth_header.replace("Bearer ", "")
 
     try:
-        # Thêm query param đúng cách
-        fields = "cover_image_url,id,title,view_count"
-        videos_url = f"https://open.tiktokapis.com/v2/video/list/?fields={fields}"
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        total_views = 0
-        has_more = True
-        cursor = None
-
-        while has_more:
-            payload = {
-                "max_count": 20  # Max là 20 theo tài liệu
-            }
-            if cursor:
-                payload["cursor"] = cursor
-
-            print("Sending payload:", payload)
-            res = requests.post(videos_url, headers=headers, json=payload)
-
-            if not res.ok:
-                print("TikTok error:", res.status_code, res.text)
-                return jsonify({"error": "TikTok API error", "detail": res.text}), 500
-
-            data = res.json()
-            print("Response:", data)
-
-            if "data" not in data or "videos" not in data["data"]:
-                break
-
-            for video in data["data"]["videos"]:
-                total_views += int(video.get("view_count", 0))
-
-            has_more = data["data"].get("has_more", False)
-            cursor = data["data"].get("cursor", None)
-
+        videos = get_snapshot_videos(access_token)
+        total_views = sum(int(video.get("view_count") or 0) for video in videos)
         return jsonify({"totalViews": total_views})
 
+    except TikTokAPIError as e:
+        logger.warning(f"TikTok error: {e.detail}")
+        return jsonify({"error": "TikTok API error", "detail": e.detail}), 500
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Unexpected error in get_total_views: {str(e)}")
         return jsonify({"error": "Internal server error", "detail": str(e)}), 500
 
-def parse_month(dt: str):
-    d = datetime.fromisoformat(dt.replace("Z", "+00:00"))
-    return d.strftime("%B %Y")  # Ví dụ: "June 2024"
+BUCKET_STEPS = ("day", "week", "month")
+
+def bucket_periods(range_start: datetime, range_end: datetime, bucket: str):
+    """Start of every day/week (Monday)/month bucket overlapping [range_start, range_end)."""
+    if bucket == "month":
+        current = datetime(range_start.year, range_start.month, 1)
+    elif bucket == "week":
+        current = range_start - timedelta(days=range_start.weekday())
+    else:
+        current = range_start
+    while current < range_end:
+        yield current
+        if bucket == "month":
+            current = datetime(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            current += timedelta(days=7 if bucket == "week" else 1)
 
 @tiktok_bp.route("/monthly_views", methods=["GET"])
 def tiktok_monthly_views():
@@ -202,65 +139,46 @@ def tiktok_monthly_views():
     end = request.args.get("end")
     if not start or not end:
         return jsonify({"error": "Missing start or end"}), 400
+    bucket = request.args.get("bucket", "month")
+    if bucket not in BUCKET_STEPS:
+        return jsonify({"error": "bucket must be day, week or month"}), 400
 
     try:
-        # Lấy danh sách video
-        fields = "id,create_time,cover_image_url,title,like_count,comment_count,share_count,view_count"
-        videos_url = f"https://open.tiktokapis.com/v2/video/list/?fields={fields}"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-        has_more = True
-        cursor = None
-        videos = []
-
-        while has_more:
-            payload = {"max_count": 20}
-            if cursor:
-                payload["cursor"] = cursor
-            res = requests.post(videos_url, headers=headers, json=payload)
-            data = res.json()
-            if "data" not in data or "videos" not in data["data"]:
-                break
-            videos.extend(data["data"]["videos"])
-            has_more = data["data"].get("has_more", False)
-            cursor = data["data"].get("cursor", None)
-
-        # Khởi tạo các tháng trong khoảng thời gian
-        result = {}
+        # Làm mới snapshot và rollup nếu cần (dùng chung với các endpoint khác của dashboard)
+        get_snapshot_videos(access_token)
+
         start_dt = datetime.fromisoformat(start).date()
-        print(start_dt)
         end_dt = datetime.fromisoformat(end).date()
-        current = datetime(start_dt.year, start_dt.month, 1).date()
-        while current <= end_dt:
-            month_str = current.strftime("%B %Y")
-            result[month_str] = {"month": month_str, "views": 0, "likes": 0, "comments": 0, "shares": 0}
-            # Tăng sang tháng tiếp theo
-            if current.month == 12:
-                current = datetime(current.year + 1, 1, 1).date()
-            else:
-                current = datetime(current.year, current.month + 1, 1).date()
-
-        # Cộng dồn số liệu video vào tháng tương ứng
-        for video in videos:
-            created = datetime.fromtimestamp(int(video["create_time"])).date()
-            if not (start_dt <= created <= end_dt):
-                continue
-            month = created.strftime("%B %Y")
-            if month not in result:
-                result[month] = {"month": month, "views": 0, "likes": 0, "comments": 0, "shares": 0}
-            result[month]["views"] += int(video.get("view_count", 0))
-            result[month]["likes"] += int(video.get("like_count", 0))
-            result[month]["comments"] += int(video.get("comment_count", 0))
-            result[month]["shares"] += int(video.get("share_count", 0))
-
-        # Trả về mảng đã sắp xếp theo tháng, chỉ lấy 3 tháng cuối
-        sorted_result = sorted(result.values(), key=lambda x: datetime.strptime(x["month"], "%B %Y"))
-        return jsonify(sorted_result[-3:])
+        range_start = datetime(start_dt.year, start_dt.month, start_dt.day)
+        range_end = datetime(end_dt.year, end_dt.month, end_dt.day) + timedelta(days=1)
+
+        # Tổng hợp trong Mongo ($dateTrunc/$group trên các rollup theo ngày/tháng)
+        stats = {row["period"]: row for row in aggregate_tiktok_stats(account_key(access_token), range_start, range_end, bucket)}
+
+        # Trả về mọi khoảng trong phạm vi, kể cả khoảng không có video
+        result = []
+        for period in bucket_periods(range_start, range_end, bucket):
+            row = stats.get(period, {})
+            entry = {
+                "period": period.date().isoformat(),
+                "views": row.get("views", 0),
+                "likes": row.get("likes", 0),
+                "comments": row.get("comments", 0),
+                "shares": row.get("shares", 0),
+            }
+            if bucket == "month":
+                entry = {"month": period.strftime("%B %Y"), **entry}
+            result.append(entry)
+
+        # Mặc định (không truyền bucket) giữ hành vi cũ: chỉ lấy 3 tháng cuối
+        if "bucket" not in request.args:
+            result = result[-3:]
+        return jsonify(result)
 
+    except TikTokAPIError as e:
+        return jsonify({"error": "TikTok API error", "detail": e.detail}), 500
     except Exception as e:
-        traceback.print_exc()
+        logger.exception(f"Unexpected error in tiktok_monthly_views: {str(e)}")
         return jsonify({"error": "Internal server error", "detail": str(e)}), 500
 
 @tiktok_bp.route("/video_detail_stats", methods=["GET"])
@@ -274,28 +192,8 @@ def tiktok_video_detail_stats():
     end = request.args.get("end")
 
     try:
-        # Lấy danh sách video
-        fields = "id,create_time,cover_image_url,title,like_count,comment_count,share_count,view_count"
-        videos_url = f"https://open.tiktokapis.com/v2/video/list/?fields={fields}"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-        has_more = True
-        cursor = None
-        videos = []
-
-        while has_more:
-            payload = {"max_count": 20}
-            if cursor:
-                payload["cursor"] = cursor
-            res = requests.post(videos_url, headers=headers, json=payload)
-            data = res.json()
-            if "data" not in data or "videos" not in data["data"]:
-                break
-            videos.extend(data["data"]["videos"])
-            has_more = data["data"].get("has_more", False)
-            cursor = data["data"].get("cursor", None)
+        # Lấy danh sách video từ snapshot (tự làm mới khi quá TIKTOK_SNAPSHOT_TTL)
+        videos = get_snapshot_videos(access_token)
 
         # Lọc video theo khoảng thời gian nếu có
         if start:
@@ -326,6 +224,8 @@ def tiktok_video_detail_stats():
 
         return jsonify(result)
 
+    except TikTokAPIError as e:
+        return jsonify({"error": "TikTok API error", "detail": e.detail}), 500
     except Exception as e:
-        traceback.print_exc()
+        logger.exception(f"Unexpected error in tiktok_video_detail_stats: {str(e)}")
         return jsonify({"error": "Internal server error", "detail": str(e)}), 500
\ No newline at end of file
@@ -3,9 +3,11 @@ import requests
 
 TIKTOK_CLIENT_KEY = os.getenv("TIKTOK_CLIENT_KEY")
 TIKTOK_CLIENT_SECRET = os.getenv("TIKTOK_CLIENT_SECRET")
+# Overridable so the upload flow can run against a local fake of the TikTok API
+TIKTOK_API_BASE = os.getenv("TIKTOK_API_BASE", "https://open.tiktokapis.com").rstrip("/")
 
 def exchange_code_for_access_token(code: str, redirect_uri: str):
-    url = "https://open.tiktokapis.com/v2/oauth/token/"
+    url = f"{TIKTOK_API_BASE}/v2/oauth/token/"
     data = {
         "client_key": TIKTOK_CLIENT_KEY,
         "client_secret": TIKTOK_CLIENT_SECRET,
@@ -21,7 +23,7 @@ def exchange_code_for_access_token(code: str, redirect_uri: str):
     return response.json()
 
 def get_tiktok_user_info(access_token: str):
-    url = "https://open.tiktokapis.com/v2/user/info/"
+    url = f"{TIKTOK_API_BASE}/v2/user/info/"
     params = {
         "fields": "display_name,avatar_url"
     }
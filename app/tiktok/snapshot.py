@@ -0,0 +1,160 @@
+import os
+import hashlib
+import logging
+import requests
+from datetime import datetime, timedelta
+from app.singleflight import SingleFlight
+from app.tiktok.service import TIKTOK_API_BASE
+from app.tiktok.repo import (
+    get_tiktok_account, get_tiktok_videos, mark_tiktok_account_refreshed, upsert_tiktok_videos,
+    refresh_tiktok_rollups, remove_unseen_tiktok_videos
+)
+
+logger = logging.getLogger(__name__)
+
+TIKTOK_SNAPSHOT_TTL = int(os.getenv("TIKTOK_SNAPSHOT_TTL", "300"))  # Seconds a snapshot is served without refresh
+TIKTOK_FULL_REFRESH_SECONDS = int(os.getenv("TIKTOK_FULL_REFRESH_SECONDS", str(6 * 3600)))
+VIDEO_LIST_FIELDS = "id,create_time,cover_image_url,title,like_count,comment_count,share_count,view_count"
+TIKTOK_COALESCE_TTL = float(os.getenv("TIKTOK_COALESCE_TTL", "2"))  # Seconds a coalesced result is reused
+TIKTOK_TOKEN_ACCOUNT_TTL = float(os.getenv("TIKTOK_TOKEN_ACCOUNT_TTL", str(24 * 3600)))  # Access tokens live ~24h
+PAGE_SIZE = 20  # Max là 20 theo tài liệu
+
+# Dashboards call all analytics endpoints at once with the same token
+_crawls = SingleFlight(result_ttl=TIKTOK_COALESCE_TTL)
+# Hash of an access token -> open_id of its account
+_accounts = SingleFlight(result_ttl=TIKTOK_TOKEN_ACCOUNT_TTL)
+
+
+class TikTokAPIError(Exception):
+    def __init__(self, message: str, detail: str = ""):
+        super().__init__(message)
+        self.detail = detail
+
+
+def account_key(access_token: str) -> str:
+    """
+    Key of the snapshot of the account behind an access token: the account's open_id.
+
+    Access tokens rotate about once a day; keying by the account lets a new
+    token keep refreshing the same snapshot incrementally. The open_id is
+    looked up once per token and remembered for TIKTOK_TOKEN_ACCOUNT_TTL
+    (in memory, under a hash of the token).
+    """
+    token_hash = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    return _accounts.do(token_hash, lambda: fetch_open_id(access_token))
+
+
+def fetch_open_id(access_token: str) -> str:
+    """Fetch the open_id of the account behind an access token from /v2/user/info/."""
+    res = requests.get(
+        f"{TIKTOK_API_BASE}/v2/user/info/",
+        params={"fields": "open_id"},
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=30
+    )
+    if not res.ok:
+        raise TikTokAPIError("TikTok API error", res.text)
+    open_id = ((res.json().get("data") or {}).get("user") or {}).get("open_id")
+    if not open_id:
+        raise TikTokAPIError("TikTok API error", res.text)
+    return open_id
+
+
+def fetch_video_page(access_token: str, cursor=None) -> dict:
+    """
+    Fetch one page of /v2/video/list/.
+
+    Returns:
+        The "data" object (videos, cursor, has_more), or {} if TikTok sent none.
+    """
+    payload = {"max_count": PAGE_SIZE}
+    if cursor:
+        payload["cursor"] = cursor
+    res = requests.post(
+        f"{TIKTOK_API_BASE}/v2/video/list/?fields={VIDEO_LIST_FIELDS}",
+        headers={"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"},
+        json=payload,
+        timeout=30
+    )
+    if not res.ok:
+        raise TikTokAPIError("TikTok API error", res.text)
+    data = res.json().get("data") or {}
+    return data if "videos" in data else {}
+
+
+def refresh_snapshot(access_token: str, account: str, full: bool) -> int:
+    """
+    Crawl the video list newest first into the snapshot.
+
+    An incremental refresh keeps paging while pages modify stored videos (new
+    videos or changed stats) and stops at the first page that modifies
+    nothing. A full refresh crawls every page and removes the videos it did
+    not see (deleted or made private). Daily and monthly rollups are then
+    recomputed from the oldest changed video on.
+
+    Returns:
+        int: Number of pages fetched.
+    """
+    cursor = None
+    pages = 0
+    changed_since = None
+    seen = set()
+    while True:
+        data = fetch_video_page(access_token, cursor)
+        pages += 1
+        videos = data.get("videos", [])
+        seen.update(video["id"] for video in videos)
+        changed = upsert_tiktok_videos(account, videos)
+        if changed:
+            changed_since = min([changed_since, *changed] if changed_since else changed)
+        if not data.get("has_more") or (not full and not changed):
+            break
+        cursor = data.get("cursor")
+
+    # An empty crawl is more likely a TikTok hiccup than an account without videos
+    if full and seen:
+        removed = remove_unseen_tiktok_videos(account, seen)
+        if removed:
+            logger.info(f"Removed {removed} videos no longer listed from TikTok snapshot {account[:12]}")
+    if full:
+        refresh_tiktok_rollups(account)
+    elif changed_since:
+        refresh_tiktok_rollups(account, since=changed_since)
+    mark_tiktok_account_refreshed(account, full)
+    logger.info(f"Refreshed TikTok snapshot {account[:12]} ({'full' if full else 'incremental'}, {pages} pages)")
+    return pages
+
+
+def get_snapshot_videos(access_token: str) -> list:
+    """
+    Videos of the account behind ``access_token``, refreshed when the snapshot
+    is older than TIKTOK_SNAPSHOT_TTL. A stale snapshot is served if TikTok
+    cannot be reached.
+
+    Concurrent callers with the same token share one snapshot read/refresh.
+
+    Returns:
+        List of video objects shaped like /v2/video/list/ entries, newest first.
+    """
+    account = account_key(access_token)
+    return _crawls.do((account, VIDEO_LIST_FIELDS), lambda: _load_snapshot(access_token, account))
+
+
+def _load_snapshot(access_token: str, account: str) -> list:
+    state = get_tiktok_account(account)
+    now = datetime.utcnow()
+    if state and now - state["refreshed_at"] < timedelta(seconds=TIKTOK_SNAPSHOT_TTL):
+        return get_tiktok_videos(account)
+
+    full = (
+        not state
+        or not state.get("full_refreshed_at")
+        or now - state["full_refreshed_at"] > timedelta(seconds=TIKTOK_FULL_REFRESH_SECONDS)
+    )
+    try:
+        refresh_snapshot(access_token, account, full)
+    except (TikTokAPIError, requests.exceptions.RequestException) as e:
+        if not state:
+            raise
+        logger.warning(f"Serving stale TikTok snapshot {account[:12]}: {e}")
+    return get_tiktok_videos(account)
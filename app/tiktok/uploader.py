@@ -0,0 +1,228 @@
+import os
+import time
+import uuid
+import random
+import logging
+import tempfile
+import requests
+from typing import BinaryIO, Iterator, Tuple
+from app.tiktok.service import TIKTOK_API_BASE
+from app.storage.media_cache import MediaCache
+
+logger = logging.getLogger(__name__)
+
+MIN_CHUNK_SIZE = 5 * 1024 * 1024      # TikTok minimum (smaller videos go as a single chunk)
+MAX_CHUNK_SIZE = 64 * 1024 * 1024     # TikTok maximum for every chunk but the last
+MAX_FINAL_CHUNK_SIZE = 128 * 1024 * 1024
+MAX_CHUNK_COUNT = 1000
+TIKTOK_CHUNK_SIZE = int(os.getenv("TIKTOK_CHUNK_SIZE", str(10 * 1024 * 1024)))
+TIKTOK_CHUNK_RETRIES = int(os.getenv("TIKTOK_CHUNK_RETRIES", "3"))
+TIKTOK_CHUNK_TIMEOUT = int(os.getenv("TIKTOK_CHUNK_TIMEOUT", "120"))  # Seconds per chunk request
+BASE_RETRY_DELAY = 1  # Seconds, doubled on every retry
+READ_BLOCK_SIZE = 256 * 1024
+
+
+class ChunkUploadError(Exception):
+    pass
+
+
+class InitUploadError(Exception):
+    def __init__(self, message: str, detail=None):
+        super().__init__(message)
+        self.detail = detail
+
+
+def plan_chunks(video_size: int, chunk_size: int = TIKTOK_CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Pick chunk_size and total_chunk_count following TikTok's rules.
+
+    Videos under 5 MB are sent as one chunk. Otherwise chunks are 5–64 MB,
+    total_chunk_count is floor(video_size / chunk_size) and the last chunk
+    absorbs the remainder (so it may be up to 128 MB).
+    """
+    if video_size <= 0:
+        raise ValueError("Video is empty")
+    if video_size < MIN_CHUNK_SIZE:
+        return video_size, 1
+    chunk_size = max(MIN_CHUNK_SIZE, min(chunk_size, MAX_CHUNK_SIZE, video_size))
+    # Stay under TikTok's chunk count limit for very large videos
+    while video_size // chunk_size > MAX_CHUNK_COUNT and chunk_size < MAX_CHUNK_SIZE:
+        chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+    return chunk_size, video_size // chunk_size
+
+
+def chunk_ranges(video_size: int, chunk_size: int, total_chunks: int) -> Iterator[Tuple[int, int]]:
+    """Yield inclusive (first_byte, last_byte) of every chunk."""
+    for index in range(total_chunks):
+        start = index * chunk_size
+        end = video_size - 1 if index == total_chunks - 1 else start + chunk_size - 1
+        yield start, end
+
+
+class RangeReader:
+    """
+    Read-only view of ``length`` bytes of a stream.
+
+    Having ``__len__`` lets requests send a Content-Length and stream the body
+    in small blocks instead of loading the chunk into memory.
+    """
+
+    def __init__(self, stream: BinaryIO, length: int, on_close=None):
+        self._stream = stream
+        self._remaining = length
+        self._length = length
+        self._on_close = on_close
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(min(size, READ_BLOCK_SIZE))
+        if not data:
+            raise ChunkUploadError(f"Source ended {self._remaining} bytes early")
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        if self._on_close:
+            self._on_close()
+
+
+class VideoSource:
+    """A local video file to upload in ranges."""
+
+    def __init__(self, size: int, path: str):
+        self.size = size
+        self.path = path
+
+    @classmethod
+    def from_file(cls, path: str) -> "VideoSource":
+        return cls(os.path.getsize(path), path=path)
+
+    def open_range(self, start: int, end: int) -> RangeReader:
+        f = open(self.path, "rb")
+        f.seek(start)
+        return RangeReader(f, end - start + 1, on_close=f.close)
+
+
+def open_source(video_url: str) -> Tuple[VideoSource, str]:
+    """
+    Prepare a video URL for chunked upload.
+
+    The video comes from the shared media cache, so a video that was already
+    fetched (e.g. for YouTube) is not downloaded again. Chunks are then read
+    as ranges of a private link to the cached file.
+
+    Returns:
+        (source, path) where path must be removed by the caller.
+
+    Raises:
+        ValueError: if the URL does not point to a video.
+    """
+    media_cache = MediaCache()
+    try:
+        path = media_cache.checkout(video_url, os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}.mp4"))
+    except requests.exceptions.HTTPError:
+        raise ValueError("Invalid video URL or unsupported content type")
+    if "video" not in (media_cache.content_type(video_url) or ""):
+        os.unlink(path)
+        raise ValueError("Invalid video URL or unsupported content type")
+    return VideoSource.from_file(path), path
+
+
+def init_upload(access_token: str, title: str, video_size: int, chunk_size: int, total_chunks: int) -> Tuple[str, str]:
+    """
+    Start a FILE_UPLOAD direct post.
+
+    Returns:
+        (publish_id, upload_url)
+
+    Raises:
+        InitUploadError: if TikTok rejects the request (detail holds its response).
+    """
+    payload = {
+        "post_info": {
+            "title": title,
+            "privacy_level": "SELF_ONLY",  # Chỉ cho phép private khi app chưa duyệt
+            "disable_duet": False,
+            "disable_comment": False,
+            "disable_stitch": False,
+            "video_cover_timestamp_ms": 1000
+        },
+        "source_info": {
+            "source": "FILE_UPLOAD",
+            "video_size": video_size,
+            "chunk_size": chunk_size,
+            "total_chunk_count": total_chunks
+        }
+    }
+    init_res = requests.post(
+        f"{TIKTOK_API_BASE}/v2/post/publish/video/init/",
+        headers={"Authorization": f"Bearer {access_token}", "Content-Type": "application/json; charset=UTF-8"},
+        json=payload,
+        timeout=30
+    )
+    logger.info(f"TikTok INIT response {init_res.status_code}: {init_res.text}")
+    try:
+        init_data = init_res.json()
+    except ValueError:
+        init_data = init_res.text
+    if init_res.status_code != 200 or not isinstance(init_data, dict) or "data" not in init_data:
+        raise InitUploadError("TikTok init failed", init_data)
+    return init_data["data"]["publish_id"], init_data["data"]["upload_url"]
+
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def upload_chunks(upload_url: str, source: VideoSource, chunk_size: int, total_chunks: int,
+                  content_type: str = "video/mp4") -> requests.Response:
+    """
+    PUT every chunk to TikTok's upload_url with its Content-Range.
+
+    Each chunk is read from the source only while it is being sent, and is
+    retried on its own after network errors, 429 and 5xx responses.
+
+    Returns:
+        The response to the last chunk.
+    """
+    response = None
+    for index, (start, end) in enumerate(chunk_ranges(source.size, chunk_size, total_chunks)):
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(end - start + 1),
+            "Content-Range": f"bytes {start}-{end}/{source.size}",
+        }
+        retries = 0
+        while True:
+            body = None
+            try:
+                body = source.open_range(start, end)
+                response = requests.put(upload_url, headers=headers, data=body, timeout=TIKTOK_CHUNK_TIMEOUT)
+                error = None if response.status_code in (200, 201, 206) else f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ChunkUploadError) as e:
+                response = None
+                error = str(e)
+            finally:
+                if body is not None:
+                    body.close()
+
+            if error is None:
+                break
+            if response is not None and not _is_retryable(response.status_code):
+                raise ChunkUploadError(f"Chunk {index + 1}/{total_chunks} rejected: {response.status_code} {response.text}")
+
+            retries += 1
+            if retries > TIKTOK_CHUNK_RETRIES:
+                raise ChunkUploadError(f"Chunk {index + 1}/{total_chunks} failed after {TIKTOK_CHUNK_RETRIES} retries: {error}")
+            delay = BASE_RETRY_DELAY * (2 ** (retries - 1)) + random.uniform(0, 0.1)
+            logger.warning(f"Chunk {index + 1}/{total_chunks} failed ({error}), retry {retries}/{TIKTOK_CHUNK_RETRIES} after {delay:.2f}s")
+            time.sleep(delay)
+
+        logger.info(f"Uploaded chunk {index + 1}/{total_chunks} ({start}-{end}/{source.size})")
+    return response
@@ -0,0 +1,98 @@
+import os
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app.upload_youtube.service import download_file, youtube_client, upload_video_file, set_thumbnail, upload_result
+from app.upload_youtube.repo import insert_youtube_job, update_youtube_job, get_youtube_job
+from app.social_video.poller import PublishStatusPoller
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_UPLOAD_WORKERS = int(os.getenv("YOUTUBE_UPLOAD_WORKERS", "2"))
+
+
+class YouTubeJobQueue:
+    """
+    Background YouTube uploads.
+
+    The request only queues a job; a worker downloads and uploads the video
+    while the thumbnail is fetched in parallel, then sets the thumbnail as
+    soon as the video id exists. Progress (bytes sent) and the final state are
+    stored in the youtube_jobs collection.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.workers = ThreadPoolExecutor(max_workers=YOUTUBE_UPLOAD_WORKERS, thread_name_prefix="youtube-upload")
+        self.thumbnails = ThreadPoolExecutor(max_workers=YOUTUBE_UPLOAD_WORKERS, thread_name_prefix="youtube-thumbnail")
+
+    def submit(self, request: dict) -> str:
+        """
+        Queue an upload.
+
+        Args:
+            request: videoUrl, title, description, optional thumbnailUrl and id (our video id)
+
+        Returns:
+            str: The job_id to poll with get_job.
+        """
+        job_id = str(uuid.uuid4())
+        insert_youtube_job(job_id, request)
+        self.workers.submit(self._run, job_id, request)
+        logger.info(f"Queued YouTube upload job {job_id}")
+        return job_id
+
+    def get_job(self, job_id: str):
+        job = get_youtube_job(job_id)
+        if job:
+            job.pop("request", None)
+        return job
+
+    def _run(self, job_id: str, request: dict):
+        video_path = None
+        thumbnail_url = request.get("thumbnailUrl")
+        thumbnail_future = self.thumbnails.submit(download_file, thumbnail_url, ".jpg") if thumbnail_url else None
+
+        def report(bytes_sent, total_bytes):
+            percent = round(100.0 * bytes_sent / total_bytes, 1) if total_bytes else 0.0
+            update_youtube_job(job_id, bytes_sent=bytes_sent, total_bytes=total_bytes, percent=percent)
+
+        try:
+            update_youtube_job(job_id, status="downloading")
+            video_path = download_file(request["videoUrl"], suffix=".mp4")
+            update_youtube_job(job_id, status="uploading", total_bytes=os.path.getsize(video_path))
+
+            with youtube_client() as youtube:
+                video_id = upload_video_file(youtube, video_path, request["title"], request["description"], report)
+                result = upload_result(video_id, request["title"], request["description"], thumbnail_url)
+                update_youtube_job(job_id, status="thumbnail" if thumbnail_future else "completed", result=result)
+                PublishStatusPoller().track_youtube(video_id, request.get("id"))
+
+                if thumbnail_future:
+                    # A failed thumbnail does not fail the job: the video is already on YouTube
+                    try:
+                        set_thumbnail(youtube, video_id, thumbnail_future.result())
+                        update_youtube_job(job_id, status="completed")
+                    except Exception as e:
+                        logger.error(f"Thumbnail for YouTube job {job_id} failed: {str(e)}")
+                        update_youtube_job(job_id, status="completed", thumbnail_error=str(e))
+            logger.info(f"YouTube upload job {job_id} completed: {video_id}")
+        except Exception as e:
+            logger.error(f"YouTube upload job {job_id} failed: {str(e)}")
+            update_youtube_job(job_id, status="failed", error=str(e))
+        finally:
+            paths = [video_path]
+            if thumbnail_future:
+                try:
+                    paths.append(thumbnail_future.result())
+                except Exception:
+                    pass
+            for path in paths:
+                if path and os.path.exists(path):
+                    os.unlink(path)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from app.extentions import mongo
+
+def insert_youtube_job(job_id: str, request: dict):
+    """
+    Insert an upload job document into the MongoDB youtube_jobs collection.
+
+    Args:
+        job_id: Unique identifier for the job
+        request: Upload parameters (videoUrl, title, description, thumbnailUrl, id)
+    """
+    try:
+        now = datetime.utcnow()
+        document = {
+            "job_id": job_id,
+            "status": "queued",
+            "request": request,
+            "bytes_sent": 0,
+            "total_bytes": 0,
+            "percent": 0.0,
+            "result": None,
+            "thumbnail_error": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        mongo.db.youtube_jobs.insert_one(document)
+    except Exception as e:
+        raise Exception(f"Failed to insert YouTube job into MongoDB: {str(e)}")
+
+def update_youtube_job(job_id: str, **fields):
+    """
+    Update fields of an upload job.
+
+    Args:
+        job_id: Unique identifier for the job
+        fields: Fields to set (e.g. status, bytes_sent, result, error)
+    """
+    try:
+        fields["updated_at"] = datetime.utcnow()
+        mongo.db.youtube_jobs.update_one({"job_id": job_id}, {"$set": fields})
+    except Exception as e:
+        raise Exception(f"Failed to update YouTube job in MongoDB: {str(e)}")
+
+def get_youtube_job(job_id: str):
+    """
+    Retrieve an upload job.
+
+    Returns:
+        The job document without its MongoDB _id, or None.
+    """
+    try:
+        return mongo.db.youtube_jobs.find_one({"job_id": job_id}, {"_id": 0})
+    except Exception as e:
+        raise Exception(f"Failed to retrieve YouTube job from MongoDB: {str(e)}")
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from .service import upload_video_youtube
+from .jobs import YouTubeJobQueue
 
 youtube_bp = Blueprint('youtube', __name__)
 
@@ -15,10 +15,27 @@ def upload_youtube_video():
         if not all([video_url, title, description]):
             return jsonify({"error": {"message": "Missing required fields"}}), 400
 
-        result = upload_video_youtube(video_url, title, description, thumbnail_url)
-        return jsonify(result)
+        # Upload chạy ở nền; client theo dõi qua /api/youtube/jobs/<job_id>
+        job_id = YouTubeJobQueue().submit({
+            "videoUrl": video_url,
+            "title": title,
+            "description": description,
+            "thumbnailUrl": thumbnail_url,
+            "id": data.get("id")
+        })
+        return jsonify({"jobId": job_id, "status": "queued"}), 202
 
     except Exception as e:
         import traceback
         print(traceback.format_exc())  # In ra toàn bộ stacktrace
         return jsonify({"error": {"message": str(e)}}), 500
+
+@youtube_bp.route('/jobs/<string:job_id>', methods=['GET'])
+def get_youtube_job(job_id):
+    try:
+        job = YouTubeJobQueue().get_job(job_id)
+        if not job:
+            return jsonify({"error": {"message": "Job not found"}}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({"error": {"message": str(e)}}), 500
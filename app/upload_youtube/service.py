@@ -1,39 +1,154 @@
 import os
+import time
+import random
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+import http.client
+import httplib2
 import google.auth
+import google_auth_httplib2
+from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from google.oauth2.credentials import Credentials
 import requests
 import tempfile
 import json
+import uuid
+from app.storage.media_cache import MediaCache
 
-# Tạo credentials từ file client_secrets.json hoặc từ biến môi trường
-def get_authenticated_service():
-    # Đọc credentials từ file JSON
-    CREDENTIALS_FILE = os.getenv("YOUTUBE_CREDENTIALS_FILE", "authorized_user.json")
-    if not os.path.exists(CREDENTIALS_FILE):
-        raise Exception(f"Credentials file '{CREDENTIALS_FILE}' not found")
-    with open(CREDENTIALS_FILE, "r", encoding="utf-8") as f:
-        creds_dict = json.load(f)
-    creds = Credentials.from_authorized_user_info(creds_dict, scopes=[
-        "https://www.googleapis.com/auth/youtube.upload"
-    ])
-    return build("youtube", "v3", credentials=creds)
+logger = logging.getLogger(__name__)
+
+YOUTUBE_CHUNK_SIZE = int(os.getenv("YOUTUBE_CHUNK_SIZE", str(8 * 1024 * 1024)))  # Multiple of 256 KB
+YOUTUBE_MAX_RETRIES = int(os.getenv("YOUTUBE_MAX_RETRIES", "10"))
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (IOError, http.client.HTTPException, requests.exceptions.ConnectionError)
+
+# youtube.readonly lets the publish status poller call videos.list
+YOUTUBE_SCOPES = [
+    "https://www.googleapis.com/auth/youtube.upload",
+    "https://www.googleapis.com/auth/youtube.readonly",
+]
+
+_credentials = None
+_credentials_lock = threading.Lock()
+_clients = queue.LifoQueue()
+
+# Tạo credentials từ file client_secrets.json hoặc từ biến môi trường (đọc một lần cho cả process)
+def _get_credentials() -> Credentials:
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            CREDENTIALS_FILE = os.getenv("YOUTUBE_CREDENTIALS_FILE", "authorized_user.json")
+            if not os.path.exists(CREDENTIALS_FILE):
+                raise Exception(f"Credentials file '{CREDENTIALS_FILE}' not found")
+            with open(CREDENTIALS_FILE, "r", encoding="utf-8") as f:
+                creds_dict = json.load(f)
+            _credentials = Credentials.from_authorized_user_info(creds_dict, scopes=YOUTUBE_SCOPES)
+        # Làm mới token dưới lock để các thread không refresh cùng lúc
+        if not _credentials.valid:
+            _credentials.refresh(Request())
+        return _credentials
+
+def _build_client():
+    http = google_auth_httplib2.AuthorizedHttp(_get_credentials(), http=httplib2.Http(timeout=120))
+    return build("youtube", "v3", http=http, static_discovery=True, cache_discovery=False)
+
+@contextmanager
+def youtube_client():
+    """
+    Borrow a YouTube client for the duration of one job.
+
+    Credentials are shared by the process. Clients are built from the
+    discovery document bundled with google-api-python-client (no discovery
+    fetch) and kept in a pool, so the build cost is paid at startup instead of
+    on every request. A client and its HTTP transport (httplib2 is not
+    thread-safe) are used by one job at a time.
+    """
+    _get_credentials()
+    try:
+        client = _clients.get_nowait()
+    except queue.Empty:
+        client = _build_client()
+    try:
+        yield client
+    finally:
+        _clients.put(client)
+
+def warm_up():
+    """Build the first client at startup and log what it costs, so requests do not pay for it."""
+    started = time.perf_counter()
+    try:
+        with youtube_client():
+            pass
+    except Exception as e:
+        logger.warning(f"YouTube client warm-up skipped: {e}")
+        return
+    logger.info(f"YouTube client ready in {(time.perf_counter() - started) * 1000:.1f} ms (cold build)")
+    started = time.perf_counter()
+    with youtube_client():
+        pass
+    logger.info(f"YouTube client checkout takes {(time.perf_counter() - started) * 1000:.3f} ms once pooled")
 
 def download_file(url, suffix=''):
-    response = requests.get(url)
-    response.raise_for_status()
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-    temp_file.write(response.content)
-    temp_file.close()
-    return temp_file.name
-
-def upload_video_youtube(video_url, title, description, thumbnail_url=None):
-    youtube = get_authenticated_service()
-    
-    # Tải video tạm
-    video_path = download_file(video_url, suffix=".mp4")
-    
+    """
+    Lấy file qua media cache dùng chung và trả về một bản riêng (hard link) mà
+    caller phải tự xoá. File đã có trong cache sẽ không bị tải lại.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}{suffix}")
+    return MediaCache().checkout(url, path)
+
+def resumable_upload(insert_request, total_bytes: int, on_progress=None) -> dict:
+    """
+    Drive a resumable upload chunk by chunk with next_chunk().
+
+    Transient failures (5xx, connection errors) are retried with exponential
+    backoff; the upload resumes from the last byte YouTube acknowledged.
+
+    Args:
+        insert_request: videos().insert(...) request with a resumable media body
+        total_bytes: Size of the video, for progress reporting
+        on_progress: Optional callback(bytes_sent, total_bytes) called after every chunk
+
+    Returns:
+        dict: The inserted video resource.
+    """
+    response = None
+    retries = 0
+    while response is None:
+        try:
+            status, response = insert_request.next_chunk()
+            retries = 0
+            if status:
+                bytes_sent = status.resumable_progress
+                logger.info(f"YouTube upload {int(status.progress() * 100)}% ({bytes_sent}/{total_bytes} bytes)")
+                if on_progress:
+                    on_progress(bytes_sent, total_bytes)
+        except HttpError as e:
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = f"HTTP {e.resp.status}"
+        except RETRIABLE_EXCEPTIONS as e:
+            error = str(e)
+        else:
+            continue
+
+        retries += 1
+        if retries > YOUTUBE_MAX_RETRIES:
+            raise Exception(f"YouTube upload failed after {YOUTUBE_MAX_RETRIES} retries: {error}")
+        delay = min(2 ** retries, 64) + random.uniform(0, 1)
+        logger.warning(f"YouTube upload chunk failed ({error}), retry {retries}/{YOUTUBE_MAX_RETRIES} after {delay:.2f}s")
+        time.sleep(delay)
+
+    if on_progress:
+        on_progress(total_bytes, total_bytes)
+    return response
+
+def upload_video_file(youtube, video_path, title, description, on_progress=None) -> str:
+    """Upload a local video file with the resumable protocol and return its YouTube id."""
     request_body = {
         "snippet": {
             "title": title,
@@ -46,24 +161,22 @@ def upload_video_youtube(video_url, title, description, thumbnail_url=None):
         }
     }
 
-    media = MediaFileUpload(video_path, resumable=True, mimetype='video/*')
-    response_upload = youtube.videos().insert(
+    media = MediaFileUpload(video_path, chunksize=YOUTUBE_CHUNK_SIZE, resumable=True, mimetype='video/*')
+    insert_request = youtube.videos().insert(
         part="snippet,status",
         body=request_body,
         media_body=media
-    ).execute()
+    )
+    response_upload = resumable_upload(insert_request, os.path.getsize(video_path), on_progress)
+    return response_upload.get("id")
 
-    video_id = response_upload.get("id")
-
-    # Gắn thumbnail nếu có
-    if thumbnail_url:
-        thumbnail_path = download_file(thumbnail_url, suffix=".jpg")
-        youtube.thumbnails().set(
-            videoId=video_id,
-            media_body=MediaFileUpload(thumbnail_path)
-        ).execute()
+def set_thumbnail(youtube, video_id, thumbnail_path):
+    youtube.thumbnails().set(
+        videoId=video_id,
+        media_body=MediaFileUpload(thumbnail_path)
+    ).execute()
 
-    # Trả kết quả
+def upload_result(video_id, title, description, thumbnail_url=None) -> dict:
     return {
         "videoId": video_id,
         "videoUrl": f"https://www.youtube.com/watch?v={video_id}",
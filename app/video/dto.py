@@ -1,11 +1,13 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from app.voice.dto import SceneAudioDetail
 
 class VideoGenerateDTO(BaseModel):
     image_urls: List[str]
-    voices: List[str]
+    voices: List[str] = []
     fps: Optional[int] = None
     duration_per_image: Optional[float] = None
     add_captions: bool = True
     add_transitions: bool = True
-    audio_url: Optional[str] = None
\ No newline at end of file
+    audio_url: Optional[str] = None
+    scenes: Optional[List[SceneAudioDetail]] = None  # MultiTTSResponse.scenes, one per image
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import logging
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Number of decoded scenes held in memory at once (the one being encoded plus look-ahead)
+VIDEO_DECODE_WINDOW = max(1, int(os.getenv("VIDEO_DECODE_WINDOW", "2")))
+
+
+def decoded_scenes(items: Iterable, decode: Callable, window: int = VIDEO_DECODE_WINDOW) -> Iterator[tuple]:
+    """
+    Lazily decode scenes while keeping at most ``window`` decoded scenes alive.
+
+    Decoding of the next scenes runs on a background thread while the caller
+    encodes the current one, so the encoder is not starved but memory stays
+    bounded by the window instead of the scene count.
+
+    Yields:
+        tuple: (item, decoded, error) where ``error`` is the exception raised
+        by ``decode`` (and ``decoded`` is None) if decoding failed.
+    """
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-decode") as pool:
+        def refill():
+            while len(pending) < window:
+                item = next(items, None)
+                if item is None:
+                    return
+                pending.append((item, pool.submit(decode, item)))
+
+        refill()
+        while pending:
+            item, future = pending.popleft()
+            try:
+                decoded, error = future.result(), None
+            except Exception as e:
+                decoded, error = None, e
+            # Drop our reference to the future so the decoded array can be freed
+            # as soon as the caller is done with it.
+            del future
+            yield item, decoded, error
+            decoded = None
+            refill()
+
+
+def frame_count(duration: float, fps: int) -> int:
+    return max(1, int(round(duration * fps)))
+
+
+def scene_frames(frame: np.ndarray, duration: float, fps: int, fade: float = 0.0) -> Iterator[bytes]:
+    """
+    Produce the raw rgb24 frames of one scene just in time for the encoder.
+
+    Frames outside the fade in/out are the same bytes object, so a still scene
+    costs a single frame of memory regardless of its duration.
+    """
+    total = frame_count(duration, fps)
+    fade_frames = min(int(round(fade * fps)), total // 2)
+    still = frame.tobytes()
+    for i in range(total):
+        if i < fade_frames:
+            alpha = i / fade_frames
+        elif i >= total - fade_frames:
+            alpha = (total - 1 - i) / fade_frames
+        else:
+            yield still
+            continue
+        yield (frame * alpha).astype(np.uint8).tobytes()
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from app.video.dto import VideoGenerateDTO
+from app.video.service import VideoService, RenderControl, RenderCancelled
+from app.video.repo import (
+    insert_video_job,
+    update_video_job,
+    get_video_job,
+    record_rendered_video,
+    report_video_job_progress,
+    request_video_job_cancel,
+    start_video_job
+)
+
+logger = logging.getLogger(__name__)
+
+VIDEO_PREVIEW_WORKERS = int(os.getenv("VIDEO_PREVIEW_WORKERS", "2"))
+VIDEO_FINAL_WORKERS = int(os.getenv("VIDEO_FINAL_WORKERS", "1"))
+VIDEO_ASSET_DIR = os.getenv("VIDEO_ASSET_DIR", os.path.join(tempfile.gettempdir(), "video_assets"))
+VIDEO_ASSET_TTL_SECONDS = int(os.getenv("VIDEO_ASSET_TTL_SECONDS", "1800"))
+VIDEO_CANCEL_TIMEOUT = float(os.getenv("VIDEO_CANCEL_TIMEOUT", "10.0"))  # Max seconds a cancel waits for cleanup
+
+
+class VideoJobQueue:
+    """
+    Background render queue with one lane per render mode.
+
+    Preview and final renders run on separate thread pools so a preview never
+    waits behind a long final render. Every job downloads and decodes its
+    assets into ``VIDEO_ASSET_DIR/<job_id>``; a final render promoted from a
+    preview reuses the preview's directory instead of fetching everything again.
+
+    Running jobs report frame-level progress to the video_jobs collection and
+    can be cancelled, which kills the encoder and removes the job's temp files.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.service = VideoService()
+        self.lanes = {
+            "preview": ThreadPoolExecutor(max_workers=VIDEO_PREVIEW_WORKERS, thread_name_prefix="video-preview"),
+            "final": ThreadPoolExecutor(max_workers=VIDEO_FINAL_WORKERS, thread_name_prefix="video-final"),
+        }
+        self._lock = threading.Lock()
+        self._asset_users = {}  # asset dir -> number of queued or running jobs using it
+        self._controls = {}  # job_id -> (RenderControl, Event set once the job has cleaned up)
+        os.makedirs(VIDEO_ASSET_DIR, exist_ok=True)
+
+    def submit(self, dto: VideoGenerateDTO, owner_id: str, mode: str = "final", source_job_id: str = None) -> str:
+        """
+        Queue a render job.
+
+        Returns:
+            str: The job_id to poll with get_job.
+        """
+        if mode not in self.lanes:
+            raise ValueError(f"Unsupported render mode: {mode}")
+
+        self._sweep_assets()
+        job_id = str(uuid.uuid4())
+        asset_dir = os.path.join(VIDEO_ASSET_DIR, source_job_id or job_id)
+        os.makedirs(asset_dir, exist_ok=True)
+        with self._lock:
+            self._asset_users[asset_dir] = self._asset_users.get(asset_dir, 0) + 1
+
+        insert_video_job(job_id, owner_id, mode, dto.model_dump(), source_job_id)
+        control = RenderControl(on_progress=lambda written, total: self._report_progress(job_id, written, total))
+        with self._lock:
+            self._controls[job_id] = (control, threading.Event())
+        self.lanes[mode].submit(self._run, job_id, dto, owner_id, mode, asset_dir, control)
+        logger.info(f"Queued {mode} render job {job_id}")
+        return job_id
+
+    def promote(self, job_id: str, owner_id: str) -> Optional[str]:
+        """
+        Queue a final render of a preview job, reusing its prefetched assets.
+
+        Returns:
+            The new job_id, or None if the preview job does not exist.
+        """
+        job = get_video_job(job_id, owner_id)
+        if not job:
+            return None
+        if job["mode"] != "preview":
+            raise ValueError("Only preview jobs can be promoted")
+        dto = VideoGenerateDTO(**job["request"])
+        return self.submit(dto, owner_id, "final", source_job_id=job_id)
+
+    def get_job(self, job_id: str, owner_id: str) -> Optional[dict]:
+        job = get_video_job(job_id, owner_id)
+        if job:
+            job.pop("request", None)
+        return job
+
+    def cancel(self, job_id: str, owner_id: str) -> Optional[dict]:
+        """
+        Cancel a queued or running job.
+
+        A queued job is marked cancelled and skipped when its turn comes, without
+        waiting. If a running job runs in this process the encoder is killed
+        right away and we wait up to VIDEO_CANCEL_TIMEOUT seconds for its temp
+        files to be removed. Otherwise the worker running it picks the request
+        up on its next progress report.
+
+        Returns:
+            dict: job_id, status and whether cleanup finished, or None if the job does not exist.
+        """
+        job = request_video_job_cancel(job_id, owner_id)
+        if not job:
+            return None
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return {"job_id": job_id, "status": job["status"], "cleaned_up": True}
+
+        with self._lock:
+            entry = self._controls.get(job_id)
+        if job["status"] == "queued":
+            # Nothing has been rendered yet; the job's own slot removes its temp files
+            if entry:
+                entry[0].cancel()
+            return {"job_id": job_id, "status": "cancelled", "cleaned_up": True}
+        if not entry:
+            return {"job_id": job_id, "status": "cancelling", "cleaned_up": False}
+
+        control, done = entry
+        control.cancel()
+        cleaned_up = done.wait(VIDEO_CANCEL_TIMEOUT)
+        return {"job_id": job_id, "status": "cancelled" if cleaned_up else "cancelling", "cleaned_up": cleaned_up}
+
+    def _run(self, job_id: str, dto: VideoGenerateDTO, owner_id: str, mode: str, asset_dir: str,
+             control: RenderControl):
+        try:
+            if not start_video_job(job_id):
+                control.cancel()
+            control.check()
+            video_url = self.service.generate_video(dto, mode=mode, asset_dir=asset_dir, control=control)
+            video_id = record_rendered_video(video_url, owner_id, dto.image_urls) if mode == "final" else None
+            update_video_job(job_id, status="completed", video_url=video_url, video_id=video_id)
+            logger.info(f"Render job {job_id} completed: {video_url}")
+        except RenderCancelled:
+            logger.info(f"Render job {job_id} cancelled")
+            update_video_job(job_id, status="cancelled")
+        except Exception as e:
+            logger.error(f"Render job {job_id} failed: {str(e)}")
+            update_video_job(job_id, status="failed", error=str(e))
+        finally:
+            with self._lock:
+                self._asset_users[asset_dir] -= 1
+                _, done = self._controls.pop(job_id)
+                if control.cancelled.is_set() and self._asset_users[asset_dir] == 0:
+                    shutil.rmtree(asset_dir, ignore_errors=True)
+                    self._asset_users.pop(asset_dir, None)
+            done.set()
+
+    def _report_progress(self, job_id: str, frames_written: int, total_frames: int) -> bool:
+        """Store progress without letting a MongoDB hiccup fail the render."""
+        try:
+            return report_video_job_progress(job_id, frames_written, total_frames)
+        except Exception as e:
+            logger.warning(f"Render job {job_id} progress not saved: {str(e)}")
+            return False
+
+    def _sweep_assets(self):
+        """Delete asset directories that are idle and older than VIDEO_ASSET_TTL_SECONDS."""
+        cutoff = time.time() - VIDEO_ASSET_TTL_SECONDS
+        with self._lock:
+            for name in os.listdir(VIDEO_ASSET_DIR):
+                path = os.path.join(VIDEO_ASSET_DIR, name)
+                if self._asset_users.get(path, 0) > 0:
+                    continue
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                self._asset_users.pop(path, None)
@@ -0,0 +1,151 @@
+import uuid
+from datetime import datetime
+from app.extentions import mongo
+
+def insert_video_job(job_id: str, owner_id: str, mode: str, request: dict, source_job_id: str = None):
+    """
+    Insert a render job document into the MongoDB video_jobs collection.
+
+    Args:
+        job_id: Unique identifier for the job
+        owner_id: ID of the user who requested the render
+        mode: Render mode ("preview" or "final")
+        request: Serialized VideoGenerateDTO used to run (and later promote) the job
+        source_job_id: Preview job this render was promoted from (optional)
+    """
+    try:
+        now = datetime.utcnow()
+        document = {
+            "job_id": job_id,
+            "owner_id": owner_id,
+            "mode": mode,
+            "status": "queued",
+            "request": request,
+            "source_job_id": source_job_id,
+            "video_id": None,
+            "video_url": None,
+            "error": None,
+            "progress": {"frames_written": 0, "total_frames": 0, "percent": 0.0},
+            "cancel_requested": False,
+            "created_at": now,
+            "updated_at": now
+        }
+        mongo.db.video_jobs.insert_one(document)
+    except Exception as e:
+        raise Exception(f"Failed to insert video job into MongoDB: {str(e)}")
+
+def update_video_job(job_id: str, **fields):
+    """
+    Update fields of a render job.
+
+    Args:
+        job_id: Unique identifier for the job
+        fields: Fields to set (e.g. status, video_url, error)
+    """
+    try:
+        fields["updated_at"] = datetime.utcnow()
+        mongo.db.video_jobs.update_one({"job_id": job_id}, {"$set": fields})
+    except Exception as e:
+        raise Exception(f"Failed to update video job in MongoDB: {str(e)}")
+
+def report_video_job_progress(job_id: str, frames_written: int, total_frames: int) -> bool:
+    """
+    Store frame-level progress of a running render.
+
+    Returns:
+        bool: True if a cancel has been requested for the job.
+    """
+    try:
+        percent = round(100.0 * frames_written / total_frames, 1) if total_frames else 0.0
+        job = mongo.db.video_jobs.find_one_and_update(
+            {"job_id": job_id},
+            {"$set": {
+                "progress": {"frames_written": frames_written, "total_frames": total_frames, "percent": percent},
+                "updated_at": datetime.utcnow()
+            }},
+            projection={"cancel_requested": 1}
+        )
+        return bool(job and job.get("cancel_requested"))
+    except Exception as e:
+        raise Exception(f"Failed to update video job progress in MongoDB: {str(e)}")
+
+def request_video_job_cancel(job_id: str, owner_id: str):
+    """
+    Flag a queued or running render job as cancelled.
+
+    A queued job is marked cancelled right away; a running one keeps its
+    status until the worker running it has stopped. Finished jobs are left
+    untouched.
+
+    Returns:
+        The job document as it was before the update (as it is, for a
+        finished job), or None if not found.
+    """
+    try:
+        job = mongo.db.video_jobs.find_one_and_update(
+            {"job_id": job_id, "owner_id": owner_id, "status": {"$in": ["queued", "running"]}},
+            [{"$set": {
+                "cancel_requested": True,
+                "status": {"$cond": [{"$eq": ["$status", "queued"]}, "cancelled", "$status"]},
+                "updated_at": datetime.utcnow()
+            }}],
+            projection={"_id": 0, "request": 0}
+        )
+        if job:
+            return job
+        return mongo.db.video_jobs.find_one({"job_id": job_id, "owner_id": owner_id}, {"_id": 0, "request": 0})
+    except Exception as e:
+        raise Exception(f"Failed to cancel video job in MongoDB: {str(e)}")
+
+def start_video_job(job_id: str) -> bool:
+    """
+    Move a queued render job to running.
+
+    Returns:
+        bool: False if the job is no longer queued (it was cancelled while waiting).
+    """
+    try:
+        result = mongo.db.video_jobs.update_one(
+            {"job_id": job_id, "status": "queued"},
+            {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count == 1
+    except Exception as e:
+        raise Exception(f"Failed to update video job in MongoDB: {str(e)}")
+
+def get_video_job(job_id: str, owner_id: str):
+    """
+    Retrieve a render job owned by a user.
+
+    Returns:
+        The job document without its MongoDB _id, or None.
+    """
+    try:
+        return mongo.db.video_jobs.find_one({"job_id": job_id, "owner_id": owner_id}, {"_id": 0})
+    except Exception as e:
+        raise Exception(f"Failed to retrieve video job from MongoDB: {str(e)}")
+
+def record_rendered_video(video_url: str, owner_id: str, image_urls: list) -> str:
+    """
+    Store a rendered video and link the images it was built from.
+
+    Returns:
+        str: The new video_id.
+    """
+    video_id = str(uuid.uuid4())
+    mongo.db.videos.insert_one({
+        "video_id": video_id,
+        "video_url": video_url,
+        "owner_id": owner_id,
+        "created_at": datetime.utcnow(),
+        "status": "completed"
+    })
+
+    # Update images with video_id
+    images_collection = mongo.db.images
+    for image_url in image_urls:
+        images_collection.update_one(
+            {"url": image_url, "owner_id": owner_id},
+            {"$set": {"video_id": video_id}}
+        )
+    return video_id
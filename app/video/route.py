@@ -1,65 +1,113 @@
-# from flask import Blueprint, jsonify, request
-# from app.video.service import VideoService
-# from app.video.dto import VideoGenerateDTO
-# from flask_jwt_extended import jwt_required, get_jwt_identity
-# import logging
-# import uuid
-# from app.extentions import mongo
-# from datetime import datetime
+from flask import Blueprint, jsonify, request
+from app.video.service import VideoService
+from app.video.jobs import VideoJobQueue
+from app.video.repo import record_rendered_video
+from app.video.dto import VideoGenerateDTO
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import logging
 
-# # Configure logging
-# logging.basicConfig(level=logging.INFO)
-# logger = logging.getLogger(__name__)
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-# class VideoController:
-#     def __init__(self):
-#         self.service = VideoService()
-#         self.video_bp = Blueprint('video_bp', __name__, url_prefix='/api/video')
-#         self._register_routes()
+class VideoController:
+    def __init__(self):
+        self.service = VideoService()
+        self.jobs = VideoJobQueue()
+        self.video_bp = Blueprint('video_bp', __name__, url_prefix='/api/video')
+        self._register_routes()
 
-#     def _register_routes(self):
-#         self.video_bp.add_url_rule('/', view_func=self.gen_video, methods=['POST'])
+    def _register_routes(self):
+        self.video_bp.add_url_rule('/', view_func=self.gen_video, methods=['POST'])
+        self.video_bp.add_url_rule('/jobs', view_func=self.create_job, methods=['POST'])
+        self.video_bp.add_url_rule('/jobs/<string:job_id>', view_func=self.get_job, methods=['GET'])
+        self.video_bp.add_url_rule('/jobs/<string:job_id>', view_func=self.cancel_job, methods=['DELETE'])
+        self.video_bp.add_url_rule('/jobs/<string:job_id>/promote', view_func=self.promote_job, methods=['POST'])
 
-#     @jwt_required()
-#     def gen_video(self):
-#         """Generate a video from image URLs and voices."""
-#         try:
-#             data = request.json
-#             if not data or 'image_urls' not in data or 'voices' not in data:
-#                 logger.error("Missing image_urls or voices in request body")
-#                 return jsonify({"error": "image_urls and voices are required"}), 400
+    @jwt_required()
+    def gen_video(self):
+        """Generate a video from image URLs and voices."""
+        try:
+            data = request.json
+            if not data or 'image_urls' not in data or ('voices' not in data and 'scenes' not in data):
+                logger.error("Missing image_urls or voices/scenes in request body")
+                return jsonify({"error": "image_urls and voices or scenes are required"}), 400
             
-#             user_id = get_jwt_identity()
-#             logger.info(f"Processing video generation for user_id: {user_id}")
+            user_id = get_jwt_identity()
+            logger.info(f"Processing video generation for user_id: {user_id}")
             
-#             dto = VideoGenerateDTO(**data)
-#             video_url = self.service.generate_video(dto)
+            dto = VideoGenerateDTO(**data)
+            video_url = self.service.generate_video(dto)
             
-#             # Store video metadata in MongoDB
-#             video_id = str(uuid.uuid4())
-#             mongo.db.videos.insert_one({
-#                 "video_id": video_id,
-#                 "video_url": video_url,
-#                 "owner_id": user_id,
-#                 "created_at": datetime.utcnow(),
-#                 "status": "completed"
-#             })
+            # Store video metadata in MongoDB
+            video_id = record_rendered_video(video_url, user_id, data["image_urls"])
             
-#             # Update images with video_id
-#             images_collection = mongo.db.images
-#             for image_url in data["image_urls"]:
-#                 images_collection.update_one(
-#                     {"url": image_url, "owner_id": user_id},
-#                     {"$set": {"video_id": video_id}}
-#                 )
-            
-#             return jsonify({"video_id": video_id, "video_url": video_url}), 200
-#         except ValueError as e:
-#             logger.error(f"ValueError in gen_video: {str(e)}")
-#             return jsonify({"error": str(e)}), 400
-#         except Exception as e:
-#             logger.error(f"Unexpected error in gen_video: {str(e)}")
-#             return jsonify({"error": "Internal server error"}), 500
+            return jsonify({"video_id": video_id, "video_url": video_url}), 200
+        except ValueError as e:
+            logger.error(f"ValueError in gen_video: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logger.error(f"Unexpected error in gen_video: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
+
+    @jwt_required()
+    def create_job(self):
+        """Queue a preview or final render and return its job id."""
+        try:
+            data = request.json
+            if not data or 'image_urls' not in data or ('voices' not in data and 'scenes' not in data):
+                logger.error("Missing image_urls or voices/scenes in request body")
+                return jsonify({"error": "image_urls and voices or scenes are required"}), 400
+
+            mode = data.pop('mode', 'final')
+            dto = VideoGenerateDTO(**data)
+            job_id = self.jobs.submit(dto, get_jwt_identity(), mode)
+            return jsonify({"job_id": job_id, "mode": mode, "status": "queued"}), 202
+        except ValueError as e:
+            logger.error(f"ValueError in create_job: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logger.error(f"Unexpected error in create_job: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
+
+    @jwt_required()
+    def get_job(self, job_id):
+        """Get the state of a render job."""
+        try:
+            job = self.jobs.get_job(job_id, get_jwt_identity())
+            if not job:
+                return jsonify({"error": "Job not found"}), 404
+            return jsonify(job), 200
+        except Exception as e:
+            logger.error(f"Unexpected error in get_job: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
+
+    @jwt_required()
+    def cancel_job(self, job_id):
+        """Cancel a render job, killing its encoder and removing its temp files."""
+        try:
+            result = self.jobs.cancel(job_id, get_jwt_identity())
+            if not result:
+                return jsonify({"error": "Job not found"}), 404
+            return jsonify(result), 200 if result["cleaned_up"] else 202
+        except Exception as e:
+            logger.error(f"Unexpected error in cancel_job: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
+
+    @jwt_required()
+    def promote_job(self, job_id):
+        """Promote a preview render to a final render that reuses its assets."""
+        try:
+            new_job_id = self.jobs.promote(job_id, get_jwt_identity())
+            if not new_job_id:
+                return jsonify({"error": "Job not found"}), 404
+            return jsonify({"job_id": new_job_id, "mode": "final", "status": "queued"}), 202
+        except ValueError as e:
+            logger.error(f"ValueError in promote_job: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logger.error(f"Unexpected error in promote_job: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
 
-# video_controller = VideoController()
-# video_bp = video_controller.video_bp
\ No newline at end of file
+video_controller = VideoController()
+video_bp = video_controller.video_bp
\ No newline at end of file
@@ -0,0 +1,113 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import uuid
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_CACHE_DIR = os.getenv("VIDEO_SEGMENT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "video_segments"))
+SEGMENT_CACHE_MAX_BYTES = int(os.getenv("VIDEO_SEGMENT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+
+class SegmentCache:
+    """
+    Local disk cache of encoded scene segments.
+
+    Segments are stored as ``<key>.mp4`` where the key is a hash of everything
+    that influences the encoded output. When the cache grows past ``max_bytes``
+    the least recently used segments are evicted.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, root: str = SEGMENT_CACHE_DIR, max_bytes: int = SEGMENT_CACHE_MAX_BYTES):
+        if self._initialized:
+            return
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._initialized = True
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Build a stable cache key from the parts that define a segment."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.mp4")
+
+    def checkout(self, key: str, dest: str) -> bool:
+        """
+        Link (or copy) a cached segment to ``dest``.
+
+        The link keeps the segment usable by the caller even if it is evicted
+        while the final video is being assembled.
+
+        Returns:
+            bool: True on cache hit, False otherwise.
+        """
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                return False
+            os.utime(path, None)
+            try:
+                os.link(path, dest)
+            except OSError:
+                shutil.copyfile(path, dest)
+        return True
+
+    def put(self, key: str, src: str) -> str:
+        """Store an encoded segment under ``key`` and return its cache path."""
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(src, tmp_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used segments until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.root):
+                if not name.endswith(".mp4"):
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.info(f"Evicted segment {os.path.basename(path)} from cache")
+                except FileNotFoundError:
+                    pass
+                if total <= self.max_bytes:
+                    break
@@ -1,152 +1,443 @@
-# import os
-# import uuid
-# import requests
-# import numpy as np
-# from PIL import Image, ImageDraw, ImageFont
-# from moviepy import ImageClip, concatenate_videoclips
-# from app.video.dto import VideoGenerateDTO
-# from dotenv import load_dotenv
-# import logging
-# import tempfile
-# import shutil
-
-# import cloudinary
-# from cloudinary import CloudinaryImage 
-# import cloudinary.uploader
-# import cloudinary.api
-# # Configure logging
-# logging.basicConfig(level=logging.INFO)
-# logger = logging.getLogger(__name__)
-
-# # Load environment variables
-# load_dotenv()
-
-
-# class VideoService:
-#     _instance = None
-    
-#     DEFAULT_FPS = 24
-#     DEFAULT_DURATION = 2  # Seconds per image
-#     DEFAULT_RESOLUTION = (1024, 1024)
-    
-#     def __new__(cls, *args, **kwargs):
-#         if not cls._instance:
-#             cls._instance = super().__new__(cls, *args, **kwargs)
-#         return cls._instance
-    
-#     def __init__(self):
-#         config = cloudinary.config(secure=True)
-
-#     def generate_video(self, dto: VideoGenerateDTO) -> str:
-#         """
-#         Generate a video from image URLs with transitions and captions from voice text,
-#         and upload to Cloudinary.
-        
-#         Args:
-#             dto: Data Transfer Object containing image URLs, voices, and video parameters
-            
-#         Returns:
-#             str: Cloudinary URL of the generated video
-#         """
-#         if not dto.image_urls or not dto.voices or len(dto.image_urls) != len(dto.voices):
-#             logger.error("Invalid input: image_urls and voices must be non-empty and equal length")
-#             raise ValueError("Image URLs and voices must be provided and match in number")
-        
-#         logger.info(f"Generating video with {len(dto.image_urls)} images")
-        
-#         temp_dir = tempfile.mkdtemp()
-#         video_filename = os.path.join(temp_dir, f"video_{uuid.uuid4()}.mp4")
-        
-#         try:
-#             fps = dto.fps if dto.fps else self.DEFAULT_FPS
-#             duration = dto.duration_per_image if dto.duration_per_image else self.DEFAULT_DURATION
-#             clips = []
-            
-#             for i, (image_url, voice) in enumerate(zip(dto.image_urls, dto.voices)):
-#                 logger.info(f"Processing image {i+1}/{len(dto.image_urls)}: {image_url[:50]}...")
-                
-#                 try:
-#                     response = requests.get(image_url, stream=True)
-#                     response.raise_for_status()
-#                     img = Image.open(response.raw).convert("RGB")
-#                     img = img.resize(self.DEFAULT_RESOLUTION, Image.LANCZOS)
-                    
-#                     if dto.add_captions and voice:
-#                         try:
-#                             font = ImageFont.truetype("arial.ttf", 40)
-#                         except:
-#                             font = ImageFont.load_default()
-                        
-#                         draw = ImageDraw.Draw(img)
-#                         caption = voice
-#                         bbox = draw.textbbox((0, 0), caption, font=font)
-#                         text_width = bbox[2] - bbox[0]
-#                         text_height = bbox[3] - bbox[1]
-                        
-#                         position = ((img.width - text_width) // 2, img.height - text_height - 30)
-#                         draw.rectangle(
-#                             [position, (position[0] + text_width, position[1] + text_height)],
-#                             fill=(0, 0, 0, 180)
-#                         )
-#                         draw.text(position, caption, font=font, fill=(255, 255, 255))
-                    
-#                     temp_path = os.path.join(temp_dir, f"temp_{i}.png")
-#                     img.save(temp_path)
-                    
-#                     img_array = np.array(Image.open(temp_path))
-#                     clip = ImageClip(img_array, duration=duration)
-                    
-#                     if dto.add_transitions:
-#                         clip = clip.fadein(0.5).fadeout(0.5)
-                    
-#                     clips.append(clip)
-                    
-#                 except Exception as e:
-#                     logger.error(f"Error processing image {image_url}: {str(e)}")
-#                     continue
-            
-#             if not clips:
-#                 raise ValueError("No valid images to create video")
-            
-#             final_clip = concatenate_videoclips(clips, method="compose")
-            
-#             if dto.audio_url:
-#                 try:
-#                     response = requests.get(dto.audio_url, stream=True)
-#                     response.raise_for_status()
-#                     audio_temp = os.path.join(temp_dir, "audio.mp3")
-#                     with open(audio_temp, "wb") as f:
-#                         shutil.copyfileobj(response.raw, f)
-                    
-#                     from moviepy import AudioFileClip
-#                     audio = AudioFileClip(audio_temp)
-#                     if audio.duration < final_clip.duration:
-#                         audio = audio.loop(duration=final_clip.duration)
-#                     else:
-#                         audio = audio.subclip(0, final_clip.duration)
-                    
-#                     final_clip = final_clip.set_audio(audio)
-#                 except Exception as e:
-#                     logger.error(f"Error adding audio {dto.audio_url}: {str(e)}")
-            
-#             final_clip.write_videofile(video_filename, fps=fps, codec='libx264')
-#             logger.info(f"Video generated locally: {video_filename}")
-            
-#             # Upload to Cloudinary
-#             logger.info(f"Uploading video to Cloudinary: {video_filename}")
-#             upload_response = cloudinary.uploader.upload(
-#                 video_filename,
-#                 resource_type="video",
-#                 public_id=f"videos/video_{uuid.uuid4()}",
-#                 folder="user_videos"
-#             )
-#             video_url = upload_response["secure_url"]
-#             logger.info(f"Video uploaded to Cloudinary: {video_url}")
-            
-#             return video_url
-            
-#         except Exception as e:
-#             logger.error(f"Error creating or uploading video: {str(e)}")
-#             raise e
-#         finally:
-#             shutil.rmtree(temp_dir, ignore_errors=True)
\ No newline at end of file
+import os
+import uuid
+import hashlib
+import subprocess
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from app.video.dto import VideoGenerateDTO
+from app.video.segment_cache import SegmentCache
+from app.video.frames import decoded_scenes, scene_frames, frame_count
+from dotenv import load_dotenv
+import logging
+import tempfile
+import shutil
+import threading
+import time
+
+from app.storage.service import get_storage
+from app.storage.executor import UploadExecutor
+from app.storage.media_cache import MediaCache
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+VIDEO_PROGRESS_INTERVAL = float(os.getenv("VIDEO_PROGRESS_INTERVAL", "1.0"))  # Seconds between progress reports
+VIDEO_KILL_TIMEOUT = float(os.getenv("VIDEO_KILL_TIMEOUT", "5.0"))  # Seconds before SIGTERM escalates to SIGKILL
+
+
+class RenderCancelled(Exception):
+    """Raised inside a render when its job has been cancelled."""
+
+
+class RenderControl:
+    """
+    Progress and cancellation handle shared between a render and its job.
+
+    The render reports every frame it writes; ``on_progress`` is called at most
+    every VIDEO_PROGRESS_INTERVAL seconds with (frames_written, total_frames).
+    If ``on_progress`` returns True the render is cancelled, which lets a
+    cancel request recorded by another worker reach the one running the job.
+    """
+
+    def __init__(self, on_progress=None):
+        self.cancelled = threading.Event()
+        self.total_frames = 0
+        self.frames_written = 0
+        self._on_progress = on_progress
+        self._last_report = 0.0
+        self._process = None
+        self._lock = threading.Lock()
+
+    def attach(self, process):
+        with self._lock:
+            self._process = process
+        if self.cancelled.is_set():
+            self._kill(process)
+
+    def detach(self):
+        with self._lock:
+            self._process = None
+
+    def advance(self, frames: int = 1, force: bool = False):
+        self.frames_written += frames
+        now = time.monotonic()
+        if self._on_progress and (force or now - self._last_report >= VIDEO_PROGRESS_INTERVAL):
+            self._last_report = now
+            if self._on_progress(self.frames_written, self.total_frames):
+                self.cancel()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise RenderCancelled("Render cancelled")
+
+    def cancel(self):
+        """Stop the render and kill the encoder subprocess, if one is running."""
+        self.cancelled.set()
+        with self._lock:
+            process = self._process
+        if process:
+            self._kill(process)
+
+    def _kill(self, process):
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=VIDEO_KILL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class VideoService:
+    _instance = None
+
+    DEFAULT_FPS = 24
+    DEFAULT_DURATION = 2  # Seconds per image
+    DEFAULT_RESOLUTION = (1024, 1024)
+    TRANSITION_DURATION = 0.5  # Seconds of fade in/out per scene
+    BASE_FONT_SIZE = 40  # Caption size at DEFAULT_RESOLUTION
+
+    # Encoder settings per render mode. Preview renders are meant to check scene
+    # order and timing, so they trade quality for speed.
+    RENDER_PROFILES = {
+        "final": {"height": None, "fps": None, "preset": "medium"},
+        "preview": {"height": 360, "fps": 12, "preset": "ultrafast"},
+    }
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        self.storage = get_storage()
+        self.segment_cache = SegmentCache()
+        self.media_cache = MediaCache()
+
+    def generate_video(self, dto: VideoGenerateDTO, mode: str = "final", asset_dir: str = None,
+                       control: RenderControl = None) -> str:
+        """
+        Generate a video from image URLs with transitions and captions from voice text,
+        and upload it through the storage backend.
+
+        When ``dto.scenes`` (the scene list of a MultiTTSResponse) is given, each
+        segment lasts exactly as long as its narration and the narration audio is
+        muxed into the segment in the same ffmpeg pass.
+
+        Every scene is encoded as an independent segment and stored in the
+        segment cache, so re-rendering a workspace after changing one scene only
+        re-encodes that scene. The final video is assembled with ffmpeg's concat
+        demuxer without re-encoding.
+
+        Frames are generated lazily and piped to the encoder, with at most
+        ``VIDEO_DECODE_WINDOW`` decoded scenes in memory, so memory use does not
+        grow with the number of scenes.
+
+        Args:
+            dto: Data Transfer Object containing image URLs, voices, and video parameters
+            mode: "final" for a full quality render, "preview" for a fast low resolution one
+            asset_dir: Directory holding prefetched and decoded assets. Passing the
+                directory of a preview render lets the final render reuse its downloads.
+            control: Receives frame-level progress and can cancel the render (optional).
+
+        Returns:
+            str: URL of the generated video
+        """
+        if mode not in self.RENDER_PROFILES:
+            raise ValueError(f"Unsupported render mode: {mode}")
+        if dto.scenes is not None:
+            if not dto.image_urls or len(dto.image_urls) != len(dto.scenes):
+                logger.error("Invalid input: image_urls and scenes must be non-empty and equal length")
+                raise ValueError("Image URLs and scenes must be provided and match in number")
+            if dto.voices and len(dto.voices) != len(dto.scenes):
+                raise ValueError("Voices and scenes must match in number")
+        elif not dto.image_urls or not dto.voices or len(dto.image_urls) != len(dto.voices):
+            logger.error("Invalid input: image_urls and voices must be non-empty and equal length")
+            raise ValueError("Image URLs and voices must be provided and match in number")
+
+        logger.info(f"Generating {mode} video with {len(dto.image_urls)} images")
+
+        temp_dir = tempfile.mkdtemp()
+        video_filename = os.path.join(temp_dir, f"video_{uuid.uuid4()}.mp4")
+        asset_dir = asset_dir or os.path.join(temp_dir, "assets")
+        os.makedirs(asset_dir, exist_ok=True)
+        control = control or RenderControl()
+
+        try:
+            profile = self._render_profile(dto, mode)
+            duration = dto.duration_per_image if dto.duration_per_image else self.DEFAULT_DURATION
+            scenes = self._build_scenes(dto, duration, profile)
+            segments = [None] * len(scenes)
+            to_encode = []
+            control.total_frames = sum(frame_count(scene["duration"], profile["fps"]) for scene in scenes)
+
+            for i, scene in enumerate(scenes):
+                segment_path = os.path.join(temp_dir, f"segment_{i}.mp4")
+                key = self._segment_key(scene, profile)
+                if self.segment_cache.checkout(key, segment_path):
+                    logger.info(f"Segment {i+1}/{len(scenes)} served from cache")
+                    segments[i] = segment_path
+                    control.advance(frame_count(scene["duration"], profile["fps"]))
+                else:
+                    to_encode.append((i, key, segment_path))
+
+            def decode(item):
+                return self._render_frame(scenes[item[0]], asset_dir)
+
+            for (i, key, segment_path), frame, error in decoded_scenes(to_encode, decode):
+                scene = scenes[i]
+                control.check()
+                logger.info(f"Encoding segment {i+1}/{len(scenes)}: {scene['image_url'][:50]}...")
+                written_before = control.frames_written
+                try:
+                    if error:
+                        raise error
+                    self._encode_segment(scene, frame, profile, asset_dir, temp_dir, segment_path, control)
+                except RenderCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing image {scene['image_url']}: {str(e)}")
+                    # Count the skipped scene as done so progress still reaches 100%
+                    expected = frame_count(scene["duration"], profile["fps"])
+                    control.advance(expected - (control.frames_written - written_before))
+                    continue
+                finally:
+                    frame = None
+                self.segment_cache.put(key, segment_path)
+                segments[i] = segment_path
+
+            total_duration = sum(scene["duration"] for scene, path in zip(scenes, segments) if path)
+            segments = [path for path in segments if path]
+            if not segments:
+                raise ValueError("No valid images to create video")
+
+            background_audio = None
+            if dto.audio_url and dto.scenes is None:
+                try:
+                    background_audio = self._fetch_asset(dto.audio_url, asset_dir)
+                except Exception as e:
+                    logger.error(f"Error adding audio {dto.audio_url}: {str(e)}")
+
+            control.check()
+            self._concat_segments(segments, temp_dir, video_filename, background_audio, total_duration, control)
+            control.check()
+
+            logger.info(f"Video generated locally: {video_filename}")
+
+            # Upload to storage
+            logger.info(f"Uploading video to storage: {video_filename}")
+            with open(video_filename, "rb") as f:
+                upload_response = UploadExecutor().put_stream(
+                    f,
+                    f"user_videos/{'previews/preview' if mode == 'preview' else 'videos/video'}_{uuid.uuid4()}",
+                    resource_type="video",
+                    content_type="video/mp4",
+                    # Previews never become videos, so nothing would ever release their refcount
+                    dedupe=mode != "preview"
+                ).result()
+            video_url = upload_response["url"]
+            logger.info(f"Video uploaded to storage: {video_url}")
+
+            control.advance(0, force=True)
+            return video_url
+
+        except Exception as e:
+            logger.error(f"Error creating or uploading video: {str(e)}")
+            raise e
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _render_profile(self, dto: VideoGenerateDTO, mode: str) -> dict:
+        """Resolve the output resolution, fps and encoder preset for a render mode."""
+        profile = self.RENDER_PROFILES[mode]
+        width, height = self.DEFAULT_RESOLUTION
+        if profile["height"]:
+            # Keep the aspect ratio and an even width, as required by yuv420p
+            width = int(round(width * profile["height"] / height / 2)) * 2
+            height = profile["height"]
+        fps = profile["fps"] or dto.fps or self.DEFAULT_FPS
+        return {"resolution": (width, height), "fps": fps, "preset": profile["preset"]}
+
+    def _build_scenes(self, dto: VideoGenerateDTO, duration: float, profile: dict) -> list[dict]:
+        """Describe every scene of the video as a plain dict."""
+        scenes = []
+        for i, image_url in enumerate(dto.image_urls):
+            narration = dto.scenes[i] if dto.scenes is not None else None
+            voice = dto.voices[i] if dto.voices else narration.script
+            scenes.append({
+                "image_url": image_url,
+                "audio_url": narration.audio_url if narration else None,
+                "caption": voice if dto.add_captions and voice else None,
+                "transition": "fade" if dto.add_transitions else None,
+                # Size the segment to its narration; fall back when the provider reported no duration
+                "duration": narration.duration if narration and narration.duration > 0 else duration,
+                "resolution": profile["resolution"],
+            })
+        return scenes
+
+    def _segment_key(self, scene: dict, profile: dict) -> str:
+        """Hash everything that changes the encoded bytes of a segment."""
+        return self.segment_cache.make_key(
+            image_url=scene["image_url"],
+            audio_url=scene["audio_url"],
+            caption=scene["caption"],
+            transition=scene["transition"],
+            resolution=list(scene["resolution"]),
+            duration=round(scene["duration"], 3),
+            fps=profile["fps"],
+            preset=profile["preset"],
+        )
+
+    def _fetch_asset(self, url: str, asset_dir: str) -> str:
+        """Link a remote asset from the shared media cache into ``asset_dir`` unless it is already there."""
+        path = os.path.join(asset_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+        if os.path.exists(path):
+            return path
+
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self.media_cache.checkout(url, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def _decoded_image(self, url: str, asset_dir: str) -> str:
+        """
+        Decode and resize a scene image to the full render resolution once.
+
+        The result is kept next to the downloaded asset so preview and final
+        renders of the same scene share the decode work.
+        """
+        source = self._fetch_asset(url, asset_dir)
+        path = f"{source}.png"
+        if not os.path.exists(path):
+            img = Image.open(source).convert("RGB")
+            img = img.resize(self.DEFAULT_RESOLUTION, Image.LANCZOS)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.png"
+            img.save(tmp_path)
+            os.replace(tmp_path, path)
+        return path
+
+    def _render_frame(self, scene: dict, asset_dir: str) -> np.ndarray:
+        """Scale the decoded scene image to the render resolution and burn in the caption."""
+        img = Image.open(self._decoded_image(scene["image_url"], asset_dir))
+        if img.size != tuple(scene["resolution"]):
+            img = img.resize(scene["resolution"], Image.LANCZOS)
+
+        if scene["caption"]:
+            font_size = max(12, self.BASE_FONT_SIZE * img.height // self.DEFAULT_RESOLUTION[1])
+            try:
+                font = ImageFont.truetype("arial.ttf", font_size)
+            except:
+                font = ImageFont.load_default()
+
+            draw = ImageDraw.Draw(img)
+            caption = scene["caption"]
+            bbox = draw.textbbox((0, 0), caption, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+
+            margin = 30 * img.height // self.DEFAULT_RESOLUTION[1]
+            position = ((img.width - text_width) // 2, img.height - text_height - margin)
+            draw.rectangle(
+                [position, (position[0] + text_width, position[1] + text_height)],
+                fill=(0, 0, 0, 180)
+            )
+            draw.text(position, caption, font=font, fill=(255, 255, 255))
+
+        return np.asarray(img, dtype=np.uint8)
+
+    def _encode_segment(self, scene: dict, frame: np.ndarray, profile: dict, asset_dir: str,
+                        temp_dir: str, output_path: str, control: RenderControl):
+        """Encode a single scene into an H.264 segment from frames piped to ffmpeg."""
+        fps = profile["fps"]
+        width, height = scene["resolution"]
+        duration = scene["duration"]
+        fade = min(self.TRANSITION_DURATION, duration / 2) if scene["transition"] == "fade" else 0.0
+
+        inputs = ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-framerate", str(fps), "-i", "pipe:0"]
+        audio_args = []
+        if scene["audio_url"]:
+            inputs += ["-i", self._fetch_asset(scene["audio_url"], asset_dir)]
+            # Fixed audio parameters keep every segment concat-compatible
+            audio_args = ["-map", "0:v", "-map", "1:a", "-c:a", "aac", "-b:a", "128k", "-ar", "44100", "-ac", "2"]
+
+        self._run_ffmpeg([
+            *inputs,
+            "-t", f"{duration:.3f}",
+            "-c:v", "libx264", "-preset", profile["preset"], "-pix_fmt", "yuv420p",
+            *audio_args,
+            output_path,
+        ], frames=scene_frames(frame, duration, fps, fade), log_dir=temp_dir, control=control)
+
+    def _concat_segments(self, segments: list[str], temp_dir: str, output_path: str,
+                         background_audio: str = None, duration: float = None, control: RenderControl = None):
+        """
+        Join encoded segments with the concat demuxer, copying the video stream.
+
+        A background track, if any, is looped or trimmed to ``duration`` by
+        ffmpeg in the same pass.
+        """
+        list_path = os.path.join(temp_dir, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for segment in segments:
+                f.write(f"file '{segment}'\n")
+
+        args = ["-f", "concat", "-safe", "0", "-i", list_path]
+        if background_audio:
+            args += [
+                "-stream_loop", "-1", "-i", background_audio,
+                "-map", "0:v", "-map", "1:a",
+                "-c:v", "copy", "-c:a", "aac", "-t", f"{duration:.3f}",
+            ]
+        else:
+            args += ["-c", "copy"]
+        self._run_ffmpeg([*args, "-movflags", "+faststart", output_path], log_dir=temp_dir, control=control)
+
+    def _run_ffmpeg(self, args: list[str], frames=None, log_dir: str = None, control: RenderControl = None):
+        """
+        Run ffmpeg and surface its stderr on failure.
+
+        When ``frames`` is given, each raw frame is written to ffmpeg's stdin as
+        it is produced and reported to ``control``. stderr goes to a file in
+        ``log_dir`` so a chatty encoder can never block on a full pipe while we
+        are writing. The process is registered with ``control`` so a cancel
+        request can kill it.
+        """
+        command = [FFMPEG_BIN, "-y", "-hide_banner", "-loglevel", "error", *args]
+        with tempfile.TemporaryFile(dir=log_dir) as stderr:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+                stderr=stderr,
+            )
+            if control:
+                control.attach(process)
+            try:
+                if frames is not None:
+                    try:
+                        for raw in frames:
+                            if control:
+                                control.check()
+                            process.stdin.write(raw)
+                            if control:
+                                control.advance()
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                returncode = process.wait()
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                if control:
+                    control.detach()
+
+            if control:
+                control.check()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"ffmpeg failed: {stderr.read().decode('utf-8', 'ignore').strip()}")
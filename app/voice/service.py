@@ -1,20 +1,11 @@
 import os
 import uuid
 import logging
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-import tempfile
 import re
 from google.cloud import texttospeech
 from elevenlabs.client import ElevenLabs
 from app.voice.dto import VoiceSchema, GCTTSRequest, VoiceCloneRequest, ElevenlabsTTSRequest
-
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+from app.storage.executor import UploadExecutor
 
 logger = logging.getLogger(__name__)
 class VoiceService:
@@ -70,23 +61,29 @@ class VoiceService:
         if not narrations:
             raise ValueError("No valid narration found in the script.")
 
-        scene_details = []
+        uploads = []
         voice_used = ""
 
+        # Synthesis stays sequential; each upload runs on the upload executor
+        # while the next narration is being synthesized.
         for i, narration_text in enumerate(narrations):
             logger.info(f"Generating audio for scene {i+1}/{len(narrations)}...")
             
             if isinstance(dto, GCTTSRequest):
                 single_dto = dto.model_copy(update={'script': narration_text})
-                audio_data = self.gctts_generate_tts(single_dto)
+                upload = self._upload_audio(self._gctts_synthesize(single_dto), "gctts")
                 voice_used = single_dto.voice_name
             elif isinstance(dto, ElevenlabsTTSRequest):
                 single_dto = dto.model_copy(update={'script': narration_text})
-                audio_data = self.elevenlabs_generate_tts(single_dto)
+                upload = self._upload_audio(self._elevenlabs_synthesize(single_dto), "elevenlabs")
                 voice_used = single_dto.voice_id
             else:
                 raise TypeError("Unsupported DTO type for TTS generation.")
+            uploads.append((narration_text, upload))
 
+        scene_details = []
+        for i, (narration_text, upload) in enumerate(uploads):
+            audio_data = self._audio_result(upload.result())
             scene_details.append({
                 "scene_index": i + 1,
                 "script": narration_text,
@@ -100,7 +97,27 @@ class VoiceService:
             "voice_used": voice_used
         }
     
+    def _upload_audio(self, audio: bytes, provider: str):
+        """Queue an MP3 upload under ``<provider>/<provider>_<uuid>``; returns a future."""
+        return UploadExecutor().put_bytes(
+            audio,
+            f"{provider}/{provider}_{uuid.uuid4()}",
+            resource_type='video',
+            content_type='audio/mpeg'
+        )
+
+    @staticmethod
+    def _audio_result(upload_result: dict) -> dict:
+        return {
+            "audio_url": upload_result['url'],
+            "duration": upload_result.get('duration') or 0.0
+        }
+
     def gctts_generate_tts(self, dto: GCTTSRequest) -> dict:
+        audio = self._gctts_synthesize(dto)
+        return self._audio_result(self._upload_audio(audio, "gctts").result())
+
+    def _gctts_synthesize(self, dto: GCTTSRequest) -> bytes:
         if not self._gctts_client:
             self._initialize_gctts_client()
         
@@ -142,30 +159,11 @@ class VoiceService:
                 audio_config=audio_config
             )
             
-            filename = f"{uuid.uuid4()}.mp3"
-            temp_dir = tempfile.mkdtemp()
-            output_path = os.path.join(temp_dir, filename)
-            with open(output_path, "wb") as f:
-                f.write(response.audio_content)
-            
         except Exception as e:
             logger.error(f"Error generating TTS: {e}")
             raise e
         
-        cloudinary_response = cloudinary.uploader.upload(
-            output_path,
-            folder='gctts',
-            resource_type='video',
-            public_id=f"gctts_{uuid.uuid4()}"
-        )
-        
-        # remove the local file after upload
-        os.remove(output_path)
-        
-        return {
-            "audio_url": cloudinary_response['secure_url'],
-            "duration": cloudinary_response.get('duration', 0.0)
-        }
+        return response.audio_content
     
     # ElevenLabs TTS and Voice Cloning
     def _initialize_elevenlabs_client(self):
@@ -207,6 +205,10 @@ class VoiceService:
             raise e
     
     def elevenlabs_generate_tts(self, dto: ElevenlabsTTSRequest) -> dict:
+        audio = self._elevenlabs_synthesize(dto)
+        return self._audio_result(self._upload_audio(audio, "elevenlabs").result())
+
+    def _elevenlabs_synthesize(self, dto: ElevenlabsTTSRequest) -> bytes:
         if not self._elevenlabs_client:
             self._initialize_elevenlabs_client()
 
@@ -224,27 +226,7 @@ class VoiceService:
                 output_format="mp3_44100_128",
             )
             
-            audio_data = b"".join([chunk for chunk in audio])
-            filename = f"{uuid.uuid4()}.mp3"
-            temp_dir = tempfile.mkdtemp()
-            output_path = os.path.join(temp_dir, filename)
-            with open(output_path, "wb") as f:
-                f.write(audio_data)
-            
-            cloudinary_response = cloudinary.uploader.upload(
-                output_path,
-                folder='elevenlabs',
-                resource_type='video',
-                public_id=f"elevenlabs_{uuid.uuid4()}"
-            )
-            
-            # remove the local file after upload
-            os.remove(output_path)
-                        
-            return {
-                "audio_url": cloudinary_response['secure_url'],
-                "duration": cloudinary_response.get('duration', 0.0)
-            }
+            return b"".join([chunk for chunk in audio])
         except Exception as e:
             logger.error(f"Error generating TTS with ElevenLabs: {e}")
             raise e
@@ -0,0 +1,121 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("flask_pymongo")
+
+from app.singleflight import SingleFlight
+from app.tiktok import snapshot
+
+CALLERS = 8
+VIDEOS = [
+    {"id": "v2", "create_time": 1700000100, "title": "second", "view_count": 20},
+    {"id": "v1", "create_time": 1700000000, "title": "first", "view_count": 10},
+]
+
+
+class CountingTikTok(BaseHTTPRequestHandler):
+    """/v2/video/list/ that counts downloads and answers slowly enough for callers to pile up."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # /v2/user/info/: the token "token-a" belongs to the account "open-a"
+        token = self.headers["Authorization"].removeprefix("Bearer token-")
+        self._reply({"data": {"user": {"open_id": f"open-{token[0]}"}}})
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.downloads.append(self.headers["Authorization"])
+        time.sleep(0.3)
+        self._reply({"data": {"videos": VIDEOS, "cursor": 0, "has_more": False}})
+
+
+class MemorySnapshots:
+    """In-memory stand-in for the tiktok_* collections used by the snapshot module."""
+
+    def __init__(self):
+        self.accounts = {}
+        self.videos = {}
+
+    def install(self, monkeypatch):
+        monkeypatch.setattr(snapshot, "get_tiktok_account", lambda account: self.accounts.get(account))
+        monkeypatch.setattr(snapshot, "get_tiktok_videos", self.get_videos)
+        monkeypatch.setattr(snapshot, "upsert_tiktok_videos", self.upsert)
+        monkeypatch.setattr(snapshot, "mark_tiktok_account_refreshed", self.mark_refreshed)
+        monkeypatch.setattr(snapshot, "remove_unseen_tiktok_videos", lambda account, seen: 0)
+        monkeypatch.setattr(snapshot, "refresh_tiktok_rollups", lambda account, since=None: None)
+
+    def get_videos(self, account):
+        return sorted(self.videos.get(account, {}).values(), key=lambda v: v["create_time"], reverse=True)
+
+    def upsert(self, account, videos):
+        self.videos.setdefault(account, {}).update({video["id"]: dict(video) for video in videos})
+        return []
+
+    def mark_refreshed(self, account, full):
+        now = snapshot.datetime.utcnow()
+        self.accounts[account] = {"refreshed_at": now, "full_refreshed_at": now}
+
+
+@pytest.fixture
+def tiktok(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingTikTok)
+    server.lock = threading.Lock()
+    server.downloads = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(snapshot, "TIKTOK_API_BASE", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(snapshot, "_crawls", SingleFlight(result_ttl=snapshot.TIKTOK_COALESCE_TTL))
+    monkeypatch.setattr(snapshot, "_accounts", SingleFlight(result_ttl=snapshot.TIKTOK_TOKEN_ACCOUNT_TTL))
+    MemorySnapshots().install(monkeypatch)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _load_concurrently(tokens):
+    barrier = threading.Barrier(len(tokens))
+
+    def load(token):
+        barrier.wait()
+        return snapshot.get_snapshot_videos(token)
+
+    with ThreadPoolExecutor(max_workers=len(tokens)) as pool:
+        return list(pool.map(load, tokens))
+
+
+def test_concurrent_loads_of_one_account_download_once(tiktok):
+    results = _load_concurrently(["token-a"] * CALLERS)
+
+    assert tiktok.downloads == ["Bearer token-a"]
+    assert all([video["id"] for video in result] == ["v2", "v1"] for result in results)
+
+
+def test_accounts_are_not_coalesced_together(tiktok):
+    _load_concurrently(["token-a", "token-b"] * (CALLERS // 2))
+
+    assert sorted(tiktok.downloads) == ["Bearer token-a", "Bearer token-b"]
+
+
+def test_a_rotated_token_reuses_the_account_snapshot(tiktok):
+    snapshot.get_snapshot_videos("token-a1")
+    snapshot._crawls = SingleFlight()
+    snapshot.get_snapshot_videos("token-a2")
+
+    # Same open_id, snapshot still fresh: the second token does not crawl again
+    assert tiktok.downloads == ["Bearer token-a1"]
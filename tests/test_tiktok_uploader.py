@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("requests")
+
+from app.tiktok import uploader
+from app.tiktok.uploader import (
+    MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, ChunkUploadError, VideoSource, init_upload, plan_chunks, upload_chunks
+)
+
+MB = 1024 * 1024
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class FakeTikTok(BaseHTTPRequestHandler):
+    """The init and upload endpoints of the TikTok content posting API, in memory."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        server.init_requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self._reply(200, {"data": {"publish_id": "p.1", "upload_url": f"{server.base}/upload"}})
+
+    def do_PUT(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        start, end, total = (int(n) for n in CONTENT_RANGE.fullmatch(self.headers["Content-Range"]).groups())
+        server.puts.append((start, end, total, len(body)))
+        if server.failures:
+            self._reply(server.failures.pop(0))
+            return
+        server.received[start:end + 1] = body
+        self._reply(201 if end + 1 < total else 200)
+
+
+@pytest.fixture
+def tiktok(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTikTok)
+    server.base = f"http://127.0.0.1:{server.server_port}"
+    server.init_requests = []
+    server.puts = []
+    server.failures = []
+    server.received = bytearray()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(uploader, "TIKTOK_API_BASE", server.base)
+    monkeypatch.setattr(uploader, "BASE_RETRY_DELAY", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def video(tmp_path):
+    def make(size):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(os.urandom(size))
+        return VideoSource.from_file(str(path))
+    return make
+
+
+@pytest.mark.parametrize("size, requested, expected", [
+    (1 * MB, 10 * MB, (1 * MB, 1)),                 # Under 5 MB: one chunk of the whole video
+    (12 * MB, 10 * MB, (10 * MB, 1)),               # Remainder goes into the last chunk
+    (30 * MB, 1 * MB, (MIN_CHUNK_SIZE, 6)),         # Raised to the 5 MB minimum
+    (300 * MB, 100 * MB, (MAX_CHUNK_SIZE, 4)),      # Capped at the 64 MB maximum
+    (6 * MB, 10 * MB, (6 * MB, 1)),                 # Never larger than the video
+])
+def test_plan_chunks_follows_tiktok_limits(size, requested, expected):
+    chunk_size, total = plan_chunks(size, requested)
+
+    assert (chunk_size, total) == expected
+    last = size - chunk_size * (total - 1)
+    assert total == 1 or MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE
+    assert last < 2 * chunk_size
+
+
+def test_plan_chunks_rejects_empty_videos():
+    with pytest.raises(ValueError):
+        plan_chunks(0)
+
+
+def test_upload_sends_contiguous_content_ranges(tiktok, video):
+    source = video(12 * MB + 123)
+    chunk_size, total = plan_chunks(source.size, 5 * MB)
+
+    publish_id, upload_url = init_upload("token", "title", source.size, chunk_size, total)
+    response = upload_chunks(upload_url, source, chunk_size, total)
+
+    assert publish_id == "p.1"
+    assert tiktok.init_requests[0]["source_info"] == {
+        "source": "FILE_UPLOAD", "video_size": source.size, "chunk_size": chunk_size, "total_chunk_count": total
+    }
+    assert tiktok.puts == [
+        (0, 5 * MB - 1, source.size, 5 * MB),
+        (5 * MB, source.size - 1, source.size, source.size - 5 * MB),
+    ]
+    assert response.status_code == 200
+    with open(source.path, "rb") as f:
+        assert bytes(tiktok.received) == f.read()
+
+
+def test_upload_retries_only_the_failed_chunk(tiktok, video):
+    source = video(10 * MB)
+    chunk_size, total = plan_chunks(source.size, 5 * MB)
+    tiktok.failures = [503]
+
+    upload_chunks(f"{tiktok.base}/upload", source, chunk_size, total)
+
+    assert [put[:2] for put in tiktok.puts] == [(0, 5 * MB - 1), (0, 5 * MB - 1), (5 * MB, 10 * MB - 1)]
+    with open(source.path, "rb") as f:
+        assert bytes(tiktok.received) == f.read()
+
+
+def test_upload_gives_up_on_rejected_chunks(tiktok, video):
+    source = video(10 * MB)
+    tiktok.failures = [400]
+
+    with pytest.raises(ChunkUploadError, match="rejected: 400"):
+        upload_chunks(f"{tiktok.base}/upload", source, 5 * MB, 2)
+
+    assert len(tiktok.puts) == 1
@@ -0,0 +1,74 @@
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.video.frames import decoded_scenes, scene_frames
+
+SCENES = 20
+FRAME_SHAPE = (720, 1280, 3)
+FRAME_BYTES = 720 * 1280 * 3
+
+
+def _peak(run) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_decode_window_bounds_peak_memory():
+    def decode(index):
+        return np.full(FRAME_SHAPE, index % 255, dtype=np.uint8)
+
+    def encode_all():
+        for _, decoded, error in decoded_scenes(range(1, SCENES + 1), decode, window=2):
+            assert error is None
+            decoded.sum()
+
+    peak = _peak(encode_all)
+
+    # The window, the scene being encoded and some slack; never the whole video
+    assert peak < 5 * FRAME_BYTES
+    assert peak < SCENES * FRAME_BYTES / 3
+
+
+def test_decode_errors_are_reported_per_scene():
+    def decode(index):
+        if index == 2:
+            raise ValueError("broken image")
+        return np.zeros((2, 2, 3), dtype=np.uint8)
+
+    results = [(item, error) for item, _, error in decoded_scenes([1, 2, 3], decode)]
+
+    assert [item for item, _ in results] == [1, 2, 3]
+    assert isinstance(results[1][1], ValueError)
+    assert results[0][1] is None and results[2][1] is None
+
+
+def test_still_scene_costs_one_frame_regardless_of_duration():
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+
+    def write_all():
+        for data in scene_frames(frame, duration=10, fps=30):
+            assert len(data) == FRAME_BYTES
+
+    peak = _peak(write_all)
+
+    # 300 frames are written, but they are all the same bytes object
+    assert peak < 2 * FRAME_BYTES
+
+
+def test_fading_scene_holds_one_faded_frame_at_a_time():
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+
+    def write_all():
+        for data in scene_frames(frame, duration=10, fps=30, fade=2):
+            assert len(data) == FRAME_BYTES
+
+    peak = _peak(write_all)
+
+    # 120 faded frames; each needs a float64 intermediate (8 frames' worth) while it is built
+    assert peak < 12 * FRAME_BYTES
@@ -0,0 +1,53 @@
+import importlib
+import queue
+import time
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("googleapiclient")
+
+from app.upload_youtube import service
+
+BUILD_SECONDS = 0.2
+
+
+@pytest.fixture
+def slow_client(monkeypatch):
+    builds = []
+
+    def build_client():
+        time.sleep(BUILD_SECONDS)
+        builds.append(object())
+        return builds[-1]
+
+    monkeypatch.setattr(service, "_get_credentials", lambda: None)
+    monkeypatch.setattr(service, "_build_client", build_client)
+    monkeypatch.setattr(service, "_clients", queue.LifoQueue())
+    return builds
+
+
+def test_importing_the_blueprint_does_not_build_a_client(slow_client):
+    from app.upload_youtube import route
+
+    started = time.perf_counter()
+    importlib.reload(route)
+    elapsed = time.perf_counter() - started
+
+    assert slow_client == []
+    assert elapsed < BUILD_SECONDS
+
+
+def test_warm_up_pays_the_build_once(slow_client):
+    started = time.perf_counter()
+    service.warm_up()
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with service.youtube_client() as client:
+        pass
+    pooled = time.perf_counter() - started
+
+    assert len(slow_client) == 1
+    assert client is slow_client[0]
+    assert cold >= BUILD_SECONDS
+    assert pooled < BUILD_SECONDS / 10